@@ -4,11 +4,73 @@
 DOWNLOAD_DIR = "./output/videos"
 AUDIO_DIR = "./output/audio"
 TRANSCRIPT_DIR = "./output/transcripts"
+STATE_DIR = "./output/state"  # 各任务的阶段记录和中间结果(用于增量重新处理)
+# 产物索引: 以上目录中的文件按视频ID哈希分片存放(<目录>/<2位分片>/...)，
+# 各任务产物的路径、大小和状态记录在该数据库中，查找时不需要列出目录
+ARTIFACT_INDEX_PATH = "./output/index.db"
+DOWNLOAD_NATIVE = True        # 优先使用内置分段下载器只下载音频流(支持断点续传)，失败时使用 you-get
+DOWNLOAD_CONNECTIONS = 8      # 分段下载的并发连接数
+DOWNLOAD_CHUNK_MB = 4         # 分段大小(MB)
+
+# 视频已有字幕设置(可用时跳过下载和语音识别)
+BILIBILI_API_BASE = "https://api.bilibili.com"  # 可指向 python -m modules.mock_server 进行离线测试
+SUBTITLE_POLICY = "creator"   # off: 不使用 / creator: 仅UP主上传的CC字幕 / any: 也接受B站AI字幕
+SUBTITLE_MIN_COVERAGE = 0.5   # 字幕覆盖时长占视频时长的最低比例，低于该值时仍进行语音识别
 
 # 音频设置
 AUDIO_SAMPLE_RATE = 16000
 AUDIO_CHANNELS = 1
 SEGMENT_LENGTH_MS = 300000  # 5分钟切片
+SEGMENT_OVERLAP_MS = 3000   # 相邻切片的重叠长度，重叠区内的词按文本和时间对齐后合并，0 表示不重叠
+
+# 识别与纠错的性能参数(可用 python main.py --autotune <样本音频> 按本机硬件校准，
+# 结果写入 PROFILE_DIR/<主机名>.json，启动时自动加载并覆盖这里的值)
+RECOGNITION_WORKERS = 1       # 同时识别的音频片段数(共享同一个Vosk模型)
+VOSK_READ_FRAMES = 4000       # 每次送入Vosk识别器的帧数
+CORRECTION_MAX_LENGTH = 128   # MacBERT 纠错每次处理的最大长度
+PROFILE_DIR = "./profiles"
+
+# 单个视频内识别与纠错同时进行时的CPU分配
+CORRECTION_THREADS = 0        # 纠错(torch)使用的线程数/CPU核数，0 表示自动(CPU核数的1/4，至少1个)
+CPU_PINNING = True            # 将识别和纠错分别绑定到不同的CPU核(仅 Linux)，避免互相争抢
+
+# 语音占比评估设置(识别前抽样检测，纯音乐、无解说视频在批量处理中延后识别)
+TRIAGE_ENABLED = True
+TRIAGE_ALLOW_SKIP = False        # 是否直接跳过语音占比极低的视频(启发式评估，误判会得到空文字稿)
+TRIAGE_WINDOW_SECONDS = 20       # 每个抽样窗口的时长
+TRIAGE_WINDOWS = 6               # 抽样窗口数
+TRIAGE_SKIP_RATIO = 0.05         # 语音占比低于该值时跳过识别(需启用 TRIAGE_ALLOW_SKIP)
+TRIAGE_LOW_PRIORITY_RATIO = 0.2  # 语音占比低于该值时批量处理中延后识别
+
+# 音频指纹去重设置(重复上传的视频复用已有识别结果)
+FINGERPRINT_ENABLED = True
+FINGERPRINT_DIR = "./output/fingerprints"
+FINGERPRINT_MATCH_THRESHOLD = 0.25  # 对齐哈希数占新视频哈希总数的最低比例
+FINGERPRINT_MIN_MATCHES = 50        # 对齐哈希数的最低数量
+FINGERPRINT_MIN_COVERAGE = 0.9      # 对齐范围占新视频时长的最低比例，新视频只有一部分与已转写视频重叠(如引用)时仍进行识别
+
+# 批量处理流水线设置(--batch)
+PIPELINE_QUEUE_SIZE = 2               # 阶段之间的队列容量，限制下载领先识别的视频数量
+PIPELINE_PRIORITY_QUEUE_SIZE = 8      # 按语音占比排序的切片阶段的队列容量，只有队列中的任务之间能调整顺序(越大延后越充分，但提前提取的音频越多)
+PIPELINE_DOWNLOAD_CONCURRENCY = 2     # 同时下载的视频数
+PIPELINE_EXTRACT_CONCURRENCY = 2      # 同时运行的ffmpeg进程数
+PIPELINE_RECOGNIZE_CONCURRENCY = 1    # 识别进程数(每个进程各自加载一份模型)
+
+# 分布式识别设置(--distributed / --worker)
+# 任务队列地址，SQLite 数据库需放在各节点都能访问的共享目录中，音频片段也会写入该目录
+DISTRIBUTED_QUEUE_URL = "sqlite:///./output/shared/queue.db"
+DISTRIBUTED_LEASE_SECONDS = 600   # 任务租约时长，识别节点失联超过该时间后任务会被重新分配
+DISTRIBUTED_MAX_ATTEMPTS = 3      # 单个片段的最大尝试次数
+DISTRIBUTED_WAIT_TIMEOUT = 6 * 3600  # 协调节点等待全部识别结果的最长时间(秒)，0 表示一直等待
+
+# 直播实时转写设置(--live)
+LIVE_DIR = "./output/live"
+BILIBILI_LIVE_API_BASE = "https://api.live.bilibili.com"
+LIVE_CHUNK_MS = 200                 # 每次送入识别器的音频时长
+LIVE_MAX_LATENCY_SECONDS = 3        # 缓冲音频的上限，识别跟不上时丢弃最旧的音频
+LIVE_MAX_UTTERANCE_SECONDS = 15     # 单句最长时长，超过后强制断句输出
+LIVE_PARTIAL_INTERVAL = 0.5         # 输出中间结果的最小间隔(秒)
+LIVE_SRT_WINDOW = 20                # 滚动字幕文件保留的最近字幕条数
 
 # 语音识别设置
 # 选择识别引擎: "vosk" 或 "aliyun" 或 "tencent"
@@ -17,6 +79,13 @@ RECOGNITION_ENGINE = "vosk"
 # Vosk模型设置
 VOSK_MODEL_PATH = "vosk-model-cn-0.22" # 模型路径设置
 
+# 两级识别设置(--two-tier): 先用小模型快速生成草稿文字稿，再用大模型修订并覆盖输出文件
+TWO_TIER_ENABLED = False
+DRAFT_MODEL_PATH = "vosk-model-small-cn-0.22"  # 生成草稿的小模型
+DRAFT_WORKERS = 0                # 草稿阶段同时识别的片段数，0 表示CPU核数
+TWO_TIER_REFINE = "low_confidence"  # all: 大模型重新识别全部片段 / low_confidence: 只修订低置信度片段
+TWO_TIER_MIN_CONFIDENCE = 0.9    # 草稿片段的平均词置信度不低于该值时沿用草稿结果
+
 # 云服务API设置 (如果使用)
 ALIYUN_ACCESS_KEY = ""
 ALIYUN_ACCESS_SECRET = ""
@@ -25,12 +94,57 @@ ALIYUN_APPKEY = ""
 TENCENT_SECRET_ID = ""
 TENCENT_SECRET_KEY = ""
 
+# 云服务接口地址(可指向 python -m modules.mock_server 启动的本地模拟服务进行离线测试)
+ALIYUN_GATEWAY_URL = "https://nls-gateway-cn-shanghai.aliyuncs.com/stream/v1/FlashRecognizer"
+ALIYUN_META_URL = "https://nls-meta.cn-shanghai.aliyuncs.com/"
+TENCENT_ASR_ENDPOINT = "https://asr.tencentcloudapi.com/"
+
+# 云服务并发与限流设置(按账号的QPS配额调整)
+ALIYUN_ASR_QPS = 2             # 阿里云识别请求QPS
+TENCENT_ASR_QPS = 20           # 腾讯云 CreateRecTask QPS
+TENCENT_POLL_QPS = 50          # 腾讯云 DescribeTaskStatus QPS
+TENCENT_POLL_TIMEOUT = 1800    # 腾讯云单个识别任务的最长等待时间(秒)，超时视为失败
+CLOUD_ASR_MAX_CONCURRENCY = 8  # 同时进行的识别请求数(连接池大小)
+CLOUD_ASR_CHUNK_SECONDS = 60   # 每个识别请求的音频时长(腾讯云单次上传不超过5MB)
+
+# 模型内存管理
+# Vosk模型、纠错模型和分词词典按需加载，总占用超过预算(MB)时释放最久未使用的模型，0 表示不限制。
+# 例如识别进程只会加载Vosk模型，不会为纠错模型占用内存
+MODEL_MEMORY_BUDGET_MB = 0
+
 # 文本纠错处理功能设置
 TEXT_CORRECTION_ENABLED = True
-TEXT_CORRECTION_MODEL = 'macbert'# 可选值：macbert
+TEXT_CORRECTION_MODEL = 'macbert'# 可选值：macbert/pinyin(仅拼音索引纠错，速度快，需要词表)
+
+# 拼音索引纠错: 按拼音(带声调/不带声调/模糊音)匹配词表中的专有名词，修正同音错字。
+# 词表为 PINYIN_LEXICON_PATHS 或 --pinyin-lexicon 指定的文件(格式与用户词典相同)，不使用分词用的用户词典
+PINYIN_LEXICON_PATHS = []
+PINYIN_PRECORRECT = True      # 使用模型纠错时，先用拼音索引修正同音的专有名词(需要词表)
+PINYIN_MIN_SYLLABLES = 2      # 不带声调匹配的最少音节数
+PINYIN_FUZZY_MIN_SYLLABLES = 3  # 模糊音(平翘舌、前后鼻音等)匹配的最少音节数
+PINYIN_CONTEXT_MIN_SYLLABLES = 3  # 少于该音节数的片段(如 公事→公式)只有在原文不是常用词时才替换
+PINYIN_SHORT_FREQ_RATIO = 1.0   # 短片段替换时，词表中的词频至少为原片段在分词词典中词频的倍数
 
 # 文本处理器设置
-TEXT_PROCESSOR = "snownlp"  # 可选值：snownlp/thulac/hanlp/jieba
+TEXT_PROCESSOR = "jieba"  # 可选值：jieba/snownlp/thulac/hanlp (可用 python -m modules.text_processor <语料> 对比速度和内存)
+
+# 标点与分段方式: "pos"(基于词性标注) 或 "pause"(基于词级时间戳的停顿，速度更快)
+# pause 模式使用识别得到的词序列，纠错后的文本按字对齐回各词，保留词级时间戳
+PUNCTUATION_MODE = "pos"
+PAUSE_COMMA_GAP = 0.3      # 停顿超过该值(秒)添加逗号
+PAUSE_PERIOD_GAP = 0.8     # 停顿超过该值(秒)添加句号
+PAUSE_PARAGRAPH_GAP = 2.0  # 停顿超过该值(秒)另起段落
+
+# 字幕分条设置(srt/vtt/ass 输出)
+CUE_MAX_GAP = 0.6          # 词间停顿超过该值(秒)另起一条字幕
+CUE_MAX_CHARS = 20         # 每条字幕的最大字数
+CUE_MAX_DURATION = 5.0     # 每条字幕的最长显示时间(秒)
+
+# 分词词典设置
+# 用户词典文件列表，每行格式: 词语 [词频] [词性]，可按频道分别维护
+USER_DICT_PATHS = []
+# 合并词典及前缀词典缓存目录(按内容哈希命名，词典变化时自动重建)
+JIEBA_CACHE_DIR = "./output/cache/jieba"
 
 class ProcessorConfig:
     THULAC_MODEL_PATH = "./models/thulac_models"
@@ -6,6 +6,7 @@ B站视频转文字稿程序
 """
 
 import os
+import re
 import sys
 import argparse
 import time
@@ -23,12 +24,544 @@ def check_dependencies():
         subprocess.check_call([sys.executable, "-m", "pip", "install", "jieba"])
         print("jieba安装完成")
 
-from modules.video_downloader import VideoDownloader
 from modules.audio_extractor import AudioExtractor
 from modules.speech_recognizer import SpeechRecognizer
-from modules.transcript_generator import TranscriptGenerator
+from modules.pipeline import build_cue_options, build_downloader, build_draft_recognizer, build_recognizer_kwargs, build_transcript_generator, build_speech_triage, build_text_corrector, format_triage, correct_results, filter_valid_results
+from modules.text_processor import PROCESSORS, run_benchmark, print_benchmark
+from modules.autotune import load_profile
+from modules.chunk_merger import ChunkMerger, merge_chunks
+from modules.two_tier import TwoTierRecognizer
+from modules.resource_monitor import available_cores, pin_current_thread, split_cores
+from modules.stage_tracker import StageTracker, code_version, file_digest, file_signature, list_tracked_jobs
 import config
 
+def normalize_url(url):
+    """将BV号转换为完整的视频链接"""
+    url = url.strip()
+    if url.startswith("BV") and "/" not in url:
+        return f"https://www.bilibili.com/video/{url}"
+    return url
+
+def run_batch_mode(args):
+    """从列表文件读取多个视频，使用异步流水线批量处理"""
+    from modules.pipeline import run_batch
+    
+    with open(args.batch, "r", encoding="utf-8") as f:
+        urls = [normalize_url(line) for line in f if line.strip() and not line.startswith("#")]
+    if not urls:
+        print("错误: 批量列表文件中没有视频链接")
+        return 1
+    # 流水线的识别阶段在进程池中逐个视频识别，不支持两级识别和分布式识别
+    ignored = [flag for flag, enabled in (("--two-tier", args.two_tier), ("--distributed", args.distributed)) if enabled]
+    if ignored:
+        print(f"警告: 批量处理不支持 {', '.join(ignored)}，将使用本机单级识别")
+    
+    start_time = time.time()
+    print(f"=== 批量处理 {len(urls)} 个视频 ===")
+    completed, failed = run_batch(urls, args)
+    
+    print("\n=== 批量处理完成 ===")
+    print(f"总耗时: {time.time() - start_time:.2f} 秒")
+    print(f"成功: {len(completed)}，失败: {len(failed)}")
+    for job in completed:
+        print(f"- {job['url']}: " + ", ".join(job["output_files"].values()))
+    for job in failed:
+        print(f"- {job['url']} 在 {job['failed_stage']} 阶段失败: {job['error']}")
+    return 1 if failed else 0
+
+def run_worker_mode(args):
+    """作为识别节点运行，从任务队列租用音频片段进行识别"""
+    from modules.distributed import get_work_queue, Worker
+    
+    work_queue = get_work_queue(args.queue, max_attempts=config.DISTRIBUTED_MAX_ATTEMPTS)
+    recognizer = SpeechRecognizer(args.engine, **build_recognizer_kwargs(args.engine))
+    worker = Worker(work_queue, recognizer, lease_seconds=config.DISTRIBUTED_LEASE_SECONDS)
+    try:
+        processed = worker.run()
+    except KeyboardInterrupt:
+        print("\n识别节点已停止")
+        return 0
+    print(f"识别节点退出，共处理 {processed} 个任务")
+    return 0
+
+def run_live_mode(args):
+    """实时转写直播流或持续输入的音频，输出滚动字幕和JSONL结果"""
+    from modules.speech_recognizer import get_vosk_model
+    from modules.live_transcriber import (
+        LiveAudioSource, LiveTranscriber, LiveTranscriptWriter, resolve_live_stream
+    )
+    
+    source = args.live
+    if source == "-" or os.path.exists(source):
+        name = "stdin" if source == "-" else os.path.splitext(os.path.basename(source))[0]
+    else:
+        print(f"正在解析直播间: {source}")
+        name = f"live_{re.sub(r'[^0-9A-Za-z]+', '_', source).strip('_')[-32:]}"
+        source = resolve_live_stream(source, api_base=config.BILIBILI_LIVE_API_BASE)
+    
+    if not os.path.exists(config.VOSK_MODEL_PATH):
+        print(f"错误: Vosk模型不存在: {config.VOSK_MODEL_PATH}")
+        return 1
+    
+    audio_source = LiveAudioSource(
+        source,
+        sample_rate=config.AUDIO_SAMPLE_RATE,
+        chunk_ms=config.LIVE_CHUNK_MS,
+        max_buffered_chunks=max(1, config.LIVE_MAX_LATENCY_SECONDS * 1000 // config.LIVE_CHUNK_MS)
+    )
+    writer = LiveTranscriptWriter(config.LIVE_DIR, name, window=config.LIVE_SRT_WINDOW)
+    
+    with get_vosk_model(config.VOSK_MODEL_PATH) as model:
+        transcriber = LiveTranscriber(
+            model,
+            sample_rate=config.AUDIO_SAMPLE_RATE,
+            max_utterance_seconds=config.LIVE_MAX_UTTERANCE_SECONDS,
+            partial_interval=config.LIVE_PARTIAL_INTERVAL
+        )
+        print(f"开始实时转写，字幕输出到: {writer.rolling_path}")
+        audio_source.start()
+        try:
+            transcriber.run(audio_source.chunks(), writer)
+        except KeyboardInterrupt:
+            print("\n实时转写已停止")
+        finally:
+            audio_source.stop()
+            writer.close()
+    
+    print(f"共输出 {writer.cue_count} 条字幕，因识别延迟丢弃 {audio_source.dropped_chunks} 个音频块")
+    print(f"- SRT: {writer.srt_path}")
+    print(f"- JSONL: {writer.jsonl_path}")
+    return 0
+
+def run_autotune_mode(args):
+    """在样本音频上校准识别和纠错参数，写入本机的性能配置文件"""
+    import shutil
+    import tempfile
+    from modules.autotune import Autotuner, save_profile
+    
+    sample = args.autotune
+    if not os.path.exists(sample):
+        print(f"错误: 样本文件不存在: {sample}")
+        return 1
+    
+    work_dir = tempfile.mkdtemp(prefix="autotune_")
+    try:
+        if not sample.lower().endswith(".wav"):
+            extractor = AudioExtractor(work_dir, sample_rate=config.AUDIO_SAMPLE_RATE, channels=config.AUDIO_CHANNELS)
+            sample = extractor.extract_audio(sample)
+        
+        tuner = Autotuner(sample, work_dir, config.VOSK_MODEL_PATH, sample_rate=config.AUDIO_SAMPLE_RATE)
+        profile = tuner.run(tune_correction=args.text_correction)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    path = save_profile(profile, config.PROFILE_DIR)
+    print(f"\n性能配置已保存: {path}")
+    for key, value in profile["settings"].items():
+        print(f"- {key} = {value}")
+    return 0
+
+def process_video(args, url=None, video_path=None):
+    """
+    处理单个视频: 下载 → 提取音频 → 识别 → 纠错 → 生成文字稿
+    
+    视频已有可用字幕时直接使用字幕，跳过下载、提取音频和识别。每个阶段的输入摘要和产物记录在 STATE_DIR 中，重新处理时只计算输入发生变化的阶段
+    
+    Args:
+        args: 命令行参数
+        url: B站视频链接
+        video_path: 本地视频路径(跳过下载时使用)
+        
+    Returns:
+        dict: 生成的文件路径字典
+    """
+    downloader = build_downloader(args)
+    if video_path is not None:
+        if not video_path or not os.path.exists(video_path):
+            raise ValueError("跳过下载时必须提供有效的视频路径")
+        job_id = os.path.splitext(os.path.basename(video_path))[0]
+    else:
+        job_id = downloader.get_video_id(url)
+    tracker = StageTracker(config.STATE_DIR, job_id)
+    tracker.set_source(url=url, video_path=video_path)
+    
+    def fresh(stage, inputs):
+        if args.force or not tracker.is_fresh(stage, inputs):
+            return False
+        print(f"阶段 {stage} 的输入未变化，复用上次的结果")
+        return True
+    
+    # 0. 优先使用视频已有的字幕
+    subtitle_results = None
+    triage = None
+    # 与识别同时完成的纠错结果
+    corrected_results = None
+    correction_failed = False
+    if url is not None and args.subtitles != "off":
+        inputs = {"url": url, "policy": args.subtitles, "min_coverage": config.SUBTITLE_MIN_COVERAGE}
+        if fresh("subtitles", inputs):
+            subtitle_results = tracker.load_json("subtitles.json")
+        else:
+            try:
+                subtitle_results = downloader.fetch_subtitles(
+                    url, policy=args.subtitles, min_coverage=config.SUBTITLE_MIN_COVERAGE
+                )
+                path, _ = tracker.save_json("subtitles.json", subtitle_results)
+                tracker.record("subtitles", inputs, {"found": subtitle_results is not None}, [path])
+            except Exception as e:
+                print(f"查询视频字幕失败: {e}，将进行语音识别")
+    
+    if subtitle_results is not None:
+        recognition_results = subtitle_results
+        path, digest = tracker.save_json("recognition.json", recognition_results)
+        tracker.record("recognize", {"subtitles": digest}, {"digest": digest}, [path])
+        base_filename = job_id
+    else:
+        # 1. 下载视频
+        if video_path is not None:
+            print(f"跳过下载，使用本地视频: {video_path}")
+        else:
+            inputs = {"url": url}
+            if fresh("download", inputs):
+                video_path = tracker.outputs("download")["video_path"]
+            else:
+                print(f"开始下载视频: {url}")
+                video_path = downloader.download(url)
+            
+                if not video_path or not os.path.exists(video_path):
+                    raise ValueError("视频下载失败，请检查视频链接是否有效或尝试提供cookies文件")
+                tracker.record("download", inputs, {"video_path": video_path}, [video_path])
+    
+        # 2. 提取音频
+        extractor = AudioExtractor(
+            config.AUDIO_DIR,
+            sample_rate=config.AUDIO_SAMPLE_RATE,
+            channels=config.AUDIO_CHANNELS
+        )
+        inputs = {
+            "video": file_signature(video_path),
+            "sample_rate": config.AUDIO_SAMPLE_RATE,
+            "channels": config.AUDIO_CHANNELS
+        }
+        if fresh("extract", inputs):
+            audio_path = tracker.outputs("extract")["audio_path"]
+        else:
+            audio_path = extractor.extract_audio(video_path, job_id)
+            tracker.record("extract", inputs, {"audio_path": audio_path}, [audio_path])
+    
+        # 音频、片段和文字稿都按视频ID命名，分P下载的文件名(如 <ID>[00].mp4)不作为任务标识
+        video_id = job_id
+    
+        # 3. 评估语音占比，启用 TRIAGE_ALLOW_SKIP 时纯音乐、无解说的视频跳过识别
+        if args.triage:
+            inputs = {
+                "audio": file_signature(audio_path),
+                "window_seconds": config.TRIAGE_WINDOW_SECONDS,
+                "windows": config.TRIAGE_WINDOWS,
+                "skip_ratio": config.TRIAGE_SKIP_RATIO,
+                "low_priority_ratio": config.TRIAGE_LOW_PRIORITY_RATIO,
+                "allow_skip": config.TRIAGE_ALLOW_SKIP,
+                "code": code_version("speech_triage")
+            }
+            if fresh("triage", inputs):
+                triage = tracker.outputs("triage")
+            else:
+                triage = build_speech_triage().analyze(audio_path)
+                tracker.record("triage", inputs, triage, [])
+            print(format_triage(triage))
+        
+        if triage is not None and triage["decision"] == "skip":
+            print("几乎没有检测到语音，跳过语音识别")
+            recognition_results = []
+            path, digest = tracker.save_json("recognition.json", recognition_results)
+            tracker.record("recognize", {"triage": triage}, {"digest": digest}, [path])
+        else:
+            # 4. 分割音频并识别
+            inputs = {
+                "audio": file_signature(audio_path),
+                "engine": args.engine,
+                "model": config.VOSK_MODEL_PATH if args.engine == "vosk" else None,
+                "segment_length_ms": config.SEGMENT_LENGTH_MS,
+                "overlap_ms": config.SEGMENT_OVERLAP_MS,
+                "code": code_version("chunk_merger"),
+                "read_frames": config.VOSK_READ_FRAMES if args.engine == "vosk" else None,
+                "two_tier": {
+                    "draft_model": config.DRAFT_MODEL_PATH,
+                    "refine": config.TWO_TIER_REFINE,
+                    "min_confidence": config.TWO_TIER_MIN_CONFIDENCE
+                } if args.two_tier and args.engine == "vosk" else None,
+                "dedup": args.dedup
+            }
+            if fresh("recognize", inputs):
+                recognition_results = tracker.load_json("recognition.json")
+            else:
+                # 启用纠错时，每个片段识别完成后立即在后台线程中纠错，与后续片段的识别同时进行
+                correction_worker = previous_cores = None
+                if args.text_correction:
+                    correction_worker, previous_cores = start_correction_worker(args)
+                
+                def publish_draft(draft_results):
+                    # 草稿直接写入最终的输出文件，修订完成后被覆盖
+                    valid_results = filter_valid_results(draft_results)
+                    if not valid_results:
+                        return
+                    tracker.invalidate("generate")
+                    output_files = build_transcript_generator(args).generate(
+                        valid_results,
+                        video_id,
+                        formats=args.formats,
+                        metadata={"draft": True, "triage": triage}
+                    )
+                    print("草稿文字稿已生成: " + ", ".join(output_files.values()))
+                
+                try:
+                    recognition_results = recognize_audio(
+                        args, extractor, audio_path, video_id, correction_worker, on_draft=publish_draft
+                    )
+                finally:
+                    if previous_cores is not None:
+                        pin_current_thread(previous_cores)
+                    if correction_worker is not None:
+                        corrected_results = correction_worker.close()
+                        correction_failed = corrected_results is None
+                path, digest = tracker.save_json("recognition.json", recognition_results)
+                tracker.record("recognize", inputs, {"digest": digest}, [path])
+    
+        base_filename = video_id
+    recognition_digest = tracker.outputs("recognize")["digest"]
+    
+    # 5. 文本纠错
+    inputs = {
+        "recognition": recognition_digest,
+        "enabled": args.text_correction,
+        "model": args.correction_model if args.text_correction else None,
+        "max_length": config.CORRECTION_MAX_LENGTH if args.text_correction else None,
+        "pinyin": {
+            "lexicons": [file_digest(path) for path in args.pinyin_lexicon],
+            "precorrect": config.PINYIN_PRECORRECT,
+            "min_syllables": config.PINYIN_MIN_SYLLABLES,
+            "fuzzy_min_syllables": config.PINYIN_FUZZY_MIN_SYLLABLES,
+            "context_min_syllables": config.PINYIN_CONTEXT_MIN_SYLLABLES,
+            "short_freq_ratio": config.PINYIN_SHORT_FREQ_RATIO
+        } if args.text_correction else None,
+        "code": code_version(
+            "text_corrector", "pinyin_corrector", "pipeline", "correction_worker"
+        ) if args.text_correction else None
+    }
+    if fresh("correct", inputs):
+        recognition_results = tracker.load_json("corrected.json")
+    else:
+        corrected = True
+        if corrected_results is not None:
+            recognition_results = corrected_results
+            print("文本纠错处理完成")
+        elif correction_failed:
+            corrected = False
+        elif args.text_correction:
+            try:
+                corrector = build_text_corrector(args)
+                
+                # 对识别结果进行纠错处理
+                correct_results(recognition_results, corrector)
+                print("文本纠错处理完成")
+            except Exception as e:
+                print(f"文本纠错初始化失败: {e}")
+                print("将继续处理，但不进行文本纠错")
+                corrected = False
+        path, digest = tracker.save_json("corrected.json", recognition_results)
+        # 纠错失败时不记录该阶段，下次运行会重新尝试
+        if corrected:
+            tracker.record("correct", inputs, {"digest": digest}, [path])
+    corrected_digest = file_digest(tracker.artifact_path("corrected.json"))
+    
+    # 6. 生成文字稿
+    pause_gaps = {
+        "comma_gap": config.PAUSE_COMMA_GAP,
+        "period_gap": config.PAUSE_PERIOD_GAP,
+        "paragraph_gap": config.PAUSE_PARAGRAPH_GAP
+    }
+    inputs = {
+        "corrected": corrected_digest,
+        "base_filename": base_filename,
+        "formats": sorted(args.formats),
+        "punctuation": args.punctuation,
+        "text_processor": args.text_processor,
+        "pause_gaps": pause_gaps if args.punctuation == "pause" else None,
+        "user_dicts": [file_digest(path) for path in args.user_dict],
+        "triage": triage,
+        "cues": build_cue_options(),
+        "code": code_version("transcript_generator", "subtitle_cues", "text_processor_improved", "text_processor", "tokenizer_cache")
+    }
+    if fresh("generate", inputs):
+        return tracker.outputs("generate")["output_files"]
+    
+    # 检查识别结果是否有效
+    valid_results = filter_valid_results(recognition_results)
+    
+    skipped = triage is not None and triage["decision"] == "skip"
+    if not valid_results and not skipped:
+        raise ValueError("所有识别结果均无效，无法生成文字稿")
+        
+    print(f"有效识别结果数量: {len(valid_results)}/{len(recognition_results)}")
+    
+    generator = build_transcript_generator(args)
+    output_files = generator.generate(
+        valid_results,
+        base_filename,
+        formats=args.formats,
+        metadata={"triage": triage} if triage is not None else None
+    )
+    tracker.record("generate", inputs, {"output_files": output_files}, output_files.values())
+    return output_files
+
+def recognize_audio(args, extractor, audio_path, video_id, correction_worker=None, on_draft=None):
+    """
+    分割音频并进行语音识别，重复上传的视频直接复用已有识别结果
+    
+    Args:
+        correction_worker: 已启动的 CorrectionWorker，每个片段确定边界后立即提交纠错，
+            与后续片段的识别同时进行
+        on_draft: 两级识别时草稿完成后调用的函数，参数为草稿识别结果
+    
+    Returns:
+        list: 合并重叠部分后的识别结果
+    """
+    def finished(result):
+        recognition_results.append(result)
+        if correction_worker is not None:
+            correction_worker.submit(result)
+    
+    recognition_results = []
+    
+    # 查找重复上传的视频，命中时直接复用已有识别结果
+    deduplicator = None
+    if args.dedup:
+        from modules.fingerprint import TranscriptDeduplicator
+        deduplicator = TranscriptDeduplicator(
+            config.FINGERPRINT_DIR,
+            threshold=config.FINGERPRINT_MATCH_THRESHOLD,
+            min_matches=config.FINGERPRINT_MIN_MATCHES,
+            min_coverage=config.FINGERPRINT_MIN_COVERAGE
+        )
+        reused_result = deduplicator.lookup(audio_path, video_id)
+        if reused_result is not None:
+            finished(reused_result)
+            return recognition_results
+    
+    if args.distributed:
+        # 分割音频并提交到任务队列，等待各识别节点回传结果
+        from modules.distributed import get_work_queue, Coordinator
+        
+        work_queue = get_work_queue(args.queue, max_attempts=config.DISTRIBUTED_MAX_ATTEMPTS)
+        coordinator = Coordinator(
+            work_queue,
+            segment_length_ms=config.SEGMENT_LENGTH_MS,
+            overlap_ms=config.SEGMENT_OVERLAP_MS,
+            sample_rate=config.AUDIO_SAMPLE_RATE,
+            channels=config.AUDIO_CHANNELS
+        )
+        coordinator.submit(audio_path, video_id)
+        # 合并相邻片段的重叠部分
+        for result in merge_chunks(coordinator.wait(video_id, timeout=config.DISTRIBUTED_WAIT_TIMEOUT or None)):
+            finished(result)
+    else:
+        # 分割音频
+        audio_segments = extractor.segment_audio(
+            audio_path, 
+            segment_length_ms=config.SEGMENT_LENGTH_MS,
+            overlap_ms=config.SEGMENT_OVERLAP_MS,
+            video_id=video_id
+        )
+        
+        # 语音识别(云端引擎会并发提交)，每个片段与下一个片段合并重叠部分后即确定
+        recognizer = SpeechRecognizer(args.engine, **build_recognizer_kwargs(args.engine))
+        draft_recognizer = None
+        if args.two_tier and args.engine == "vosk":
+            try:
+                draft_recognizer = build_draft_recognizer()
+            except ValueError as e:
+                print(f"警告: {e}，不生成草稿，直接使用大模型识别")
+        
+        if draft_recognizer is not None:
+            # 先用小模型生成草稿，再用大模型修订
+            two_tier = TwoTierRecognizer(
+                draft_recognizer, recognizer,
+                refine=config.TWO_TIER_REFINE,
+                min_confidence=config.TWO_TIER_MIN_CONFIDENCE
+            )
+            # 修订结果逐个确定边界，与纠错同时进行
+            for result in two_tier.iter_results(
+                audio_segments, config.SEGMENT_LENGTH_MS, config.SEGMENT_OVERLAP_MS, on_draft=on_draft
+            ):
+                finished(result)
+        else:
+            merger = ChunkMerger()
+            for i, result in enumerate(recognizer.recognize_iter(audio_segments)):
+                result["offset"] = i * config.SEGMENT_LENGTH_MS / 1000
+                result["overlap"] = config.SEGMENT_OVERLAP_MS / 1000
+                merged = merger.add(result)
+                if merged is not None:
+                    finished(merged)
+            merged = merger.finish()
+            if merged is not None:
+                finished(merged)
+    
+    # 记录指纹和原始识别结果，供之后的重复视频复用
+    if deduplicator is not None:
+        deduplicator.register(video_id, recognition_results)
+    return recognition_results
+
+def start_correction_worker(args):
+    """
+    启动后台纠错线程。识别和纠错各自使用一部分CPU核: 纠错线程绑定 CORRECTION_THREADS 个核
+    并限制 torch 线程数，调用线程(识别)绑定其余的核
+    
+    Returns:
+        tuple: (CorrectionWorker, 识别线程绑定前的CPU核，用于恢复；未绑定时为 None)
+    """
+    from modules.correction_worker import CorrectionWorker
+    
+    def factory():
+        return build_text_corrector(args)
+    
+    threads = config.CORRECTION_THREADS or max(1, len(available_cores()) // 4)
+    recognition_cores, correction_cores = split_cores(threads)
+    if not config.CPU_PINNING or recognition_cores == correction_cores:
+        return CorrectionWorker(factory, threads=threads).start(), None
+    worker = CorrectionWorker(factory, cores=correction_cores, threads=threads).start()
+    print(f"识别使用CPU核 {recognition_cores}，纠错使用CPU核 {correction_cores}")
+    return worker, pin_current_thread(recognition_cores)
+
+def run_artifacts_mode(args):
+    """打印产物索引中某个视频的全部产物"""
+    from modules.artifact_index import get_artifact_index
+    
+    artifacts = get_artifact_index().artifacts(args.artifacts)
+    if not artifacts:
+        print(f"索引中没有 {args.artifacts} 的产物记录")
+        return 1
+    for kind, info in artifacts.items():
+        size = f"{info['size'] / 1024 / 1024:.1f} MB" if info["size"] is not None else "-"
+        print(f"{kind:<16} {info['state']:<6} {size:>10}  {info['path']}")
+    return 0
+
+def run_reprocess_mode(args):
+    """重新处理所有已记录的任务，只重新计算输入发生变化的阶段"""
+    job_ids = list_tracked_jobs(config.STATE_DIR)
+    print(f"=== 重新处理 {len(job_ids)} 个任务 ===")
+    start_time = time.time()
+    failed = 0
+    for job_id in job_ids:
+        source = StageTracker(config.STATE_DIR, job_id).state["source"]
+        print(f"\n--- {job_id} ---")
+        try:
+            process_video(args, url=source.get("url"), video_path=source.get("video_path"))
+        except Exception as e:
+            print(f"错误: {job_id} 处理失败: {e}")
+            failed += 1
+    print(f"\n重新处理完成，失败 {failed} 个，总耗时: {time.time() - start_time:.2f} 秒")
+    return 1 if failed else 0
+
 def main():
     # 检查并安装依赖
     check_dependencies()
@@ -38,7 +571,7 @@ def main():
     parser.add_argument("url", nargs="?", help="B站视频链接或BV号")
     parser.add_argument("--engine", choices=["vosk", "aliyun", "tencent"], 
                         default=config.RECOGNITION_ENGINE, help="语音识别引擎")
-    parser.add_argument("--formats", nargs="+", choices=["txt", "srt", "json"], 
+    parser.add_argument("--formats", nargs="+", choices=["txt", "srt", "vtt", "ass", "json"], 
                         default=["txt", "srt"], help="输出格式")
     parser.add_argument("--skip-download", action="store_true", 
                         help="跳过视频下载(需提供视频路径)")
@@ -48,10 +581,73 @@ def main():
                         help="改善文本可读性(添加标点、分段落等)")
     parser.add_argument("--text-correction", action="store_true",default=config.TEXT_CORRECTION_ENABLED, 
                         help="启用文本纠错功能")
-    parser.add_argument("--correction-model", choices=["kenlm", "bert", "macbert", "t5"], 
-                        default=config.TEXT_CORRECTION_MODEL, help="文本纠错使用的模型")
+    parser.add_argument("--correction-model", choices=["kenlm", "bert", "macbert", "t5", "pinyin"], 
+                        default=config.TEXT_CORRECTION_MODEL,
+                        help="文本纠错使用的模型(pinyin: 仅按拼音索引修正词表中的同音词，需要词表)")
+    parser.add_argument("--pinyin-lexicon", nargs="+", default=config.PINYIN_LEXICON_PATHS,
+                        help="拼音纠错词表(人名、作品名、术语等，格式与用户词典相同)，与分词用的 --user-dict 相互独立")
+    parser.add_argument("--punctuation", choices=["pos", "pause"], default=config.PUNCTUATION_MODE,
+                        help="标点与分段方式: pos(词性标注) 或 pause(词间停顿)")
+    parser.add_argument("--text-processor", choices=list(PROCESSORS), default=config.TEXT_PROCESSOR.lower(),
+                        help="pos 标点方式使用的分词后端")
+    parser.add_argument("--benchmark-processors", nargs="+", metavar="CORPUS",
+                        help="对比各分词后端在给定语料(txt 或文字稿 json，可为目录)上的速度、加载耗时和内存")
+    parser.add_argument("--user-dict", nargs="+", default=config.USER_DICT_PATHS,
+                        help="用户词典文件(每行: 词语 [词频] [词性])")
+    parser.add_argument("--subtitles", choices=["off", "creator", "any"], default=config.SUBTITLE_POLICY,
+                        help="使用视频已有字幕跳过语音识别: off(不使用) creator(仅UP主字幕) any(也接受AI字幕)")
+    parser.add_argument("--no-triage", dest="triage", action="store_false", default=config.TRIAGE_ENABLED,
+                        help="不在识别前评估语音占比(默认只评估并记录语音占比，启用 TRIAGE_ALLOW_SKIP 时纯音乐、无解说的视频跳过识别)")
+    parser.add_argument("--no-dedup", dest="dedup", action="store_false", default=config.FINGERPRINT_ENABLED,
+                        help="不使用音频指纹查找重复视频")
+    parser.add_argument("--batch", help="批量处理: 每行一个视频链接或BV号的列表文件，使用异步流水线并行处理")
+    parser.add_argument("--distributed", action="store_true",
+                        help="分布式识别: 将音频片段提交到任务队列，由各节点上的识别进程处理")
+    parser.add_argument("--worker", action="store_true", help="作为识别节点运行，处理任务队列中的片段")
+    parser.add_argument("--queue", default=config.DISTRIBUTED_QUEUE_URL, help="分布式任务队列地址")
+    parser.add_argument("--live", metavar="SOURCE",
+                        help="实时转写: B站直播间链接或房间号、本地音视频文件，或 - 表示从标准输入读取")
+    parser.add_argument("--autotune", metavar="SAMPLE",
+                        help="在样本音频/视频上校准切片长度、并行识别数、Vosk读取帧数和纠错长度，保存为本机性能配置")
+    parser.add_argument("--two-tier", action="store_true", default=config.TWO_TIER_ENABLED,
+                        help="两级识别: 先用小模型快速生成草稿文字稿，再用大模型修订并覆盖输出(仅 vosk)")
+    parser.add_argument("--no-profile", dest="profile", action="store_false",
+                        help="不加载本机的性能配置文件")
+    parser.add_argument("--artifacts", metavar="VIDEO_ID",
+                        help="从产物索引中查询视频的下载文件、音频、片段、文字稿等的路径和状态")
+    parser.add_argument("--reprocess", action="store_true",
+                        help="重新处理所有已记录的任务，只重新计算输入发生变化的阶段")
+    parser.add_argument("--force", action="store_true", help="忽略已记录的阶段结果，全部重新计算")
     args = parser.parse_args()
     
+    if args.autotune:
+        return run_autotune_mode(args)
+    
+    # 加载本机的性能配置(由 --autotune 生成)
+    if args.profile:
+        applied = load_profile(config, config.PROFILE_DIR)
+        if applied:
+            print(f"已加载本机性能配置: {applied}")
+    
+    if args.benchmark_processors:
+        print_benchmark(run_benchmark(args.benchmark_processors))
+        return 0
+    
+    if args.artifacts:
+        return run_artifacts_mode(args)
+    
+    if args.worker:
+        return run_worker_mode(args)
+    
+    if args.batch:
+        return run_batch_mode(args)
+    
+    if args.reprocess:
+        return run_reprocess_mode(args)
+    
+    if args.live:
+        return run_live_mode(args)
+    
     # 如果没有提供视频链接，交互式输入BV号
     if not args.url and not args.skip_download:
         print("请输入B站视频的BV号:")
@@ -77,134 +673,13 @@ def main():
     print("=== B站视频转文字稿程序 ===")
     
     try:
-        # 1. 下载视频
-        video_path = None
         if args.skip_download:
-            if not args.video_path or not os.path.exists(args.video_path):
-                raise ValueError("跳过下载时必须提供有效的视频路径")
-            video_path = args.video_path
-            print(f"跳过下载，使用本地视频: {video_path}")
+            output_files = process_video(args, video_path=args.video_path or "")
         else:
             # 确保URL不为空且格式正确
             if not args.url:
                 raise ValueError("必须提供有效的B站视频链接或BV号")
-                
-            # 如果只输入了BV号，转换为完整URL
-            if args.url.startswith("BV") and "/" not in args.url:
-                args.url = f"https://www.bilibili.com/video/{args.url}"
-                
-            print(f"开始下载视频: {args.url}")
-            downloader = VideoDownloader(config.DOWNLOAD_DIR, cookies_path=args.cookies)
-            video_path = downloader.download(args.url)
-            
-            if not video_path or not os.path.exists(video_path):
-                raise ValueError("视频下载失败，请检查视频链接是否有效或尝试提供cookies文件")
-        
-        # 2. 提取音频
-        extractor = AudioExtractor(
-            config.AUDIO_DIR,
-            sample_rate=config.AUDIO_SAMPLE_RATE,
-            channels=config.AUDIO_CHANNELS
-        )
-        audio_path = extractor.extract_audio(video_path)
-        
-        # 3. 分割音频
-        audio_segments = extractor.segment_audio(
-            audio_path, 
-            segment_length_ms=config.SEGMENT_LENGTH_MS
-        )
-        
-        # 4. 语音识别
-        recognizer_kwargs = {}
-        if args.engine == "vosk":
-            recognizer_kwargs = {"model_path": config.VOSK_MODEL_PATH}
-        elif args.engine == "aliyun":
-            recognizer_kwargs = {
-                "access_key": config.ALIYUN_ACCESS_KEY,
-                "access_secret": config.ALIYUN_ACCESS_SECRET,
-                "app_key": config.ALIYUN_APPKEY
-            }
-        elif args.engine == "tencent":
-            recognizer_kwargs = {
-                "secret_id": config.TENCENT_SECRET_ID,
-                "secret_key": config.TENCENT_SECRET_KEY
-            }
-        
-        recognizer = SpeechRecognizer(args.engine, **recognizer_kwargs)
-        
-        # 识别每个音频片段
-        recognition_results = []
-        for segment_path in audio_segments:
-            result = recognizer.recognize(segment_path)
-            recognition_results.append(result)
-        
-        # 5. 文本处理和纠错
-        from modules.text_processor import TextProcessor
-        
-        # 初始化文本处理器
-        text_processor = TextProcessor()
-        
-        # 如果启用了文本纠错功能
-        if args.text_correction:
-            try:
-                from modules.text_corrector import TextCorrector
-                print(f"\n正在初始化文本纠错功能，使用模型: {args.correction_model}")
-                corrector = TextCorrector(model_name=args.correction_model)
-                
-                # 对识别结果进行纠错处理
-                for i, result in enumerate(recognition_results):
-                    if 'text' in result and result['text'] is not None:
-                        print(f"\n正在对第{i+1}段文本进行纠错...")
-                        result['text'] = corrector.correct(result['text'])
-                    elif 'text' not in result or result['text'] is None:
-                        print(f"警告: 第{i+1}段文本识别结果为空，跳过纠错处理")
-                        # 确保result['text']存在且不为None
-                        if 'text' not in result:
-                            result['text'] = ""
-                        elif result['text'] is None:
-                            result['text'] = ""
-                print("文本纠错处理完成")
-            except Exception as e:
-                print(f"文本纠错初始化失败: {e}")
-                print("将继续处理，但不进行文本纠错")
-        
-        # 6. 生成文字稿
-        base_filename = os.path.splitext(os.path.basename(video_path))[0]
-        
-        # 检查识别结果是否有效
-        valid_results = []
-        for i, result in enumerate(recognition_results):
-            # 创建结果的副本，避免修改原始数据
-            valid_result = result.copy() if isinstance(result, dict) else {}
-            
-            # 确保text字段存在且为有效字符串
-            if isinstance(result, dict) and 'text' in result and result['text'] is not None and isinstance(result['text'], str) and result['text'].strip() != "":
-                valid_result['text'] = result['text']
-                # 复制其他必要字段
-                if 'start' in result: valid_result['start'] = result['start']
-                if 'end' in result: valid_result['end'] = result['end']
-                valid_results.append(valid_result)
-            else:
-                print(f"警告: 第{i+1}段文本识别结果无效，将被跳过或替换为占位符")
-                # 如果有时间信息，添加占位符文本
-                if isinstance(result, dict) and 'start' in result and 'end' in result:
-                    valid_result['text'] = "[无识别结果]"
-                    valid_result['start'] = result['start']
-                    valid_result['end'] = result['end']
-                    valid_results.append(valid_result)
-        
-        if not valid_results:
-            print("错误: 所有识别结果均无效，无法生成文字稿")
-            return 1
-            
-        print(f"有效识别结果数量: {len(valid_results)}/{len(recognition_results)}")
-        
-        generator = TranscriptGenerator(config.TRANSCRIPT_DIR)
-        output_files = generator.generate(
-            valid_results,
-            base_filename,
-            formats=args.formats
-        )
+            output_files = process_video(args, url=normalize_url(args.url))
         
         # 7. 输出结果
         print("\n=== 处理完成 ===")
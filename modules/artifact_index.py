@@ -0,0 +1,144 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+def shard_name(job_id, width=2):
+    """
+    任务所在的分片目录名: 任务ID哈希值的前 width 位十六进制
+
+    BV号的前几位几乎相同(BV1...)，直接按前缀分片会集中在少数目录中，
+    按哈希分片可以均匀分布到 256 个目录
+    """
+    return hashlib.md5(job_id.encode("utf-8")).hexdigest()[:width]
+
+
+class ArtifactIndex:
+    """
+    任务产物索引
+
+    视频、音频、音频片段、文字稿和阶段记录按任务ID分片存放在各自的根目录下
+    (<根目录>/<分片>/<文件>)，每个产物的路径、大小和状态记录在 SQLite 数据库中。
+    查找产物时直接查询索引，不需要列出目录，文件数量很多时也不会变慢
+    """
+
+    def __init__(self, db_path):
+        self.db_path = os.path.abspath(db_path)
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self._local = threading.local()
+        self._connect().execute("""
+            CREATE TABLE IF NOT EXISTS artifacts (
+                job_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                path TEXT NOT NULL,
+                size INTEGER,
+                state TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (job_id, kind)
+            )
+        """)
+        self._connect().execute("CREATE INDEX IF NOT EXISTS idx_artifacts_kind ON artifacts (kind, state)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        # 连接不能在 fork 出的子进程(如识别进程池)中继续使用
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def path_for(root_dir, job_id, filename=None):
+        """
+        任务在某个根目录下的分片路径(只计算路径，不创建目录)
+
+        Args:
+            root_dir: 根目录(如下载目录、音频目录)
+            job_id: 任务ID
+            filename: 文件名，None 时返回分片目录
+
+        Returns:
+            str: 分片目录或文件路径
+        """
+        shard_dir = os.path.join(root_dir, shard_name(job_id))
+        return shard_dir if filename is None else os.path.join(shard_dir, filename)
+
+    @staticmethod
+    def ensure_path(root_dir, job_id, filename=None):
+        """与 path_for 相同，并在分片目录不存在时创建，写入产物前使用"""
+        shard_dir = ArtifactIndex.path_for(root_dir, job_id)
+        os.makedirs(shard_dir, exist_ok=True)
+        return shard_dir if filename is None else os.path.join(shard_dir, filename)
+
+    def register(self, job_id, kind, path, state="done"):
+        """
+        记录产物，同一任务同类产物只保留最新的一条
+
+        Args:
+            job_id: 任务ID
+            kind: 产物类型(如 video/audio/segments/transcript_srt/state)
+            path: 文件或目录路径
+            state: 产物状态
+        """
+        size = os.path.getsize(path) if os.path.isfile(path) else None
+        self._connect().execute(
+            "INSERT OR REPLACE INTO artifacts (job_id, kind, path, size, state, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, kind, os.path.abspath(path), size, state, time.time())
+        )
+
+    def lookup(self, job_id, kind, state="done"):
+        """返回已记录且仍然存在的产物路径，没有时返回 None"""
+        row = self._connect().execute(
+            "SELECT path FROM artifacts WHERE job_id = ? AND kind = ? AND state = ?",
+            (job_id, kind, state)
+        ).fetchone()
+        if row is None or not os.path.exists(row[0]):
+            return None
+        return row[0]
+
+    def artifacts(self, job_id):
+        """返回任务的全部产物记录 {类型: {path, size, state, updated_at}}"""
+        rows = self._connect().execute(
+            "SELECT kind, path, size, state, updated_at FROM artifacts WHERE job_id = ? ORDER BY kind",
+            (job_id,)
+        ).fetchall()
+        return {
+            kind: {"path": path, "size": size, "state": state, "updated_at": updated_at}
+            for kind, path, size, state, updated_at in rows
+        }
+
+    def jobs(self, kind=None):
+        """返回有记录的任务ID列表，指定 kind 时只返回有该类产物的任务"""
+        if kind is None:
+            rows = self._connect().execute("SELECT DISTINCT job_id FROM artifacts ORDER BY job_id")
+        else:
+            rows = self._connect().execute(
+                "SELECT job_id FROM artifacts WHERE kind = ? ORDER BY job_id", (kind,)
+            )
+        return [row[0] for row in rows]
+
+    def remove(self, job_id, kind=None):
+        """删除产物记录(不删除文件)"""
+        if kind is None:
+            self._connect().execute("DELETE FROM artifacts WHERE job_id = ?", (job_id,))
+        else:
+            self._connect().execute("DELETE FROM artifacts WHERE job_id = ? AND kind = ?", (job_id, kind))
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_artifact_index():
+    """获取进程内共享的产物索引，数据库路径取自 config.ARTIFACT_INDEX_PATH"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            from config import ARTIFACT_INDEX_PATH
+            _index = ArtifactIndex(ARTIFACT_INDEX_PATH)
+        return _index
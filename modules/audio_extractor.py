@@ -1,6 +1,7 @@
 import os
 import subprocess
 from pydub import AudioSegment
+from modules.artifact_index import ArtifactIndex, get_artifact_index
 
 class AudioExtractor:
     def __init__(self, output_dir, sample_rate=16000, channels=1):
@@ -9,47 +10,84 @@ class AudioExtractor:
         self.channels = channels
         os.makedirs(output_dir, exist_ok=True)
     
-    def extract_audio(self, video_path):
+    def extract_audio(self, video_path, video_id=None):
         """
         从视频中提取音频
         
         Args:
             video_path: 视频文件路径
+            video_id: 视频ID，音频按该ID命名、分片和登记到产物索引；
+                未提供时取视频文件名(分P下载的文件名如 <ID>[00].mp4 与视频ID不同)
             
         Returns:
             str: 提取的音频文件路径
         """
-        # 生成输出文件路径
-        video_filename = os.path.basename(video_path)
-        audio_filename = os.path.splitext(video_filename)[0] + ".wav"
-        audio_path = os.path.join(self.output_dir, audio_filename)
+        audio_path, job_id, command = self._build_extract_command(video_path, video_id)
         
         try:
             # 使用ffmpeg提取音频并转换为适合语音识别的格式
             print(f"正在从视频提取音频: {video_path}")
-            subprocess.run([
-                "ffmpeg",
-                "-i", video_path,
-                "-ar", str(self.sample_rate),  # 采样率
-                "-ac", str(self.channels),     # 声道数
-                "-f", "wav",
-                "-y",  # 覆盖已存在的文件
-                audio_path
-            ], check=True)
+            subprocess.run(command, check=True)
             
             print(f"音频提取完成: {audio_path}")
+            get_artifact_index().register(job_id, "audio", audio_path)
             return audio_path
         except subprocess.CalledProcessError as e:
             print(f"音频提取失败: {e}")
             raise
     
-    def segment_audio(self, audio_path, segment_length_ms=300000):
+    async def extract_audio_async(self, video_path, video_id=None):
+        """
+        异步提取音频，供流水线编排器使用
+        
+        Args:
+            video_path: 视频文件路径
+            video_id: 视频ID，含义同 extract_audio
+            
+        Returns:
+            str: 提取的音频文件路径
+        """
+        from modules.subprocess_utils import run_command_async
+        
+        audio_path, job_id, command = self._build_extract_command(video_path, video_id)
+        
+        try:
+            print(f"正在从视频提取音频: {video_path}")
+            await run_command_async(command)
+            
+            print(f"音频提取完成: {audio_path}")
+            get_artifact_index().register(job_id, "audio", audio_path)
+            return audio_path
+        except subprocess.CalledProcessError as e:
+            print(f"音频提取失败: {e}")
+            raise
+    
+    def _build_extract_command(self, video_path, video_id=None):
+        """生成输出文件路径(按视频ID分片)、视频ID和ffmpeg命令"""
+        job_id = video_id or os.path.splitext(os.path.basename(video_path))[0]
+        audio_path = ArtifactIndex.ensure_path(self.output_dir, job_id, f"{job_id}.wav")
+        
+        command = [
+            "ffmpeg",
+            "-i", video_path,
+            "-ar", str(self.sample_rate),  # 采样率
+            "-ac", str(self.channels),     # 声道数
+            "-f", "wav",
+            "-y",  # 覆盖已存在的文件
+            audio_path
+        ]
+        return audio_path, job_id, command
+    
+    def segment_audio(self, audio_path, segment_length_ms=300000, overlap_ms=0, video_id=None):
         """
         将长音频分割成小片段
         
         Args:
             audio_path: 音频文件路径
             segment_length_ms: 每个片段的长度(毫秒)，默认5分钟
+            overlap_ms: 每个片段向后多截取的长度(毫秒)，与下一个片段重叠，
+                避免切点处的词被截断；第 i 个片段仍从 i * segment_length_ms 开始
+            video_id: 视频ID，片段按该ID命名、分片和登记到产物索引；未提供时取音频文件名
             
         Returns:
             list: 分割后的音频片段路径列表
@@ -59,19 +97,22 @@ class AudioExtractor:
         # 加载音频文件
         audio = AudioSegment.from_wav(audio_path)
         
-        # 分割音频
+        # 分割音频，片段保存在分片目录下的 <音频名>_segments 目录中
         segment_paths = []
-        base_filename = os.path.splitext(os.path.basename(audio_path))[0]
+        base_filename = video_id or os.path.splitext(os.path.basename(audio_path))[0]
+        segment_dir = os.path.join(ArtifactIndex.path_for(self.output_dir, base_filename), f"{base_filename}_segments")
+        os.makedirs(segment_dir, exist_ok=True)
         
         for i in range(0, len(audio), segment_length_ms):
-            # 提取片段
-            segment = audio[i:i+segment_length_ms]
+            # 提取片段(包含与下一个片段重叠的部分)
+            segment = audio[i:i+segment_length_ms+overlap_ms]
             
             # 保存片段
             segment_filename = f"{base_filename}_segment_{i//segment_length_ms+1}.wav"
-            segment_path = os.path.join(self.output_dir, segment_filename)
+            segment_path = os.path.join(segment_dir, segment_filename)
             segment.export(segment_path, format="wav")
             segment_paths.append(segment_path)
         
+        get_artifact_index().register(base_filename, "segments", segment_dir)
         print(f"音频分割完成，共 {len(segment_paths)} 个片段")
-        return segment_paths
\ No newline at end of file
+        return segment_paths
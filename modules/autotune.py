@@ -0,0 +1,240 @@
+import json
+import os
+import socket
+import time
+import wave
+
+from modules.resource_monitor import MemorySampler
+
+# 性能配置文件中可以覆盖的配置项
+PROFILE_KEYS = ("SEGMENT_LENGTH_MS", "RECOGNITION_WORKERS", "VOSK_READ_FRAMES", "CORRECTION_MAX_LENGTH")
+
+
+def profile_path(profile_dir):
+    """本机的性能配置文件路径: <profile_dir>/<主机名>.json"""
+    return os.path.join(profile_dir, f"{socket.gethostname()}.json")
+
+
+def load_profile(config_module, profile_dir):
+    """
+    读取本机的性能配置文件并覆盖配置模块中对应的值
+
+    Args:
+        config_module: config 模块
+        profile_dir: 配置文件目录
+
+    Returns:
+        dict: 生效的配置项，没有配置文件时返回 None
+    """
+    path = profile_path(profile_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        settings = json.load(f).get("settings", {})
+    applied = {key: settings[key] for key in PROFILE_KEYS if key in settings}
+    for key, value in applied.items():
+        setattr(config_module, key, value)
+    return applied
+
+
+def available_memory_mb():
+    """系统可用内存(MB)，无法读取时返回 None"""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def write_clip(source_path, output_path, start_seconds, duration_seconds):
+    """从 wav 文件中截取一段保存为新的 wav 文件"""
+    with wave.open(source_path, "rb") as src:
+        params = src.getparams()
+        rate = src.getframerate()
+        start = min(int(start_seconds * rate), src.getnframes())
+        src.setpos(start)
+        frames = src.readframes(int(duration_seconds * rate))
+    with wave.open(output_path, "wb") as dst:
+        dst.setparams(params)
+        dst.writeframes(frames)
+    return output_path
+
+
+class Autotuner:
+    """
+    按本机硬件校准识别和纠错的性能参数
+
+    在样本音频上依次测量:
+    1. Vosk 每次送入的帧数: 选择实时率最低的值(差距在 3% 以内时取较小值，降低延迟)
+    2. 并行识别数: 从 1 开始翻倍，吞吐提升不足 10% 或内存超出上限时停止
+    3. 切片长度: 使典型时长的视频切出的片段数不少于并行识别数
+    4. MacBERT 最大长度: 在速度不低于最快设置 80% 的前提下取最长的值(上下文更完整)
+    """
+
+    READ_FRAMES_CANDIDATES = (1000, 2000, 4000, 8000, 16000)
+    MAX_LENGTH_CANDIDATES = (64, 128, 256, 512)
+
+    def __init__(self, sample_audio, work_dir, model_path, sample_rate=16000, clip_seconds=20,
+                 typical_video_seconds=1200, max_workers=None, memory_limit_mb=None):
+        """
+        Args:
+            sample_audio: 样本音频(16kHz 单声道 wav)
+            work_dir: 存放校准片段的临时目录
+            model_path: Vosk 模型路径
+            sample_rate: 识别采样率
+            clip_seconds: 每个校准片段的时长(秒)
+            typical_video_seconds: 典型视频时长(秒)，用于确定切片长度
+            max_workers: 并行识别数上限，默认为CPU核数
+            memory_limit_mb: 校准时允许使用的内存上限，默认为可用内存的 80%
+        """
+        self.sample_audio = sample_audio
+        self.work_dir = work_dir
+        self.model_path = model_path
+        self.sample_rate = sample_rate
+        self.clip_seconds = clip_seconds
+        self.typical_video_seconds = typical_video_seconds
+        self.max_workers = max_workers or os.cpu_count() or 1
+        available = available_memory_mb()
+        self.memory_limit_mb = memory_limit_mb or (available * 0.8 if available else None)
+        self.measurements = {}
+        self._sample_text = ""
+        os.makedirs(work_dir, exist_ok=True)
+
+    def _clips(self, count):
+        """从样本中依次截取 count 个片段，样本较短时循环使用"""
+        with wave.open(self.sample_audio, "rb") as wf:
+            sample_seconds = wf.getnframes() / wf.getframerate()
+        slots = max(1, int(sample_seconds // self.clip_seconds))
+        clips = []
+        for i in range(count):
+            path = os.path.join(self.work_dir, f"clip_{i % slots}.wav")
+            if not os.path.exists(path):
+                write_clip(self.sample_audio, path, (i % slots) * self.clip_seconds, self.clip_seconds)
+            clips.append(path)
+        return clips
+
+    def _measure_recognition(self, workers, read_frames):
+        """同时识别 workers 个片段，返回吞吐(音频秒数/墙钟秒数)、实时率和内存增量"""
+        from modules.speech_recognizer import SpeechRecognizer
+
+        recognizer = SpeechRecognizer(
+            "vosk", model_path=self.model_path, sample_rate=self.sample_rate,
+            read_frames=read_frames, workers=workers
+        )
+        clips = self._clips(workers)
+        with MemorySampler() as sampler:
+            start = time.perf_counter()
+            results = recognizer.recognize_batch(clips)
+            elapsed = time.perf_counter() - start
+
+        audio_seconds = self.clip_seconds * len(clips)
+        return {
+            "throughput": round(audio_seconds / elapsed, 2),
+            "rtf": round(elapsed / audio_seconds * workers, 3),
+            "memory_mb": round(sampler.delta_mb, 1),
+            "text": " ".join(result["text"] for result in results)
+        }
+
+    def tune_read_frames(self):
+        # 预热: 先加载模型，避免把加载时间计入第一个候选值
+        self._measure_recognition(1, 4000)
+        results = {}
+        for read_frames in self.READ_FRAMES_CANDIDATES:
+            results[read_frames] = self._measure_recognition(1, read_frames)
+            print(f"  VOSK_READ_FRAMES={read_frames}: 实时率 {results[read_frames]['rtf']}")
+        self.measurements["read_frames"] = {k: v["rtf"] for k, v in results.items()}
+        self._sample_text = results[4000]["text"]
+
+        best_rtf = min(result["rtf"] for result in results.values())
+        return min(k for k, v in results.items() if v["rtf"] <= best_rtf * 1.03)
+
+    def tune_workers(self, read_frames):
+        results = {}
+        best = 1
+        workers = 1
+        while workers <= self.max_workers:
+            result = self._measure_recognition(workers, read_frames)
+            results[workers] = result
+            print(f"  RECOGNITION_WORKERS={workers}: 吞吐 {result['throughput']}x 实时，内存增量 {result['memory_mb']} MB")
+            if self.memory_limit_mb and result["memory_mb"] > self.memory_limit_mb:
+                break
+            if workers > 1 and result["throughput"] < results[best]["throughput"] * 1.1:
+                break
+            best = workers
+            workers *= 2
+        self.measurements["workers"] = {
+            k: {"throughput": v["throughput"], "memory_mb": v["memory_mb"]} for k, v in results.items()
+        }
+        return best
+
+    def choose_segment_length(self, workers):
+        """典型视频按该长度切片后，片段数不少于并行识别数；限制在 1-10 分钟，按 30 秒取整"""
+        seconds = self.typical_video_seconds / workers
+        seconds = min(600, max(60, int(seconds // 30) * 30))
+        return seconds * 1000
+
+    def tune_correction(self, model_name="macbert"):
+        """测量不同 max_length 下的纠错速度，未安装 pycorrector 或没有样本文本时返回 None"""
+        text = self._sample_text.replace(" ", "")
+        if not text:
+            return None
+        try:
+            from modules.text_corrector import TextCorrector
+            corrector = TextCorrector(model_name=model_name)
+        except Exception as e:
+            print(f"  跳过纠错校准: {e}")
+            return None
+
+        speeds = {}
+        for max_length in self.MAX_LENGTH_CANDIDATES:
+            corrector.max_length = max_length
+            start = time.perf_counter()
+            corrector.correct(text)
+            speeds[max_length] = len(text) / (time.perf_counter() - start)
+            print(f"  CORRECTION_MAX_LENGTH={max_length}: {speeds[max_length]:.0f} 字/秒")
+        self.measurements["correction"] = {k: round(v, 1) for k, v in speeds.items()}
+
+        best_speed = max(speeds.values())
+        return max(k for k, v in speeds.items() if v >= best_speed * 0.8)
+
+    def run(self, tune_correction=True):
+        """
+        运行全部校准
+
+        Returns:
+            dict: 性能配置(settings 为可覆盖的配置项，measurements 为测量数据)
+        """
+        print("校准 Vosk 每次送入的帧数...")
+        read_frames = self.tune_read_frames()
+        print("校准并行识别数...")
+        workers = self.tune_workers(read_frames)
+        settings = {
+            "VOSK_READ_FRAMES": read_frames,
+            "RECOGNITION_WORKERS": workers,
+            "SEGMENT_LENGTH_MS": self.choose_segment_length(workers)
+        }
+        if tune_correction:
+            print("校准纠错最大长度...")
+            max_length = self.tune_correction()
+            if max_length is not None:
+                settings["CORRECTION_MAX_LENGTH"] = max_length
+
+        return {
+            "host": socket.gethostname(),
+            "cpu_count": os.cpu_count(),
+            "available_memory_mb": available_memory_mb(),
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "settings": settings,
+            "measurements": self.measurements
+        }
+
+
+def save_profile(profile, profile_dir):
+    os.makedirs(profile_dir, exist_ok=True)
+    path = profile_path(profile_dir)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, ensure_ascii=False, indent=2)
+    return path
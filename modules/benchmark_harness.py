@@ -0,0 +1,345 @@
+import argparse
+import itertools
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+# 参考集中可以直接送入 ffmpeg 的音视频文件
+MEDIA_EXTENSIONS = (".wav", ".mp3", ".m4a", ".flac", ".aac", ".ogg", ".mp4", ".flv", ".mkv")
+
+# 计算字错误率时只比较汉字、字母和数字，忽略标点、空白和分段
+_CER_CHARS = re.compile(r"[\u4e00-\u9fff0-9a-z]")
+
+# 对比表中列出耗时的阶段(与 main.process_video 中 StageTracker 记录的阶段名称相同)
+STAGES = ("extract", "triage", "recognize", "correct", "generate")
+
+# 对比表和 Pareto 分析使用的指标(均为越小越好)
+PARETO_METRICS = ("cer", "rtf", "peak_memory_mb")
+
+
+def load_reference_set(reference_dir):
+    """
+    读取参考集: 目录中的音视频文件与同名的 .txt 参考文字稿一一对应
+
+    Returns:
+        list: [(音视频路径, 参考文字稿)]，没有参考文字稿的文件会被跳过
+    """
+    items = []
+    for name in sorted(os.listdir(reference_dir)):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() not in MEDIA_EXTENSIONS:
+            continue
+        reference_path = os.path.join(reference_dir, stem + ".txt")
+        if not os.path.exists(reference_path):
+            print(f"警告: {name} 没有参考文字稿 {stem}.txt，跳过")
+            continue
+        with open(reference_path, "r", encoding="utf-8") as f:
+            items.append((os.path.join(reference_dir, name), f.read()))
+    return items
+
+
+def normalize_for_cer(text):
+    """去掉标点、空白和分段，英文转为小写，返回用于计算字错误率的字符序列"""
+    return _CER_CHARS.findall(text.lower())
+
+
+def edit_distance(reference, hypothesis):
+    """
+    字符级编辑距离
+
+    按参考序列逐行计算动态规划表，每一行的替换/删除代价一次性向量化计算，
+    插入代价 D[j] = min(D[j], D[j-1] + 1) 转换为 D[j] - j 的前缀最小值，
+    同样用 numpy 一次完成，万字级的文字稿也可以在秒级内算完
+    """
+    if not reference or not hypothesis:
+        return max(len(reference), len(hypothesis))
+    # 字符转换为整数编号后比较
+    vocabulary = {char: i for i, char in enumerate(set(reference) | set(hypothesis))}
+    hyp = np.fromiter((vocabulary[char] for char in hypothesis), dtype=np.int64, count=len(hypothesis))
+    positions = np.arange(len(hypothesis) + 1, dtype=np.int64)
+
+    previous = positions.copy()
+    current = np.empty_like(previous)
+    for i, char in enumerate(reference, 1):
+        current[0] = i
+        current[1:] = np.minimum(previous[:-1] + (hyp != vocabulary[char]), previous[1:] + 1)
+        current[:] = np.minimum.accumulate(current - positions) + positions
+        previous, current = current, previous
+    return int(previous[-1])
+
+
+def character_error_rate(reference, hypothesis):
+    """字错误率(CER) = 编辑距离 / 参考文字稿字数，返回 (CER, 编辑距离, 参考字数)"""
+    reference = normalize_for_cer(reference)
+    hypothesis = normalize_for_cer(hypothesis)
+    errors = edit_distance(reference, hypothesis)
+    return (errors / len(reference) if reference else float(bool(hypothesis))), errors, len(reference)
+
+
+def build_configurations(models, segment_lengths, correction_models, text_processors, punctuation="pos",
+                         user_dict=None, pinyin_lexicon=None):
+    """
+    各参数取值的全部组合
+
+    Args:
+        models: 本地 Vosk 模型路径列表
+        segment_lengths: 切片长度列表(毫秒)
+        correction_models: 纠错模型列表，"none" 表示不纠错
+        text_processors: pos 标点方式使用的分词后端列表
+        punctuation: 标点与分段方式
+        user_dict: 分词用户词典列表，各配置相同
+        pinyin_lexicon: 拼音纠错词表列表，各配置相同
+
+    Returns:
+        list: 配置字典列表
+    """
+    return [
+        {
+            "model": model,
+            "segment_length_ms": int(segment_length),
+            "correction_model": correction_model,
+            "text_processor": text_processor,
+            "punctuation": punctuation,
+            "user_dict": list(user_dict or []),
+            "pinyin_lexicon": list(pinyin_lexicon or [])
+        }
+        for model, segment_length, correction_model, text_processor in itertools.product(
+            models, segment_lengths, correction_models, text_processors
+        )
+    ]
+
+
+def configuration_label(configuration):
+    """配置的简短名称，如 vosk-model-cn-0.22/60s/macbert/jieba"""
+    return "/".join([
+        os.path.basename(os.path.normpath(configuration["model"])),
+        f"{configuration['segment_length_ms'] / 1000:g}s",
+        configuration["correction_model"],
+        configuration["text_processor"]
+    ])
+
+
+def pipeline_args(configuration):
+    """按配置构造与 main.py 命令行参数相同字段的参数对象(处理本地文件，不查询字幕、不复用指纹)"""
+    import config
+
+    correction_model = configuration["correction_model"]
+    return argparse.Namespace(
+        engine="vosk",
+        text_correction=correction_model != "none",
+        correction_model=correction_model if correction_model != "none" else config.TEXT_CORRECTION_MODEL,
+        punctuation=configuration["punctuation"],
+        text_processor=configuration["text_processor"],
+        user_dict=configuration.get("user_dict", list(config.USER_DICT_PATHS)),
+        pinyin_lexicon=configuration.get("pinyin_lexicon", list(config.PINYIN_LEXICON_PATHS)),
+        formats=["txt"],
+        improve_readability=True,
+        cookies=None,
+        subtitles="off",
+        triage=config.TRIAGE_ENABLED,
+        two_tier=False,
+        distributed=False,
+        queue=None,
+        dedup=False,
+        force=True
+    )
+
+
+def measure_configuration(configuration, items, use_profile=True):
+    """
+    在当前进程中按一个配置处理整个参考集。每个文件都交给 main.process_video 处理，
+    与实际运行的流程相同(提取音频、语音占比评估、切片识别并在后台线程中同时纠错、生成文字稿)；
+    各阶段耗时取自 StageTracker 的阶段记录。音频、切片、文字稿、阶段记录和产物索引都写入临时目录
+
+    后台纠错与识别同时进行，识别阶段的耗时包含与之重叠的纠错，纠错阶段只包含识别结束后剩余的部分
+
+    Returns:
+        dict: 字错误率、总耗时、各阶段耗时、实时率和峰值内存
+    """
+    import config
+    from modules.autotune import load_profile
+    from modules.resource_monitor import MemorySampler
+
+    if use_profile:
+        load_profile(config, config.PROFILE_DIR)
+    work_dir = tempfile.mkdtemp(prefix="benchmark_")
+    config.AUDIO_DIR = os.path.join(work_dir, "audio")
+    config.TRANSCRIPT_DIR = os.path.join(work_dir, "transcripts")
+    config.STATE_DIR = os.path.join(work_dir, "state")
+    config.ARTIFACT_INDEX_PATH = os.path.join(work_dir, "index.db")
+    config.VOSK_MODEL_PATH = configuration["model"]
+    config.SEGMENT_LENGTH_MS = configuration["segment_length_ms"]
+
+    # 处理流程与 main.py 相同，导入时会把项目根目录加入路径
+    import main
+    from modules.stage_tracker import StageTracker
+
+    args = pipeline_args(configuration)
+    stage_seconds = dict.fromkeys(STAGES, 0.0)
+
+    files = []
+    try:
+        with MemorySampler() as sampler:
+            start = time.perf_counter()
+            for media_path, reference in items:
+                output_files = main.process_video(args, video_path=media_path)
+                with open(output_files["txt"], "r", encoding="utf-8") as f:
+                    hypothesis = f.read()
+
+                tracker = StageTracker(config.STATE_DIR, os.path.splitext(os.path.basename(media_path))[0])
+                for stage, seconds in tracker.stage_seconds().items():
+                    if stage in stage_seconds:
+                        stage_seconds[stage] += seconds
+                with wave.open(tracker.outputs("extract")["audio_path"], "rb") as wf:
+                    audio_seconds = wf.getnframes() / wf.getframerate()
+
+                cer, errors, reference_chars = character_error_rate(reference, hypothesis)
+                files.append({
+                    "file": os.path.basename(media_path),
+                    "audio_seconds": round(audio_seconds, 2),
+                    "cer": round(cer, 4),
+                    "errors": errors,
+                    "reference_chars": reference_chars
+                })
+            total_seconds = time.perf_counter() - start
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    audio_seconds = sum(item["audio_seconds"] for item in files)
+    reference_chars = sum(item["reference_chars"] for item in files)
+    return {
+        "configuration": configuration,
+        "label": configuration_label(configuration),
+        # 整个参考集的字错误率按总字数加权
+        "cer": round(sum(item["errors"] for item in files) / reference_chars, 4) if reference_chars else None,
+        "total_seconds": round(total_seconds, 2),
+        "stage_seconds": {stage: round(seconds, 2) for stage, seconds in stage_seconds.items()},
+        "audio_seconds": round(audio_seconds, 2),
+        "rtf": round(total_seconds / audio_seconds, 3) if audio_seconds else None,
+        "peak_memory_mb": round(sampler.peak_mb, 1),
+        "files": files
+    }
+
+
+def run_harness(reference_dir, configurations, use_profile=True):
+    """
+    依次测量每个配置。每个配置在独立的子进程中运行，避免已加载的模型互相影响内存统计；
+    子进程禁止 Hugging Face 等联网下载，所需模型必须已在本地
+
+    Returns:
+        list: 各配置的测量结果，运行失败的配置包含 error 字段
+    """
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, HF_HUB_OFFLINE="1", TRANSFORMERS_OFFLINE="1", HF_DATASETS_OFFLINE="1")
+
+    reports = []
+    for configuration in configurations:
+        label = configuration_label(configuration)
+        print(f"正在测试配置: {label}")
+        command = [
+            sys.executable, "-m", "modules.benchmark_harness", reference_dir,
+            "--measure", json.dumps(configuration, ensure_ascii=False)
+        ]
+        if not use_profile:
+            command.append("--no-profile")
+        completed = subprocess.run(command, cwd=package_dir, capture_output=True, text=True, env=env)
+        lines = completed.stdout.strip().splitlines()
+        if completed.returncode != 0 or not lines:
+            error = (completed.stderr.strip().splitlines() or ["未知错误"])[-1]
+            reports.append({"configuration": configuration, "label": label, "error": error})
+        else:
+            reports.append(json.loads(lines[-1]))
+    return reports
+
+
+def pareto_front(reports, metrics=PARETO_METRICS):
+    """
+    返回不被其他配置支配的配置: 不存在另一个配置在所有指标上都不差、且至少一项更好
+    """
+    candidates = [report for report in reports if "error" not in report and report.get("cer") is not None]
+    points = np.array([[report[metric] for metric in metrics] for report in candidates], dtype=np.float64)
+    front = []
+    for i, report in enumerate(candidates):
+        dominated = np.all(points <= points[i], axis=1) & np.any(points < points[i], axis=1)
+        if not dominated.any():
+            front.append(report)
+    return front
+
+
+def print_report(reports):
+    """打印对比表(按字错误率排序，* 为 Pareto 最优)和 Pareto 摘要"""
+    front = {id(report) for report in pareto_front(reports)}
+    print(f"\n{'配置':<44}{'CER':>8}{'总耗时(秒)':>12}{'实时率':>9}{'峰值内存(MB)':>14}"
+          f"{'提取':>8}{'评估':>8}{'识别':>8}{'纠错':>8}{'生成':>8}")
+    for report in sorted(reports, key=lambda r: (r.get("cer") is None, r.get("cer") or 0)):
+        if "error" in report:
+            print(f"  {report['label']:<42}  运行失败: {report['error']}")
+            continue
+        stages = report["stage_seconds"]
+        mark = "*" if id(report) in front else " "
+        print(f"{mark} {report['label']:<42}{report['cer']:>8.2%}{report['total_seconds']:>12}{report['rtf']:>9}"
+              f"{report['peak_memory_mb']:>14}" + "".join(f"{stages.get(stage, 0):>8}" for stage in STAGES))
+
+    print("\nPareto 最优配置(字错误率、实时率、峰值内存三项中没有被其他配置全面超过):")
+    for report in sorted((r for r in reports if id(r) in front), key=lambda r: r["cer"]):
+        print(f"- {report['label']}: CER {report['cer']:.2%}，实时率 {report['rtf']}，峰值内存 {report['peak_memory_mb']} MB")
+
+
+def main():
+    import config
+
+    parser = argparse.ArgumentParser(description="在本地参考集上对比各配置的字错误率、速度和内存")
+    parser.add_argument("reference_dir", help="参考集目录(音视频文件及同名的 .txt 参考文字稿)")
+    parser.add_argument("--models", nargs="+", default=[config.VOSK_MODEL_PATH], help="本地 Vosk 模型路径")
+    parser.add_argument("--segment-lengths", nargs="+", type=int, default=[config.SEGMENT_LENGTH_MS],
+                        help="切片长度(毫秒)")
+    parser.add_argument("--correction-models", nargs="+", choices=["none", "kenlm", "bert", "macbert", "t5", "pinyin"],
+                        default=["none", config.TEXT_CORRECTION_MODEL], help="纠错模型，none 表示不纠错")
+    parser.add_argument("--text-processors", nargs="+", default=[config.TEXT_PROCESSOR.lower()],
+                        help="pos 标点方式使用的分词后端")
+    parser.add_argument("--punctuation", choices=["pos", "pause"], default=config.PUNCTUATION_MODE,
+                        help="标点与分段方式")
+    parser.add_argument("--user-dict", nargs="+", default=config.USER_DICT_PATHS,
+                        help="分词用户词典")
+    parser.add_argument("--pinyin-lexicon", nargs="+", default=config.PINYIN_LEXICON_PATHS,
+                        help="拼音纠错词表")
+    parser.add_argument("--output", help="将完整测量结果保存为 JSON 文件")
+    parser.add_argument("--no-profile", dest="profile", action="store_false", help="不加载本机的性能配置文件")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    items = load_reference_set(args.reference_dir)
+    if args.measure:
+        # 子进程模式: 只测量一个配置，结果以JSON输出到最后一行
+        report = measure_configuration(json.loads(args.measure), items, use_profile=args.profile)
+        print(json.dumps(report, ensure_ascii=False))
+        return 0
+
+    if not items:
+        print("错误: 参考集为空")
+        return 1
+    configurations = build_configurations(
+        args.models, args.segment_lengths, args.correction_models, args.text_processors, args.punctuation,
+        user_dict=args.user_dict,
+        pinyin_lexicon=args.pinyin_lexicon
+    )
+    print(f"参考集共 {len(items)} 个文件，{len(configurations)} 个配置")
+    reports = run_harness(args.reference_dir, configurations, use_profile=args.profile)
+    print_report(reports)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+        print(f"\n测量结果已保存: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+from difflib import SequenceMatcher
+
+
+def annotate_chunks(recognition_results, segment_length_ms, overlap_ms=0):
+    """
+    为按 AudioExtractor.segment_audio 切分的片段识别结果标记在整段音频中的位置
+
+    Args:
+        recognition_results: 按片段顺序排列的识别结果列表
+        segment_length_ms: 切片步长(毫秒)
+        overlap_ms: 每个片段向后延伸的重叠长度(毫秒)
+
+    Returns:
+        list: 原结果列表，每个结果增加 offset(起始秒数) 和 overlap(重叠秒数) 字段
+    """
+    for i, result in enumerate(recognition_results):
+        if isinstance(result, dict):
+            result["offset"] = i * segment_length_ms / 1000
+            result["overlap"] = overlap_ms / 1000
+    return recognition_results
+
+
+class ChunkMerger:
+    """
+    逐个合并带重叠的片段识别结果
+
+    第 i 个片段覆盖 [offset_i, offset_{i+1} + overlap]，与下一个片段重叠的部分会被识别两次，
+    且片段边界处的词往往被截断。两个片段都到达后，在重叠区内按文本对齐两边的词序列，
+    选择时间上也吻合、且最接近重叠区中点的相同词作为接缝: 之前的词取前一个片段的结果，
+    之后的词取后一个片段的结果，远离两边截断处。没有可信的对齐时按重叠区中点切分。
+
+    每个输出的片段只保留属于自己的词，text 由保留的词重新生成，
+    segments 仍是相对 offset 的时间，可直接交给纠错和 merge_results
+    """
+
+    def __init__(self, max_time_diff=0.5):
+        """
+        Args:
+            max_time_diff: 对齐的两个词起始时间相差超过该值(秒)时不作为接缝
+        """
+        self.max_time_diff = max_time_diff
+        self._pending = None
+        self._pending_words = None
+
+    def add(self, result):
+        """
+        加入下一个片段的识别结果
+
+        Args:
+            result: 带 offset/overlap 字段的识别结果
+
+        Returns:
+            dict: 已确定边界的上一个片段，第一个片段加入时返回 None
+        """
+        words = self._global_words(result)
+        if self._pending is None:
+            self._pending, self._pending_words = result, words
+            return None
+
+        keep_prev, start_next = self._find_seam(self._pending, self._pending_words, result, words)
+        finished = self._finalize(self._pending, self._pending_words[:keep_prev])
+        self._pending, self._pending_words = result, words[start_next:]
+        return finished
+
+    def finish(self):
+        """返回最后一个片段，没有待输出的片段时返回 None"""
+        if self._pending is None:
+            return None
+        finished = self._finalize(self._pending, self._pending_words)
+        self._pending = self._pending_words = None
+        return finished
+
+    @staticmethod
+    def _global_words(result):
+        offset = result.get("offset", 0)
+        return [
+            dict(segment, start=segment["start"] + offset, end=segment["end"] + offset)
+            for segment in result.get("segments") or []
+        ]
+
+    def _find_seam(self, prev, prev_words, result, words):
+        """返回 (前一个片段保留的词数, 后一个片段开始保留的下标)"""
+        begin = result.get("offset", 0)
+        end = begin + prev.get("overlap", 0)
+        middle = (begin + end) / 2
+
+        # 与重叠区有交集的词
+        prev_tail = [i for i, word in enumerate(prev_words) if word["end"] > begin]
+        next_head = [i for i, word in enumerate(words) if word["start"] < end]
+
+        if prev_tail and next_head:
+            matcher = SequenceMatcher(
+                None,
+                [prev_words[i]["text"] for i in prev_tail],
+                [words[i]["text"] for i in next_head],
+                autojunk=False
+            )
+            best = None
+            for block in matcher.get_matching_blocks():
+                for k in range(block.size):
+                    i, j = prev_tail[block.a + k], next_head[block.b + k]
+                    if abs(prev_words[i]["start"] - words[j]["start"]) > self.max_time_diff:
+                        continue
+                    distance = abs((prev_words[i]["start"] + words[j]["start"]) / 2 - middle)
+                    if best is None or distance < best[0]:
+                        best = (distance, i, j)
+            if best is not None:
+                return best[1], best[2]
+
+        # 没有可信的对齐，按重叠区中点切分
+        keep_prev = sum(1 for word in prev_words if (word["start"] + word["end"]) / 2 < middle)
+        start_next = sum(1 for word in words if (word["start"] + word["end"]) / 2 < middle)
+        return keep_prev, start_next
+
+    @staticmethod
+    def _finalize(result, words):
+        offset = result.get("offset", 0)
+        merged = dict(result)
+        merged["segments"] = [
+            dict(word, start=round(word["start"] - offset, 3), end=round(word["end"] - offset, 3))
+            for word in words
+        ]
+        merged["text"] = " ".join(word["text"] for word in words)
+        merged["overlap"] = 0
+        return merged
+
+
+def merge_chunks(recognition_results, max_time_diff=0.5):
+    """
+    合并一个视频全部带重叠的片段识别结果
+
+    Args:
+        recognition_results: 按片段顺序排列、带 offset/overlap 字段的识别结果
+        max_time_diff: 见 ChunkMerger
+
+    Returns:
+        list: 去除重叠部分后的识别结果列表
+    """
+    merger = ChunkMerger(max_time_diff=max_time_diff)
+    merged = [merger.add(result) for result in recognition_results]
+    merged.append(merger.finish())
+    return [result for result in merged if result is not None]
@@ -0,0 +1,374 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import io
+import json
+import random
+import time
+import uuid
+import wave
+from datetime import datetime, timezone
+from urllib.parse import quote, urlencode
+
+from modules.http_pool import HTTPConnectionPool
+
+
+class CloudASRError(Exception):
+    """云端语音识别错误，retryable 表示是否可以重试(限流、服务端错误等)"""
+
+    def __init__(self, message, retryable=False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class TokenBucket:
+    """令牌桶限流器，按厂商的 QPS 配额控制请求速率"""
+
+    def __init__(self, rate, capacity=None):
+        """
+        Args:
+            rate: 每秒补充的令牌数(即允许的QPS)
+            capacity: 桶容量(允许的突发请求数)，默认等于 rate
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = None
+        self._loop = None
+
+    async def acquire(self):
+        # 每次 asyncio.run 都会创建新的事件循环，锁需要绑定到当前循环
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def split_wav(audio_path, chunk_seconds):
+    """
+    将 wav 文件按时长切分为内存中的 wav 数据块
+
+    Returns:
+        list: (起始秒数, wav bytes) 列表
+    """
+    chunks = []
+    with wave.open(audio_path, "rb") as wf:
+        params = wf.getparams()
+        frames_per_chunk = int(params.framerate * chunk_seconds)
+        position = 0
+        while True:
+            data = wf.readframes(frames_per_chunk)
+            if not data:
+                break
+            buffer = io.BytesIO()
+            with wave.open(buffer, "wb") as out:
+                out.setnchannels(params.nchannels)
+                out.setsampwidth(params.sampwidth)
+                out.setframerate(params.framerate)
+                out.writeframes(data)
+            chunks.append((position / params.framerate, buffer.getvalue()))
+            position += len(data) // (params.sampwidth * params.nchannels)
+    return chunks
+
+
+class CloudASRClient:
+    """
+    云端语音识别客户端基类
+
+    同时提交多个音频块，通过连接池复用 HTTP 连接，按令牌桶限流，
+    遇到限流或服务端错误时按指数退避加随机抖动重试
+    """
+
+    def __init__(self, base_url, qps=5, max_concurrency=8, chunk_seconds=60,
+                 max_retries=5, sample_rate=16000):
+        self.pool = HTTPConnectionPool(base_url, max_connections=max_concurrency)
+        self.rate_limiter = TokenBucket(qps)
+        self.max_concurrency = max_concurrency
+        self.chunk_seconds = chunk_seconds
+        self.max_retries = max_retries
+        self.sample_rate = sample_rate
+
+    def recognize_many(self, audio_paths):
+        """
+        并发识别多个音频文件
+
+        Args:
+            audio_paths: 音频文件路径列表
+
+        Returns:
+            list: 与输入顺序一致的识别结果列表，每个结果包含 text 和 segments
+        """
+        return asyncio.run(self._recognize_many(audio_paths))
+
+    async def _recognize_many(self, audio_paths):
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return await asyncio.gather(*(self._recognize_file(path) for path in audio_paths))
+
+    async def _recognize_file(self, audio_path):
+        chunks = split_wav(audio_path, self.chunk_seconds)
+        print(f"提交音频: {audio_path}，共 {len(chunks)} 个识别请求")
+        chunk_words = await asyncio.gather(*(self._recognize_chunk(data) for _, data in chunks))
+
+        segments = []
+        for (offset, _), words in zip(chunks, chunk_words):
+            for word in words:
+                segments.append({
+                    "text": word["text"],
+                    "start": word["start"] + offset,
+                    "end": word["end"] + offset
+                })
+        return {
+            "text": " ".join(segment["text"] for segment in segments),
+            "segments": segments
+        }
+
+    async def _recognize_chunk(self, wav_data):
+        async with self._semaphore:
+            return await self._with_retries(self._transcribe, wav_data)
+
+    async def _with_retries(self, func, *args):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await func(*args)
+            except CloudASRError as e:
+                if not e.retryable or attempt == self.max_retries:
+                    raise
+                # 指数退避 + 全抖动，避免大量请求同时重试
+                delay = random.uniform(0, min(30, 0.5 * 2 ** attempt))
+                print(f"请求失败({e})，{delay:.2f}秒后重试")
+                await asyncio.sleep(delay)
+
+    async def _request(self, method, path, body=None, headers=None):
+        await self.rate_limiter.acquire()
+        try:
+            return await asyncio.to_thread(self.pool.request, method, path, body, headers)
+        except OSError as e:
+            raise CloudASRError(f"网络错误: {e}", retryable=True)
+
+    async def _transcribe(self, wav_data):
+        """识别单个音频块，返回相对该块起点的词列表(text/start/end，单位秒)"""
+        raise NotImplementedError
+
+
+class AliyunASRClient(CloudASRClient):
+    """阿里云智能语音交互 录音文件识别极速版(FlashRecognizer)"""
+
+    # 可重试的服务端状态码: 请求过多、服务端内部错误
+    RETRYABLE_STATUS = {40000005, 50000000, 50000001}
+
+    def __init__(self, access_key, access_secret, app_key,
+                 gateway_url="https://nls-gateway-cn-shanghai.aliyuncs.com/stream/v1/FlashRecognizer",
+                 meta_url="https://nls-meta.cn-shanghai.aliyuncs.com/", **kwargs):
+        super().__init__(gateway_url, **kwargs)
+        self.access_key = access_key
+        self.access_secret = access_secret
+        self.app_key = app_key
+        self.meta_pool = HTTPConnectionPool(meta_url, max_connections=1)
+        self._token = None
+        self._token_expire = 0
+
+    def _create_token(self):
+        """通过 CreateToken 接口获取访问令牌(POP RPC 签名)"""
+        params = {
+            "AccessKeyId": self.access_key,
+            "Action": "CreateToken",
+            "Format": "JSON",
+            "RegionId": "cn-shanghai",
+            "SignatureMethod": "HMAC-SHA1",
+            "SignatureNonce": uuid.uuid4().hex,
+            "SignatureVersion": "1.0",
+            "Timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "Version": "2019-02-28"
+        }
+        canonical = "&".join(
+            f"{_pop_encode(k)}={_pop_encode(v)}" for k, v in sorted(params.items())
+        )
+        string_to_sign = "GET&%2F&" + _pop_encode(canonical)
+        signature = base64.b64encode(hmac.new(
+            (self.access_secret + "&").encode("utf-8"),
+            string_to_sign.encode("utf-8"),
+            hashlib.sha1
+        ).digest()).decode("utf-8")
+        query = canonical + "&Signature=" + _pop_encode(signature)
+
+        status, _, body = self.meta_pool.request("GET", "/?" + query)
+        data = json.loads(body or b"{}")
+        if status != 200 or "Token" not in data:
+            raise CloudASRError(f"获取阿里云访问令牌失败: {status} {data}")
+        self._token = data["Token"]["Id"]
+        self._token_expire = data["Token"]["ExpireTime"]
+
+    async def _recognize_many(self, audio_paths):
+        # 并发提交前先获取一次令牌，避免每个请求各自申请
+        await self._get_token()
+        return await super()._recognize_many(audio_paths)
+
+    async def _get_token(self):
+        # 令牌过期前一分钟刷新
+        if self._token is None or time.time() > self._token_expire - 60:
+            await asyncio.to_thread(self._create_token)
+        return self._token
+
+    async def _transcribe(self, wav_data):
+        token = await self._get_token()
+        query = urlencode({
+            "appkey": self.app_key,
+            "format": "wav",
+            "sample_rate": self.sample_rate,
+            "enable_word_level_result": "true",
+            "enable_timestamp_alignment": "true"
+        })
+        status, _, body = await self._request(
+            "POST", "?" + query, body=wav_data,
+            headers={"X-NLS-Token": token, "Content-Type": "application/octet-stream"}
+        )
+        try:
+            data = json.loads(body)
+        except ValueError:
+            data = {}
+        code = data.get("status")
+        if status == 429 or status >= 500 or code in self.RETRYABLE_STATUS:
+            raise CloudASRError(f"阿里云识别限流或服务端错误: {status} {data.get('message', '')}", retryable=True)
+        if status != 200 or code != 20000000:
+            raise CloudASRError(f"阿里云识别失败: {status} {data.get('message', '')}")
+
+        words = []
+        for sentence in data.get("flash_result", {}).get("sentences", []):
+            # 有词级结果时使用词级时间戳，否则退化为句级
+            for item in sentence.get("words") or [sentence]:
+                words.append({
+                    "text": item["text"],
+                    "start": item["begin_time"] / 1000,
+                    "end": item["end_time"] / 1000
+                })
+        return words
+
+
+class TencentASRClient(CloudASRClient):
+    """腾讯云 录音文件识别(CreateRecTask 提交任务，DescribeTaskStatus 轮询结果)"""
+
+    VERSION = "2019-06-14"
+    # FailedOperation.ServiceIsolate 表示账号欠费或被隔离，重试无效，不在此列
+    RETRYABLE_CODES = {"RequestLimitExceeded", "InternalError"}
+
+    def __init__(self, secret_id, secret_key, endpoint="https://asr.tencentcloudapi.com/",
+                 poll_interval=1.0, poll_qps=20, poll_timeout=1800, **kwargs):
+        """
+        Args:
+            poll_interval: 轮询任务状态的间隔(秒)
+            poll_qps: DescribeTaskStatus 的QPS
+            poll_timeout: 单个识别任务的最长等待时间(秒)，超时后抛出 CloudASRError
+        """
+        super().__init__(endpoint, **kwargs)
+        self.secret_id = secret_id
+        self.secret_key = secret_key
+        self.poll_interval = poll_interval
+        self.poll_timeout = poll_timeout
+        self.poll_limiter = TokenBucket(poll_qps)
+
+    def _sign_headers(self, action, payload):
+        """生成 TC3-HMAC-SHA256 签名请求头"""
+        timestamp = int(time.time())
+        date = datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d")
+        host = self.pool.host_header
+        content_type = "application/json; charset=utf-8"
+
+        canonical_request = "\n".join([
+            "POST", "/", "",
+            f"content-type:{content_type}\nhost:{host}\n",
+            "content-type;host",
+            hashlib.sha256(payload).hexdigest()
+        ])
+        scope = f"{date}/asr/tc3_request"
+        string_to_sign = "\n".join([
+            "TC3-HMAC-SHA256", str(timestamp), scope,
+            hashlib.sha256(canonical_request.encode("utf-8")).hexdigest()
+        ])
+
+        def _hmac(key, msg):
+            return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
+
+        secret_signing = _hmac(_hmac(_hmac(("TC3" + self.secret_key).encode("utf-8"), date), "asr"), "tc3_request")
+        signature = hmac.new(secret_signing, string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+
+        return {
+            "Authorization": (f"TC3-HMAC-SHA256 Credential={self.secret_id}/{scope}, "
+                              f"SignedHeaders=content-type;host, Signature={signature}"),
+            "Content-Type": content_type,
+            "Host": host,
+            "X-TC-Action": action,
+            "X-TC-Timestamp": str(timestamp),
+            "X-TC-Version": self.VERSION
+        }
+
+    async def _call(self, action, params, limiter=None):
+        payload = json.dumps(params).encode("utf-8")
+        if limiter is not None:
+            await limiter.acquire()
+            try:
+                status, _, body = await asyncio.to_thread(
+                    self.pool.request, "POST", "/", payload, self._sign_headers(action, payload))
+            except OSError as e:
+                raise CloudASRError(f"网络错误: {e}", retryable=True)
+        else:
+            status, _, body = await self._request("POST", "/", body=payload,
+                                                  headers=self._sign_headers(action, payload))
+        if status == 429 or status >= 500:
+            raise CloudASRError(f"腾讯云请求失败: {status}", retryable=True)
+
+        response = json.loads(body).get("Response", {})
+        error = response.get("Error")
+        if error:
+            raise CloudASRError(f"腾讯云 {action} 失败: {error.get('Code')} {error.get('Message')}",
+                                retryable=error.get("Code") in self.RETRYABLE_CODES)
+        return response.get("Data", {})
+
+    async def _transcribe(self, wav_data):
+        task = await self._call("CreateRecTask", {
+            "EngineModelType": "16k_zh",
+            "ChannelNum": 1,
+            "ResTextFormat": 2,
+            "SourceType": 1,
+            "Data": base64.b64encode(wav_data).decode("utf-8"),
+            "DataLen": len(wav_data)
+        })
+        task_id = task["TaskId"]
+
+        # 轮询任务状态: 0 等待, 1 执行中, 2 成功, 3 失败
+        deadline = time.monotonic() + self.poll_timeout
+        while True:
+            if time.monotonic() > deadline:
+                raise CloudASRError(f"腾讯云识别任务 {task_id} 超过 {self.poll_timeout} 秒未完成")
+            await asyncio.sleep(self.poll_interval)
+            result = await self._with_retries(self._call, "DescribeTaskStatus", {"TaskId": task_id}, self.poll_limiter)
+            if result.get("Status") == 2:
+                break
+            if result.get("Status") == 3:
+                raise CloudASRError(f"腾讯云识别任务失败: {result.get('ErrorMsg', '')}")
+
+        words = []
+        for sentence in result.get("ResultDetail") or []:
+            sentence_start = sentence.get("StartMs", 0)
+            for word in sentence.get("Words") or []:
+                words.append({
+                    "text": word["Word"],
+                    "start": (sentence_start + word["OffsetStartMs"]) / 1000,
+                    "end": (sentence_start + word["OffsetEndMs"]) / 1000
+                })
+        return words
+
+
+def _pop_encode(value):
+    """阿里云 POP 签名使用的 URL 编码"""
+    return quote(str(value), safe="~")
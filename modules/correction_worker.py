@@ -0,0 +1,101 @@
+import queue
+import threading
+
+from modules.pipeline import correct_result
+from modules.resource_monitor import pin_current_thread
+
+# 队列中的结束标记
+_STOP = object()
+
+
+class CorrectionWorker:
+    """
+    在后台线程中对识别结果逐段纠错，与后续片段的识别同时进行
+
+    纠错模型在工作线程中加载，加载时间也与识别重叠。可以把工作线程绑定到单独的CPU核，
+    并限制 torch 的线程数，避免与 Vosk 识别争抢CPU(torch 线程数是进程级设置，close() 时恢复)。
+    模型加载或纠错失败时不抛出异常，close() 返回 None，由调用方继续使用未纠错的结果
+
+    用法:
+        worker = CorrectionWorker(lambda: TextCorrector("macbert"))
+        worker.start()
+        for result in results:
+            worker.submit(result)
+        corrected = worker.close()
+    """
+
+    def __init__(self, factory, cores=None, threads=None):
+        """
+        Args:
+            factory: 创建 TextCorrector 的函数
+            cores: 工作线程绑定的CPU核列表，None 表示不绑定
+            threads: torch 计算使用的线程数，None 表示不限制
+        """
+        self.factory = factory
+        self.cores = cores
+        self.threads = threads
+        self.error = None
+        self._queue = queue.Queue()
+        self._results = []
+        self._thread = None
+        # 启动前的 torch 线程数，close() 时恢复
+        self._previous_threads = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="correction", daemon=True)
+        self._thread.start()
+        return self
+
+    def submit(self, result):
+        """提交一段识别结果，纠错在结果的副本上进行，不修改传入的结果"""
+        self._queue.put(dict(result))
+
+    def close(self):
+        """
+        等待已提交的片段全部纠错完成
+
+        Returns:
+            list: 按提交顺序排列的纠错结果，纠错器初始化失败时返回 None
+        """
+        self._queue.put(_STOP)
+        self._thread.join()
+        if self._previous_threads is not None:
+            import torch
+            torch.set_num_threads(self._previous_threads)
+            self._previous_threads = None
+        if self.error is not None:
+            return None
+        return self._results
+
+    def _run(self):
+        pin_current_thread(self.cores)
+        corrector = None
+        try:
+            if self.threads:
+                try:
+                    import torch
+                    self._previous_threads = torch.get_num_threads()
+                    torch.set_num_threads(self.threads)
+                except ImportError:
+                    pass
+            corrector = self.factory()
+        except Exception as e:
+            print(f"文本纠错初始化失败: {e}")
+            print("将继续处理，但不进行文本纠错")
+            self.error = e
+
+        while True:
+            result = self._queue.get()
+            if result is _STOP:
+                break
+            if corrector is None:
+                # 初始化失败，丢弃剩余片段，让识别线程不被阻塞
+                continue
+            try:
+                correct_result(result, corrector, len(self._results) + 1)
+            except Exception as e:
+                print(f"文本纠错失败: {e}")
+                self.error = e
+                corrector = None
+                continue
+            self._results.append(result)
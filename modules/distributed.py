@@ -0,0 +1,380 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class WorkQueue:
+    """
+    分布式识别任务队列的接口
+
+    协调节点将音频片段作为任务放入队列，各节点上的识别进程租用(lease)任务并回传结果。
+    租约到期仍未完成的任务会被重新分配，以应对识别进程异常退出
+    """
+
+    # 队列所在的共享目录，音频片段以相对该目录的路径保存在任务中
+    shared_dir = None
+
+    def submit(self, video_id, jobs):
+        """提交一个视频的全部片段任务，jobs 为包含 index/audio_path/offset 的字典列表"""
+        raise NotImplementedError
+
+    def lease(self, worker_id, lease_seconds):
+        """租用一个待处理(或租约已过期)的任务，没有任务时返回 None"""
+        raise NotImplementedError
+
+    def renew(self, job_id, worker_id, lease_seconds):
+        """延长任务租约，返回是否仍持有该任务"""
+        raise NotImplementedError
+
+    def complete(self, job_id, worker_id, result):
+        """回传识别结果"""
+        raise NotImplementedError
+
+    def fail(self, job_id, worker_id, error):
+        """报告任务失败，未超过最大尝试次数时任务会重新进入待处理状态"""
+        raise NotImplementedError
+
+    def status(self, video_id):
+        """返回视频各状态的任务数量字典"""
+        raise NotImplementedError
+
+    def results(self, video_id):
+        """按片段顺序返回已完成任务的 (index, offset, result) 列表"""
+        raise NotImplementedError
+
+    def errors(self, video_id):
+        """按片段顺序返回失败任务的 (index, error) 列表"""
+        raise NotImplementedError
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """基于共享目录中 SQLite 数据库的任务队列，适合本地测试或共享存储的小规模集群"""
+
+    def __init__(self, db_path, max_attempts=3):
+        self.db_path = os.path.abspath(db_path)
+        self.shared_dir = os.path.dirname(self.db_path)
+        self.max_attempts = max_attempts
+        os.makedirs(self.shared_dir, exist_ok=True)
+        self._local = threading.local()
+
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    video_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    audio_path TEXT NOT NULL,
+                    offset REAL NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    worker_id TEXT,
+                    lease_until REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, lease_until)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_video ON jobs (video_id, seq)")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            # WAL 依赖共享内存，在 NFS/SMB 等网络文件系统上不可用，多个节点共享数据库时使用默认的回滚日志
+            conn.execute("PRAGMA journal_mode=DELETE")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return _Transaction(conn)
+
+    def submit(self, video_id, jobs):
+        now = time.time()
+        with self._connect() as conn:
+            # 重新提交同一视频时清除旧任务
+            conn.execute("DELETE FROM jobs WHERE video_id = ?", (video_id,))
+            conn.executemany(
+                "INSERT INTO jobs (job_id, video_id, seq, audio_path, offset, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (f"{video_id}:{job['index']}", video_id, job["index"], job["audio_path"], job["offset"], now)
+                    for job in jobs
+                ]
+            )
+
+    def lease(self, worker_id, lease_seconds):
+        now = time.time()
+        with self._connect() as conn:
+            # 超过最大尝试次数且租约过期的任务标记为失败
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = COALESCE(error, '租约超时次数过多') "
+                "WHERE status = 'leased' AND lease_until < ? AND attempts >= ?",
+                (now, self.max_attempts)
+            )
+            row = conn.execute(
+                "SELECT job_id, video_id, seq, audio_path, offset, attempts FROM jobs "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_until < ?) "
+                "ORDER BY created_at, seq LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            job_id, video_id, seq, audio_path, offset, attempts = row
+            conn.execute(
+                "UPDATE jobs SET status = 'leased', worker_id = ?, lease_until = ?, attempts = attempts + 1 "
+                "WHERE job_id = ?",
+                (worker_id, now + lease_seconds, job_id)
+            )
+
+        return {
+            "job_id": job_id,
+            "video_id": video_id,
+            "index": seq,
+            "audio_path": os.path.join(self.shared_dir, audio_path),
+            "offset": offset,
+            "attempt": attempts + 1
+        }
+
+    def renew(self, job_id, worker_id, lease_seconds):
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE job_id = ? AND worker_id = ? AND status = 'leased'",
+                (time.time() + lease_seconds, job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id, worker_id, result):
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, lease_until = NULL "
+                "WHERE job_id = ? AND worker_id = ? AND status = 'leased'",
+                (json.dumps(result, ensure_ascii=False), job_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id, worker_id, error):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error = ?, lease_until = NULL "
+                "WHERE job_id = ? AND worker_id = ? AND status = 'leased'",
+                (self.max_attempts, str(error), job_id, worker_id)
+            )
+
+    def status(self, video_id):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) FROM jobs WHERE video_id = ? GROUP BY status",
+                (video_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def errors(self, video_id):
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT seq, error FROM jobs WHERE video_id = ? AND status = 'failed' ORDER BY seq",
+                (video_id,)
+            ).fetchall()
+
+    def results(self, video_id):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT seq, offset, result FROM jobs WHERE video_id = ? AND status = 'done' ORDER BY seq",
+                (video_id,)
+            ).fetchall()
+        return [(seq, offset, json.loads(result)) for seq, offset, result in rows]
+
+
+class _Transaction:
+    """在同一连接上以 BEGIN IMMEDIATE 开启写事务，保证租用任务的原子性"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+# 可用的队列后端，键为队列地址的协议部分
+QUEUE_BACKENDS = {
+    "sqlite": SQLiteWorkQueue,
+}
+
+
+def get_work_queue(queue_url, **kwargs):
+    """
+    根据地址创建任务队列
+
+    Args:
+        queue_url: 队列地址，如 sqlite:///mnt/shared/queue.db
+
+    Returns:
+        WorkQueue: 任务队列实例
+    """
+    scheme, sep, location = queue_url.partition("://")
+    if not sep or scheme not in QUEUE_BACKENDS:
+        raise ValueError(f"不支持的任务队列地址: {queue_url}")
+    if scheme == "sqlite":
+        # sqlite:///relative/path 与 sqlite:////absolute/path
+        location = location[1:] if location.startswith("/") else location
+    return QUEUE_BACKENDS[scheme](location, **kwargs)
+
+
+class Coordinator:
+    """协调节点：切分音频并分发识别任务，收集结果后按顺序合并"""
+
+    def __init__(self, work_queue, segment_length_ms=300000, overlap_ms=0, sample_rate=16000, channels=1):
+        self.work_queue = work_queue
+        self.segment_length_ms = segment_length_ms
+        self.overlap_ms = overlap_ms
+        self.sample_rate = sample_rate
+        self.channels = channels
+        # 本协调节点提交的任务数 {视频ID: 任务数}
+        self._submitted = {}
+
+    def submit(self, audio_path, video_id):
+        """
+        将音频切分到共享目录并提交识别任务
+
+        Args:
+            audio_path: AudioExtractor 提取的音频文件路径
+            video_id: 视频ID
+
+        Returns:
+            int: 提交的任务数量
+        """
+        from modules.audio_extractor import AudioExtractor
+
+        segment_dir = os.path.join(self.work_queue.shared_dir, "segments", video_id)
+        extractor = AudioExtractor(segment_dir, sample_rate=self.sample_rate, channels=self.channels)
+        segment_paths = extractor.segment_audio(
+            audio_path, segment_length_ms=self.segment_length_ms, overlap_ms=self.overlap_ms, video_id=video_id
+        )
+
+        jobs = [
+            {
+                "index": i,
+                "audio_path": os.path.relpath(path, self.work_queue.shared_dir),
+                "offset": i * self.segment_length_ms / 1000
+            }
+            for i, path in enumerate(segment_paths)
+        ]
+        self._submitted[video_id] = len(jobs)
+        if not jobs:
+            print("音频为空，没有需要识别的片段")
+            return 0
+        self.work_queue.submit(video_id, jobs)
+        print(f"已提交 {len(jobs)} 个识别任务到队列")
+        return len(jobs)
+
+    def wait(self, video_id, poll_interval=2.0, timeout=None):
+        """
+        等待全部任务完成并返回识别结果
+
+        Args:
+            video_id: 视频ID
+            poll_interval: 轮询间隔(秒)
+            timeout: 最长等待时间(秒)，None 表示一直等待
+
+        Returns:
+            list: 按片段顺序排列的识别结果，每个结果带有 offset 字段(片段在整段音频中的起始秒数)
+                和 overlap 字段(与下一个片段重叠的秒数)；submit 没有提交任何任务时返回空列表
+        """
+        if self._submitted.get(video_id) == 0:
+            return []
+        start_time = time.time()
+        last_report = None
+        while True:
+            status = self.work_queue.status(video_id)
+            if status.get("failed"):
+                details = "; ".join(f"第{seq+1}段: {error}" for seq, error in self.work_queue.errors(video_id))
+                raise RuntimeError(f"部分识别任务失败: {details}")
+
+            total = sum(status.values())
+            done = status.get("done", 0)
+            if (done, total) != last_report:
+                print(f"识别进度: {done}/{total}")
+                last_report = (done, total)
+            if total and done == total:
+                break
+
+            if timeout is not None and time.time() - start_time > timeout:
+                raise TimeoutError(f"等待识别结果超时: {done}/{total}")
+            time.sleep(poll_interval)
+
+        results = []
+        for _, offset, result in self.work_queue.results(video_id):
+            result["offset"] = offset
+            result["overlap"] = self.overlap_ms / 1000
+            results.append(result)
+        return results
+
+
+class Worker:
+    """识别节点：常驻加载模型，循环租用任务、识别并回传结果"""
+
+    def __init__(self, work_queue, recognizer, worker_id=None, lease_seconds=600, poll_interval=2.0):
+        """
+        Args:
+            work_queue: 任务队列
+            recognizer: 已初始化的 SpeechRecognizer(模型在进程内保持加载)
+            worker_id: 识别节点ID，默认使用主机名和随机后缀
+            lease_seconds: 任务租约时长(秒)，处理期间会定期续约
+            poll_interval: 队列为空时的轮询间隔(秒)
+        """
+        self.work_queue = work_queue
+        self.recognizer = recognizer
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+
+    def run(self, exit_when_idle=False):
+        """
+        持续处理队列中的任务
+
+        Args:
+            exit_when_idle: 队列为空时是否退出
+
+        Returns:
+            int: 处理完成的任务数量
+        """
+        print(f"识别节点 {self.worker_id} 已启动")
+        processed = 0
+        while True:
+            job = self.work_queue.lease(self.worker_id, self.lease_seconds)
+            if job is None:
+                if exit_when_idle:
+                    return processed
+                time.sleep(self.poll_interval)
+                continue
+
+            print(f"处理任务 {job['job_id']} (第{job['attempt']}次尝试)")
+            stop_renewal = threading.Event()
+            renewal = threading.Thread(target=self._renew_lease, args=(job["job_id"], stop_renewal), daemon=True)
+            renewal.start()
+            try:
+                result = self.recognizer.recognize(job["audio_path"])
+                if self.work_queue.complete(job["job_id"], self.worker_id, result):
+                    processed += 1
+                else:
+                    print(f"任务 {job['job_id']} 的租约已失效，结果被丢弃")
+            except Exception as e:
+                print(f"任务 {job['job_id']} 处理失败: {e}")
+                self.work_queue.fail(job["job_id"], self.worker_id, e)
+            finally:
+                stop_renewal.set()
+                renewal.join()
+
+    def _renew_lease(self, job_id, stop_event):
+        """处理期间定期续约，识别进程退出后租约自然过期，任务会被其他节点重新租用"""
+        while not stop_event.wait(self.lease_seconds / 3):
+            if not self.work_queue.renew(job_id, self.worker_id, self.lease_seconds):
+                return
@@ -0,0 +1,319 @@
+import json
+import os
+import sqlite3
+import wave
+
+import numpy as np
+
+from modules.artifact_index import ArtifactIndex
+
+
+class AudioFingerprinter:
+    """
+    基于频谱峰值对的音频指纹
+
+    在对数幅度谱中按频带取峰值，将相邻峰值两两组合为 (f1, f2, Δt) 哈希，
+    对重新编码、截取片段的音频依然能够在正确的时间偏移处对齐
+    """
+
+    # 频带边界(频率bin)，低频划分更细
+    BAND_EDGES = [8, 16, 32, 64, 96, 160, 256, 512]
+
+    def __init__(self, target_rate=8000, n_fft=1024, hop=512, fan_out=5, max_dt=63,
+                 peak_margin=1.0, block_frames=4096):
+        """
+        Args:
+            target_rate: 计算指纹前降采样到的采样率
+            n_fft: FFT窗口长度
+            hop: 帧移(采样点)
+            fan_out: 每个锚点峰值与之后多少个峰值组合
+            max_dt: 峰值对之间最大的帧间隔
+            peak_margin: 峰值需高出频带平均对数幅度的量
+            block_frames: 每次计算频谱的帧数，限制长音频的内存占用
+        """
+        self.target_rate = target_rate
+        self.n_fft = n_fft
+        self.hop = hop
+        self.fan_out = fan_out
+        self.max_dt = max_dt
+        self.peak_margin = peak_margin
+        self.block_frames = block_frames
+        self.window = np.hanning(n_fft).astype(np.float32)
+
+    @property
+    def frame_seconds(self):
+        """每帧对应的秒数，用于将帧偏移换算为时间"""
+        return self.hop / self.target_rate
+
+    def load_samples(self, audio_path):
+        """读取 wav 文件并降采样为单声道 float32"""
+        with wave.open(audio_path, "rb") as wf:
+            channels = wf.getnchannels()
+            rate = wf.getframerate()
+            samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        samples = samples.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+
+        # 按整数倍降采样(取平均起到简单低通的作用)
+        factor = max(1, rate // self.target_rate)
+        usable = len(samples) - len(samples) % factor
+        return samples[:usable].reshape(-1, factor).mean(axis=1)
+
+    def fingerprint(self, audio_path):
+        """
+        计算音频指纹
+
+        Args:
+            audio_path: wav 文件路径
+
+        Returns:
+            tuple: (哈希数组 uint32, 锚点帧位置数组 int32, 音频时长秒数)
+        """
+        samples = self.load_samples(audio_path)
+        duration = len(samples) / self.target_rate
+        if len(samples) < self.n_fft:
+            return np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.int32), duration
+
+        frames = np.lib.stride_tricks.sliding_window_view(samples, self.n_fft)[::self.hop]
+        peak_times = []
+        peak_freqs = []
+        for block_start in range(0, len(frames), self.block_frames):
+            block = frames[block_start:block_start + self.block_frames]
+            spectrum = np.log1p(np.abs(np.fft.rfft(block * self.window, axis=1)))
+            times, freqs = self._find_peaks(spectrum)
+            peak_times.append(times + block_start)
+            peak_freqs.append(freqs)
+
+        times = np.concatenate(peak_times)
+        freqs = np.concatenate(peak_freqs)
+        hashes, anchors = self._hash_peaks(times, freqs)
+        return hashes, anchors, duration
+
+    def _find_peaks(self, spectrum):
+        """每帧每个频带取幅度最大的bin，保留明显高于该频带平均水平(对数域)的峰值"""
+        times = []
+        freqs = []
+        low = 0
+        for high in self.BAND_EDGES:
+            band = spectrum[:, low:high]
+            arg = band.argmax(axis=1)
+            value = band[np.arange(len(band)), arg]
+            keep = value > band.mean(axis=1) + self.peak_margin
+            times.append(np.nonzero(keep)[0])
+            freqs.append(arg[keep] + low)
+            low = high
+
+        times = np.concatenate(times)
+        freqs = np.concatenate(freqs)
+        order = np.lexsort((freqs, times))
+        return times[order].astype(np.int32), freqs[order].astype(np.int32)
+
+    def _hash_peaks(self, times, freqs):
+        """将每个峰值与其后 fan_out 个峰值组合成哈希: f1(9位) | f2(9位) | Δt(6位)"""
+        hashes = []
+        anchors = []
+        for k in range(1, self.fan_out + 1):
+            dt = times[k:] - times[:-k]
+            valid = (dt > 0) & (dt <= self.max_dt)
+            f1 = freqs[:-k][valid].astype(np.uint32)
+            f2 = freqs[k:][valid].astype(np.uint32)
+            hashes.append((f1 << 15) | (f2 << 6) | dt[valid].astype(np.uint32))
+            anchors.append(times[:-k][valid])
+        if not hashes:
+            return np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.int32)
+        return np.concatenate(hashes), np.concatenate(anchors)
+
+
+class FingerprintIndex:
+    """本地音频指纹索引，记录已转写视频的指纹和原始识别结果"""
+
+    def __init__(self, index_dir, frame_seconds):
+        self.index_dir = index_dir
+        self.frame_seconds = frame_seconds
+        self.transcript_dir = os.path.join(index_dir, "transcripts")
+        os.makedirs(self.transcript_dir, exist_ok=True)
+
+        self.conn = sqlite3.connect(os.path.join(index_dir, "fingerprints.db"))
+        self.conn.execute("CREATE TABLE IF NOT EXISTS hashes (hash INTEGER, video_id TEXT, t INTEGER)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_hash ON hashes (hash)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS videos (video_id TEXT PRIMARY KEY, duration REAL, hash_count INTEGER)"
+        )
+        self.conn.commit()
+
+    def add(self, video_id, hashes, anchors, duration, recognition_result):
+        """
+        将视频指纹和识别结果加入索引
+
+        Args:
+            video_id: 视频ID
+            hashes/anchors: AudioFingerprinter.fingerprint 的返回值
+            duration: 音频时长(秒)
+            recognition_result: 合并后的识别结果(词级时间戳为绝对时间)
+        """
+        with self.conn:
+            self.conn.execute("DELETE FROM hashes WHERE video_id = ?", (video_id,))
+            self.conn.executemany(
+                "INSERT INTO hashes (hash, video_id, t) VALUES (?, ?, ?)",
+                zip(hashes.tolist(), [video_id] * len(hashes), anchors.tolist())
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO videos (video_id, duration, hash_count) VALUES (?, ?, ?)",
+                (video_id, duration, len(hashes))
+            )
+        transcript_path = self._transcript_path(video_id)
+        os.makedirs(os.path.dirname(transcript_path), exist_ok=True)
+        with open(transcript_path, "w", encoding="utf-8") as f:
+            json.dump(recognition_result, f, ensure_ascii=False)
+
+    def match(self, hashes, anchors, duration, exclude_video_id=None, threshold=0.25, min_matches=50,
+              min_coverage=0.9):
+        """
+        查找与给定指纹匹配的已转写视频
+
+        对所有哈希命中按 (视频, 时间偏移) 统计，同一偏移上对齐的哈希数量越多越可信。
+        对齐的时间范围还必须覆盖新视频的大部分时长。新视频是已转写视频的片段(如剪辑)时
+        可以复用对应时间范围的识别结果；新视频只是包含已转写视频的一小段(如引用)时不算重复，
+        否则复用的识别结果会丢失重叠范围以外的内容
+
+        Args:
+            hashes/anchors: 新视频的指纹
+            duration: 新视频的音频时长(秒)
+            exclude_video_id: 不参与匹配的视频ID(新视频自身)
+            threshold: 对齐哈希数占新视频哈希总数的最低比例
+            min_matches: 对齐哈希数的最低数量
+            min_coverage: 对齐范围占新视频时长的最低比例
+
+        Returns:
+            dict: 匹配信息 {video_id, offset(秒), score, matches, coverage}，没有可信匹配时返回 None
+        """
+        if len(hashes) == 0:
+            return None
+
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS query (hash INTEGER, t INTEGER)")
+        self.conn.execute("DELETE FROM query")
+        self.conn.executemany("INSERT INTO query (hash, t) VALUES (?, ?)",
+                              zip(hashes.tolist(), anchors.tolist()))
+        rows = self.conn.execute(
+            "SELECT h.video_id, h.t - q.t, q.t FROM query q JOIN hashes h ON h.hash = q.hash "
+            "WHERE h.video_id != ?",
+            (exclude_video_id or "",)
+        ).fetchall()
+        if not rows:
+            return None
+
+        video_ids, deltas, query_times = zip(*rows)
+        video_ids = np.array(video_ids)
+        deltas = np.array(deltas, dtype=np.int64)
+        query_times = np.array(query_times, dtype=np.int64)
+
+        best = None
+        for video_id in np.unique(video_ids):
+            values, counts = np.unique(deltas[video_ids == video_id], return_counts=True)
+            # 允许相邻一帧的误差
+            smoothed = counts.copy()
+            smoothed[1:] += np.where(np.diff(values) == 1, counts[:-1], 0)
+            smoothed[:-1] += np.where(np.diff(values) == 1, counts[1:], 0)
+            i = smoothed.argmax()
+            if best is None or smoothed[i] > best["matches"]:
+                best = {"video_id": str(video_id), "delta": int(values[i]), "matches": int(smoothed[i])}
+
+        best["score"] = min(1.0, best["matches"] / len(hashes))
+        if best["matches"] < min_matches or best["score"] < threshold:
+            return None
+
+        # 在最佳偏移上对齐的哈希在新视频中的时间范围
+        aligned = (video_ids == best["video_id"]) & (np.abs(deltas - best["delta"]) <= 1)
+        span = (query_times[aligned].max() - query_times[aligned].min() + 1) * self.frame_seconds
+        best["coverage"] = min(1.0, span / max(duration, self.frame_seconds))
+        best["offset"] = best.pop("delta") * self.frame_seconds
+        if best["coverage"] < min_coverage:
+            print(f"音频与 {best['video_id']} 部分重叠 (覆盖 {best['coverage']:.0%})，不视为重复视频")
+            return None
+        return best
+
+    def reuse_transcript(self, match, duration):
+        """
+        取出匹配视频的识别结果，并换算到新视频的时间轴
+
+        Args:
+            match: match() 的返回值
+            duration: 新视频的音频时长(秒)
+
+        Returns:
+            dict: 识别结果，词级时间戳为新视频中的绝对时间
+        """
+        with open(self._transcript_path(match["video_id"]), "r", encoding="utf-8") as f:
+            source = json.load(f)
+
+        offset = match["offset"]
+        segments = [
+            {
+                "text": segment["text"],
+                "start": round(segment["start"] - offset, 3),
+                "end": round(segment["end"] - offset, 3)
+            }
+            for segment in source.get("segments", [])
+            if segment["start"] >= offset and segment["end"] <= offset + duration
+        ]
+        return {
+            "text": " ".join(segment["text"] for segment in segments),
+            "segments": segments,
+            "offset": 0,
+            "reused_from": match["video_id"]
+        }
+
+    def _transcript_path(self, video_id):
+        return ArtifactIndex.path_for(self.transcript_dir, video_id, f"{video_id}.json")
+
+
+class TranscriptDeduplicator:
+    """在识别前查找重复上传的视频，命中时复用已有的识别结果"""
+
+    def __init__(self, index_dir, threshold=0.25, min_matches=50, min_coverage=0.9):
+        """
+        Args:
+            index_dir: 指纹索引目录
+            threshold: 对齐哈希数占新视频哈希总数的最低比例
+            min_matches: 对齐哈希数的最低数量
+            min_coverage: 对齐范围占新视频时长的最低比例
+        """
+        self.fingerprinter = AudioFingerprinter()
+        self.index = FingerprintIndex(index_dir, self.fingerprinter.frame_seconds)
+        self.threshold = threshold
+        self.min_matches = min_matches
+        self.min_coverage = min_coverage
+        self._fingerprints = {}
+
+    def lookup(self, audio_path, video_id):
+        """
+        计算音频指纹并查找重复视频
+
+        Returns:
+            dict: 复用的识别结果(已换算到新视频时间轴)，没有匹配时返回 None
+        """
+        print(f"正在计算音频指纹: {audio_path}")
+        hashes, anchors, duration = self.fingerprinter.fingerprint(audio_path)
+        self._fingerprints[video_id] = (hashes, anchors, duration)
+
+        match = self.index.match(hashes, anchors, duration, exclude_video_id=video_id,
+                                 threshold=self.threshold, min_matches=self.min_matches,
+                                 min_coverage=self.min_coverage)
+        if match is None:
+            return None
+
+        print(f"发现重复音频: 与 {match['video_id']} 匹配 (相似度 {match['score']:.2f}，覆盖 {match['coverage']:.0%}，"
+              f"时间偏移 {match['offset']:.2f} 秒)，复用已有识别结果")
+        return self.index.reuse_transcript(match, duration)
+
+    def register(self, video_id, recognition_results):
+        """将新视频的指纹和原始识别结果加入索引，需先调用 lookup"""
+        from modules.transcript_generator import merge_results
+
+        if video_id not in self._fingerprints:
+            return
+        hashes, anchors, duration = self._fingerprints.pop(video_id)
+        all_text, all_segments = merge_results(recognition_results)
+        self.index.add(video_id, hashes, anchors, duration, {
+            "text": all_text.strip(),
+            "segments": all_segments
+        })
@@ -0,0 +1,199 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from modules.http_pool import HTTPConnectionPool
+
+
+class DownloadError(Exception):
+    pass
+
+
+class RangedDownloader:
+    """
+    多连接分段下载器
+
+    先用 Range: bytes=0-0 请求获取文件大小，再把文件划分为固定大小的分段并发下载，
+    写入预分配的 .part 文件。已完成的分段记录在 .part.json 中，中断后再次下载会跳过这些分段。
+    每个分段校验 Content-Range 和实际长度，失败时换用备用地址重试，
+    单个较慢的CDN节点只会拖慢落在它上面的分段
+    """
+
+    def __init__(self, max_connections=8, chunk_size=4 * 1024 * 1024, timeout=30, max_retries=3, headers=None):
+        """
+        Args:
+            max_connections: 每个主机的最大连接数，也是并发下载的分段数
+            chunk_size: 分段大小(字节)
+            timeout: 连接和读取超时(秒)
+            max_retries: 每个分段的最大重试次数
+            headers: 附加的请求头(如B站CDN要求的 Referer)
+        """
+        self.max_connections = max_connections
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.headers = dict(headers or {})
+        self._pools = {}
+        self._pools_lock = threading.Lock()
+
+    def _pool(self, url):
+        parsed = urlparse(url)
+        key = f"{parsed.scheme}://{parsed.netloc}"
+        with self._pools_lock:
+            if key not in self._pools:
+                self._pools[key] = HTTPConnectionPool(key, self.max_connections, self.timeout)
+            return self._pools[key]
+
+    @staticmethod
+    def _path(url):
+        parsed = urlparse(url)
+        return parsed.path + (f"?{parsed.query}" if parsed.query else "")
+
+    def close(self):
+        for pool in self._pools.values():
+            pool.close()
+
+    def download(self, urls, output_path):
+        """
+        下载文件
+
+        Args:
+            urls: 下载地址，或主地址和备用地址组成的列表(内容必须一致)
+            output_path: 保存路径
+
+        Returns:
+            str: 保存路径
+        """
+        if isinstance(urls, str):
+            urls = [urls]
+        part_path = output_path + ".part"
+        state_path = output_path + ".part.json"
+
+        size = self._probe_size(urls)
+        if size is None:
+            # 服务器不支持分段请求，退化为单连接下载
+            print("服务器不支持分段下载，使用单连接下载")
+            self._download_whole(urls[0], part_path)
+        else:
+            self._download_ranges(urls, size, part_path, state_path)
+
+        actual = os.path.getsize(part_path)
+        if size is not None and actual != size:
+            raise DownloadError(f"文件大小不一致: 期望 {size} 字节，实际 {actual} 字节")
+        os.replace(part_path, output_path)
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        return output_path
+
+    def _probe_size(self, urls):
+        """返回文件大小，服务器不支持 Range 时返回 None"""
+        last_error = None
+        for url in urls:
+            try:
+                with self._pool(url).stream("GET", self._path(url), headers=dict(self.headers, Range="bytes=0-0")) as response:
+                    response.read()
+                    if response.status == 200:
+                        return None
+                    if response.status != 206:
+                        raise DownloadError(f"HTTP {response.status}")
+                    match = re.match(r"bytes \d+-\d+/(\d+)", response.headers.get("Content-Range", ""))
+                    if not match:
+                        raise DownloadError("响应缺少 Content-Range")
+                    return int(match.group(1))
+            except Exception as e:
+                last_error = e
+        raise DownloadError(f"无法获取文件大小: {last_error}")
+
+    def _download_whole(self, url, part_path):
+        with self._pool(url).stream("GET", self._path(url), headers=self.headers) as response:
+            if response.status != 200:
+                raise DownloadError(f"HTTP {response.status}")
+            with open(part_path, "wb") as f:
+                for block in iter(lambda: response.read(1 << 16), b""):
+                    f.write(block)
+
+    def _load_state(self, state_path, size):
+        """读取断点记录，文件大小或分段大小变化时重新开始"""
+        if os.path.exists(state_path):
+            try:
+                with open(state_path, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+                if state["size"] == size and state["chunk_size"] == self.chunk_size:
+                    return state
+            except (OSError, ValueError, KeyError):
+                pass
+        return {"size": size, "chunk_size": self.chunk_size, "done": []}
+
+    def _download_ranges(self, urls, size, part_path, state_path):
+        state = self._load_state(state_path, size)
+        if not state["done"] or not os.path.exists(part_path) or os.path.getsize(part_path) != size:
+            state["done"] = []
+            # 预分配文件，各分段按偏移写入
+            with open(part_path, "wb") as f:
+                f.truncate(size)
+
+        chunks = [
+            (index, start, min(start + self.chunk_size, size) - 1)
+            for index, start in enumerate(range(0, size, self.chunk_size))
+        ]
+        done = set(state["done"])
+        pending = [chunk for chunk in chunks if chunk[0] not in done]
+        if done:
+            print(f"继续下载: 已完成 {len(done)}/{len(chunks)} 个分段")
+
+        lock = threading.Lock()
+        start_time = time.time()
+
+        def fetch(chunk):
+            index, start, end = chunk
+            self._fetch_range(urls, index, start, end, part_path)
+            with lock:
+                state["done"].append(index)
+                tmp_path = state_path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, state_path)
+
+        with ThreadPoolExecutor(max_workers=self.max_connections, thread_name_prefix="download") as executor:
+            # list() 会在任一分段最终失败时抛出异常
+            list(executor.map(fetch, pending))
+
+        elapsed = max(time.time() - start_time, 1e-6)
+        downloaded = sum(end - start + 1 for _, start, end in pending)
+        print(f"分段下载完成: {size / 1024 / 1024:.1f} MB，{len(chunks)} 个分段，"
+              f"{downloaded / 1024 / 1024 / elapsed:.1f} MB/s")
+
+    def _fetch_range(self, urls, index, start, end, part_path):
+        """下载单个分段并写入文件对应位置，失败时换用下一个地址重试"""
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            url = urls[(index + attempt) % len(urls)]
+            try:
+                headers = dict(self.headers, Range=f"bytes={start}-{end}")
+                with self._pool(url).stream("GET", self._path(url), headers=headers) as response:
+                    if response.status != 206:
+                        response.read()
+                        raise DownloadError(f"HTTP {response.status}")
+                    if not response.headers.get("Content-Range", "").startswith(f"bytes {start}-{end}/"):
+                        response.read()
+                        raise DownloadError(f"Content-Range 不匹配: {response.headers.get('Content-Range')}")
+
+                    written = 0
+                    with open(part_path, "r+b") as f:
+                        f.seek(start)
+                        for block in iter(lambda: response.read(1 << 16), b""):
+                            f.write(block)
+                            written += len(block)
+                if written != end - start + 1:
+                    raise DownloadError(f"分段 {index} 长度不完整: {written}/{end - start + 1}")
+                return
+            except Exception as e:
+                last_error = e
+                if attempt < self.max_retries:
+                    time.sleep(random.uniform(0, 0.5 * 2 ** attempt))
+        raise DownloadError(f"分段 {index} 下载失败: {last_error}")
@@ -0,0 +1,137 @@
+import http.client
+import queue
+import threading
+from urllib.parse import urlparse
+
+
+class HTTPConnectionPool:
+    """
+    到单个主机的 keep-alive 连接池
+
+    连接在请求结束后放回池中复用，避免每次请求重新建立 TCP/TLS 连接；
+    同时存在的连接数不超过 max_connections
+    """
+
+    def __init__(self, base_url, max_connections=8, timeout=30):
+        parsed = urlparse(base_url)
+        self.scheme = parsed.scheme or "http"
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.base_path = parsed.path.rstrip("/")
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    @property
+    def host_header(self):
+        """请求中使用的 Host 头(签名时需要与实际请求一致)"""
+        default_port = 443 if self.scheme == "https" else 80
+        if self.port and self.port != default_port:
+            return f"{self.host}:{self.port}"
+        return self.host
+
+    def _new_connection(self):
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _get_connection(self):
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            return self._new_connection(), False
+
+    def request(self, method, path, body=None, headers=None):
+        """
+        发送请求并读取完整响应
+
+        Args:
+            method: HTTP 方法
+            path: 请求路径(可包含查询参数)，会拼接在 base_url 的路径之后
+            body: 请求体
+            headers: 请求头字典
+
+        Returns:
+            tuple: (状态码, 响应头字典, 响应体bytes)
+        """
+        with self.stream(method, path, body=body, headers=headers) as response:
+            return response.status, dict(response.getheaders()), response.read()
+
+    def stream(self, method, path, body=None, headers=None):
+        """
+        发送请求并返回可逐块读取的响应，需在 with 语句中使用以便归还连接
+
+        Returns:
+            PooledResponse: 响应对象
+        """
+        self._slots.acquire()
+        try:
+            response, connection = self._send(method, self.base_path + path, body, headers or {})
+        except Exception:
+            self._slots.release()
+            raise
+        return PooledResponse(self, connection, response)
+
+    def _send(self, method, path, body, headers):
+        connection, reused = self._get_connection()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            return connection.getresponse(), connection
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            connection.close()
+            if not reused:
+                raise
+            # 复用的空闲连接可能已被服务器关闭，换新连接重试一次
+            connection = self._new_connection()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                return connection.getresponse(), connection
+            except Exception:
+                connection.close()
+                raise
+        except Exception:
+            connection.close()
+            raise
+
+    def _release(self, connection, reusable):
+        if reusable:
+            self._idle.put(connection)
+        else:
+            connection.close()
+        self._slots.release()
+
+    def close(self):
+        """关闭所有空闲连接"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class PooledResponse:
+    """连接池返回的响应，退出 with 语句时自动将连接放回池中"""
+
+    def __init__(self, pool, connection, response):
+        self._pool = pool
+        self._connection = connection
+        self._response = response
+        self.status = response.status
+        self.headers = dict(response.getheaders())
+
+    def getheaders(self):
+        return self._response.getheaders()
+
+    def read(self, amt=None):
+        return self._response.read(amt)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # 只有完整读取且未要求关闭的连接才能复用
+        reusable = exc_type is None and self._response.isclosed() and not self._response.will_close
+        if not reusable:
+            self._response.close()
+        self._pool._release(self._connection, reusable)
+        return False
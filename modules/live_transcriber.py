@@ -0,0 +1,290 @@
+import collections
+import json
+import os
+import re
+import subprocess
+import threading
+import time
+import urllib.request
+
+# 请求B站直播接口时使用的请求头
+LIVE_API_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+    "Referer": "https://live.bilibili.com/"
+}
+
+
+def resolve_live_stream(source, api_base="https://api.live.bilibili.com"):
+    """
+    将直播间链接或房间号解析为可以直接拉流的地址
+
+    Args:
+        source: 直播间链接(https://live.bilibili.com/123)或房间号
+        api_base: B站直播接口地址
+
+    Returns:
+        str: 直播流地址
+    """
+    match = re.search(r"live\.bilibili\.com/(?:h5/)?(\d+)", source) or re.fullmatch(r"(\d+)", source)
+    if not match:
+        raise ValueError(f"无法识别的直播间地址: {source}")
+
+    # 短号需要先换算为真实房间号
+    room = _get_json(f"{api_base}/room/v1/Room/room_init?id={match.group(1)}")["data"]
+    if room.get("live_status") != 1:
+        raise ValueError(f"直播间 {room['room_id']} 当前未开播")
+
+    play = _get_json(f"{api_base}/room/v1/Room/playUrl?cid={room['room_id']}&platform=h5&qn=0")["data"]
+    if not play.get("durl"):
+        raise ValueError(f"直播间 {room['room_id']} 没有可用的直播流")
+    return play["durl"][0]["url"]
+
+
+def _get_json(url):
+    request = urllib.request.Request(url, headers=LIVE_API_HEADERS)
+    with urllib.request.urlopen(request, timeout=10) as response:
+        data = json.loads(response.read().decode("utf-8"))
+    if data.get("code") != 0:
+        raise ValueError(f"直播接口返回错误: {data.get('message') or data.get('msg')}")
+    return data
+
+
+def format_srt_time(seconds):
+    """将秒数格式化为SRT时间格式 (HH:MM:SS,mmm)"""
+    total_ms = int(round(seconds * 1000))
+    hours, remainder = divmod(total_ms, 3600000)
+    minutes, remainder = divmod(remainder, 60000)
+    secs, milliseconds = divmod(remainder, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
+
+
+class LiveAudioSource:
+    """
+    通过ffmpeg持续读取音频，按固定时长切块
+
+    读取线程将音频块放入有界队列。识别跟不上时丢弃最旧的音频块，
+    使端到端延迟和缓冲内存都有上限
+    """
+
+    def __init__(self, source, sample_rate=16000, chunk_ms=200, max_buffered_chunks=15, realtime=None):
+        """
+        Args:
+            source: 直播流地址、本地音视频文件，或 "-" 表示从标准输入读取
+            sample_rate: 输出采样率
+            chunk_ms: 每个音频块的时长(毫秒)
+            max_buffered_chunks: 队列中最多缓冲的音频块数
+            realtime: 是否按实际播放速度读取(默认本地文件按实时速度读取，用于模拟直播)
+        """
+        self.source = source
+        self.sample_rate = sample_rate
+        self.chunk_bytes = sample_rate * chunk_ms // 1000 * 2
+        self.chunk_seconds = chunk_ms / 1000
+        self.realtime = os.path.isfile(source) if realtime is None else realtime
+        self.dropped_chunks = 0
+
+        self._queue = collections.deque()
+        self._max_buffered = max_buffered_chunks
+        self._condition = threading.Condition()
+        self._finished = False
+        self._process = None
+
+    def _build_command(self):
+        command = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+        if self.realtime:
+            command.append("-re")
+        if self.source.startswith("http"):
+            command.extend(["-headers", "".join(f"{k}: {v}\r\n" for k, v in LIVE_API_HEADERS.items())])
+        command.extend([
+            "-i", "pipe:0" if self.source == "-" else self.source,
+            "-vn", "-acodec", "pcm_s16le", "-ar", str(self.sample_rate), "-ac", "1",
+            "-f", "s16le", "pipe:1"
+        ])
+        return command
+
+    def start(self):
+        self._process = subprocess.Popen(
+            self._build_command(),
+            stdin=None if self.source == "-" else subprocess.DEVNULL,
+            stdout=subprocess.PIPE
+        )
+        threading.Thread(target=self._read_loop, args=(self._process.stdout,), daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._process and self._process.poll() is None:
+            self._process.terminate()
+        with self._condition:
+            self._finished = True
+            self._condition.notify_all()
+
+    def _read_loop(self, stream):
+        index = 0
+        try:
+            while True:
+                data = stream.read(self.chunk_bytes)
+                if not data:
+                    break
+                self.put({"data": data, "start": index * self.chunk_seconds, "captured_at": time.monotonic()})
+                index += 1
+        finally:
+            with self._condition:
+                self._finished = True
+                self._condition.notify_all()
+
+    def put(self, chunk):
+        """放入一个音频块，队列已满时丢弃最旧的音频块"""
+        with self._condition:
+            if len(self._queue) >= self._max_buffered:
+                self._queue.popleft()
+                self.dropped_chunks += 1
+            self._queue.append(chunk)
+            self._condition.notify()
+
+    def chunks(self):
+        """依次返回音频块 {data, start(流内秒数), captured_at}，音频流结束时停止"""
+        while True:
+            with self._condition:
+                while not self._queue and not self._finished:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                chunk = self._queue.popleft()
+            yield chunk
+
+
+class LiveTranscriptWriter:
+    """
+    写出直播转写结果
+
+    - <name>.jsonl: 每条中间结果和最终结果一行
+    - <name>.srt: 全部最终结果，逐条追加
+    - <name>.live.srt: 只保留最近若干条字幕的滚动文件，每次原子替换，适合作为直播字幕源
+    """
+
+    def __init__(self, output_dir, name, window=20):
+        os.makedirs(output_dir, exist_ok=True)
+        self.jsonl_path = os.path.join(output_dir, f"{name}.jsonl")
+        self.srt_path = os.path.join(output_dir, f"{name}.srt")
+        self.rolling_path = os.path.join(output_dir, f"{name}.live.srt")
+        self.recent = collections.deque(maxlen=window)
+        self.cue_count = 0
+
+        self._jsonl = open(self.jsonl_path, "a", encoding="utf-8")
+        self._srt = open(self.srt_path, "a", encoding="utf-8")
+
+    def partial(self, text, start, latency):
+        self._write_jsonl({"type": "partial", "text": text, "start": round(start, 3), "latency": round(latency, 3)})
+
+    def final(self, text, start, end, latency):
+        self._write_jsonl({
+            "type": "final", "text": text,
+            "start": round(start, 3), "end": round(end, 3), "latency": round(latency, 3)
+        })
+        self.cue_count += 1
+        cue = f"{self.cue_count}\n{format_srt_time(start)} --> {format_srt_time(end)}\n{text}\n\n"
+        self._srt.write(cue)
+        self._srt.flush()
+
+        self.recent.append(cue)
+        tmp_path = self.rolling_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("".join(self.recent))
+        os.replace(tmp_path, self.rolling_path)
+
+    def _write_jsonl(self, record):
+        self._jsonl.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._jsonl.flush()
+
+    def close(self):
+        self._jsonl.close()
+        self._srt.close()
+
+
+class LiveTranscriber:
+    """
+    直播流实时转写
+
+    音频块逐个送入 KaldiRecognizer，识别器判定一句话结束时输出最终结果，
+    其间按固定间隔输出中间结果。超过最长句子时长时强制断句，
+    使单句的识别状态和输出延迟都有上限，可以长时间运行
+    """
+
+    def __init__(self, model, sample_rate=16000, max_utterance_seconds=15, partial_interval=0.5):
+        """
+        Args:
+            model: vosk.Model 对象
+            sample_rate: 音频采样率
+            max_utterance_seconds: 单句最长时长(秒)，超过后强制输出最终结果
+            partial_interval: 输出中间结果的最小间隔(秒)
+        """
+        self.model = model
+        self.sample_rate = sample_rate
+        self.max_utterance_seconds = max_utterance_seconds
+        self.partial_interval = partial_interval
+
+    def _new_recognizer(self):
+        from vosk import KaldiRecognizer
+
+        recognizer = KaldiRecognizer(self.model, self.sample_rate)
+        recognizer.SetWords(True)
+        return recognizer
+
+    def run(self, chunks, writer):
+        """
+        转写音频块直到音频流结束
+
+        Args:
+            chunks: 音频块迭代器(LiveAudioSource.chunks())
+            writer: LiveTranscriptWriter 对象
+        """
+        recognizer = self._new_recognizer()
+        base = None           # 当前识别器第0秒对应的流内时间
+        expected = None       # 下一个音频块应有的流内时间
+        utterance_start = None
+        last_partial = ""
+        last_partial_at = 0.0
+        captured_at = time.monotonic()
+
+        def emit(result_json, fallback_end):
+            nonlocal utterance_start, last_partial
+            result = json.loads(result_json)
+            words = result.get("result", [])
+            if words:
+                writer.final(
+                    " ".join(w["word"] for w in words),
+                    base + words[0]["start"], base + words[-1]["end"],
+                    time.monotonic() - captured_at
+                )
+            elif result.get("text"):
+                writer.final(result["text"], utterance_start, fallback_end, time.monotonic() - captured_at)
+            utterance_start = None
+            last_partial = ""
+
+        for chunk in chunks:
+            captured_at = chunk["captured_at"]
+            if expected is not None and abs(chunk["start"] - expected) > 1e-6:
+                # 有音频块被丢弃，结束当前句子并以新的时间基准重新开始识别
+                emit(recognizer.FinalResult(), expected)
+                recognizer = self._new_recognizer()
+                base = None
+            if base is None:
+                base = chunk["start"]
+            if utterance_start is None:
+                utterance_start = chunk["start"]
+            chunk_seconds = len(chunk["data"]) / (2 * self.sample_rate)
+            expected = chunk["start"] + chunk_seconds
+
+            if recognizer.AcceptWaveform(chunk["data"]):
+                emit(recognizer.Result(), expected)
+            elif expected - utterance_start >= self.max_utterance_seconds:
+                emit(recognizer.FinalResult(), expected)
+            elif time.monotonic() - last_partial_at >= self.partial_interval:
+                partial = json.loads(recognizer.PartialResult()).get("partial", "")
+                if partial and partial != last_partial:
+                    writer.partial(partial, utterance_start, time.monotonic() - captured_at)
+                    last_partial = partial
+                last_partial_at = time.monotonic()
+
+        if expected is not None:
+            emit(recognizer.FinalResult(), expected)
@@ -0,0 +1,362 @@
+"""
+本地模拟服务，用于离线测试云端识别等网络相关功能
+
+模拟阿里云(CreateToken、FlashRecognizer)和腾讯云(CreateRecTask、DescribeTaskStatus)
+语音识别接口，支持注入延迟和按QPS限流；同时模拟B站视频信息、字幕和取流接口
+(x/web-interface/view、x/player/v2、x/player/playurl)，以及支持 Range 请求的媒体文件。用法:
+
+    python -m modules.mock_server --port 8900 --latency 0.2 0.5 --qps 5
+
+然后在 config.py 中将 ALIYUN_GATEWAY_URL、ALIYUN_META_URL、TENCENT_ASR_ENDPOINT、
+BILIBILI_API_BASE 指向 http://127.0.0.1:8900/ 对应的路径
+"""
+
+import argparse
+import base64
+import io
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import uuid
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# 模拟识别结果使用的词，每秒音频生成一个词
+MOCK_WORDS = ["这是", "模拟", "的", "识别", "结果"]
+
+
+def _mock_subtitle_body(duration, text):
+    """每4秒一条字幕，覆盖整个视频"""
+    return [
+        {"from": float(start), "to": float(min(start + 3.5, duration)), "content": f"{text}{i + 1}"}
+        for i, start in enumerate(range(0, int(duration), 4))
+    ]
+
+
+# 模拟的B站视频: UP主字幕、仅AI字幕、无字幕、字幕不完整
+MOCK_VIDEOS = {
+    "BV1mockCC001": {"aid": 1001, "cid": 2001, "duration": 60, "subtitles": [
+        {"lan": "zh-CN", "lan_doc": "中文（中国）", "body": _mock_subtitle_body(60, "UP主字幕第")}
+    ]},
+    "BV1mockAI002": {"aid": 1002, "cid": 2002, "duration": 60, "subtitles": [
+        {"lan": "ai-zh", "lan_doc": "中文（自动生成）", "body": _mock_subtitle_body(60, "AI字幕第")}
+    ]},
+    "BV1mockNO003": {"aid": 1003, "cid": 2003, "duration": 60, "subtitles": []},
+    "BV1mockPT004": {"aid": 1004, "cid": 2004, "duration": 600, "subtitles": [
+        {"lan": "zh-CN", "lan_doc": "中文（中国）", "body": _mock_subtitle_body(60, "片段字幕第")}
+    ]},
+}
+
+
+class _RateLimiter:
+    """服务端限流，超过QPS时请求被拒绝"""
+
+    def __init__(self, qps):
+        self.qps = qps
+        self._tokens = qps
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def allow(self):
+        if not self.qps:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.qps, self._tokens + (now - self._updated) * self.qps)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+class MockServerState:
+    """模拟服务的共享状态和统计信息"""
+
+    def __init__(self, latency=(0.0, 0.0), qps=0):
+        self.latency = latency
+        self.limiters = {"aliyun": _RateLimiter(qps), "tencent": _RateLimiter(qps)}
+        self.tasks = {}
+        self.task_ids = itertools.count(1)
+        self.videos = dict(MOCK_VIDEOS)
+        self.media_size = 3 * 1024 * 1024
+        self._media = {}
+        self.stats = {"requests": 0, "throttled": 0, "max_in_flight": 0}
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def enter(self):
+        with self._lock:
+            self.stats["requests"] += 1
+            self._in_flight += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self._in_flight)
+
+    def leave(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def throttled(self, vendor):
+        if self.limiters[vendor].allow():
+            return False
+        with self._lock:
+            self.stats["throttled"] += 1
+        return True
+
+    def delay(self):
+        time.sleep(random.uniform(*self.latency))
+
+    def media(self, name):
+        """按文件名生成固定内容的模拟媒体文件"""
+        with self._lock:
+            if name not in self._media:
+                self._media[name] = random.Random(name).randbytes(self.media_size)
+            return self._media[name]
+
+
+def _mock_words(wav_data):
+    """根据音频时长生成模拟的词级结果，时间单位为毫秒"""
+    with wave.open(io.BytesIO(wav_data), "rb") as wf:
+        duration_ms = int(wf.getnframes() * 1000 / wf.getframerate())
+    words = []
+    for i, start in enumerate(range(0, duration_ms - 500, 1000)):
+        words.append((MOCK_WORDS[i % len(MOCK_WORDS)], start, start + 800))
+    return words
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    def _send_json(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.state.enter()
+        try:
+            parsed = urlparse(self.path)
+            query = parse_qs(parsed.query)
+            if query.get("Action") == ["CreateToken"]:
+                self._send_json(200, {"Token": {"Id": uuid.uuid4().hex, "ExpireTime": int(time.time()) + 3600}})
+            elif parsed.path in ("/x/web-interface/view", "/x/player/v2", "/x/player/playurl"):
+                self._bilibili_api(parsed.path, query)
+            elif parsed.path.startswith("/bfs/subtitle/"):
+                self._bilibili_subtitle(parsed.path.rsplit("/", 1)[-1])
+            elif parsed.path.startswith("/media/"):
+                self._media(parsed.path.rsplit("/", 1)[-1])
+            else:
+                self._send_json(404, {"message": "not found"})
+        finally:
+            self.state.leave()
+
+    def do_POST(self):
+        self.state.enter()
+        try:
+            body = self._read_body()
+            if urlparse(self.path).path.endswith("/FlashRecognizer"):
+                self._aliyun_flash(body)
+            elif self.headers.get("X-TC-Action"):
+                self._tencent(self.headers["X-TC-Action"], json.loads(body or b"{}"))
+            else:
+                self._send_json(404, {"message": "not found"})
+        finally:
+            self.state.leave()
+
+    def _aliyun_flash(self, body):
+        if self.state.throttled("aliyun"):
+            self._send_json(429, {"status": 40000005, "message": "TOO_MANY_REQUESTS"})
+            return
+        if not self.headers.get("X-NLS-Token"):
+            self._send_json(403, {"status": 40000001, "message": "invalid token"})
+            return
+
+        self.state.delay()
+        words = _mock_words(body)
+        sentences = []
+        for i in range(0, len(words), 5):
+            group = words[i:i + 5]
+            sentences.append({
+                "text": "".join(w for w, _, _ in group),
+                "begin_time": group[0][1],
+                "end_time": group[-1][2],
+                "words": [{"text": w, "begin_time": s, "end_time": e} for w, s, e in group]
+            })
+        self._send_json(200, {
+            "task_id": uuid.uuid4().hex,
+            "status": 20000000,
+            "message": "SUCCESS",
+            "flash_result": {"sentences": sentences}
+        })
+
+    def _find_video(self, query):
+        if "bvid" in query:
+            return query["bvid"][0], self.state.videos.get(query["bvid"][0])
+        for bvid, video in self.state.videos.items():
+            if str(video["aid"]) == query.get("aid", [""])[0]:
+                return bvid, video
+        return None, None
+
+    def _bilibili_api(self, path, query):
+        self.state.delay()
+        bvid, video = self._find_video(query)
+        if video is None:
+            self._send_json(200, {"code": -404, "message": "啥都木有", "data": None})
+            return
+
+        if path == "/x/web-interface/view":
+            data = {
+                "bvid": bvid, "aid": video["aid"], "cid": video["cid"], "duration": video["duration"],
+                "pages": [{"page": 1, "cid": video["cid"], "duration": video["duration"]}]
+            }
+        elif path == "/x/player/playurl":
+            base_url = f"http://{self.headers['Host']}"
+            data = {"dash": {"audio": [
+                {
+                    "id": quality, "bandwidth": bandwidth,
+                    "baseUrl": f"{base_url}/media/{bvid}-{quality}.m4s",
+                    "backupUrl": [f"{base_url}/media/{bvid}-{quality}.m4s?mirror=1"]
+                }
+                for quality, bandwidth in ((30280, 192000), (30216, 67000))
+            ]}}
+        else:
+            base_url = f"http://{self.headers['Host']}"
+            data = {"subtitle": {"subtitles": [
+                {
+                    "lan": track["lan"], "lan_doc": track["lan_doc"],
+                    "subtitle_url": f"{base_url}/bfs/subtitle/{bvid}-{track['lan']}.json"
+                }
+                for track in video["subtitles"]
+            ]}}
+        self._send_json(200, {"code": 0, "message": "0", "data": data})
+
+    def _bilibili_subtitle(self, name):
+        bvid, _, lan = name[:-len(".json")].partition("-")
+        video = self.state.videos.get(bvid, {"subtitles": []})
+        for track in video["subtitles"]:
+            if track["lan"] == lan:
+                self._send_json(200, {"font_size": 0.4, "body": track["body"]})
+                return
+        self._send_json(404, {"message": "not found"})
+
+    def _media(self, name):
+        """返回媒体文件，支持单个 Range: bytes=start-end 请求"""
+        self.state.delay()
+        data = self.state.media(name)
+        match = re.match(r"bytes=(\d+)-(\d*)$", self.headers.get("Range", ""))
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2) or len(data) - 1), len(data) - 1)
+            if start > end:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(data)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = data[start:end + 1]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        else:
+            body = data
+            self.send_response(200)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _tencent(self, action, params):
+        if self.state.throttled("tencent"):
+            self._send_json(200, {"Response": {"Error": {"Code": "RequestLimitExceeded", "Message": "请求频率超过限制"}}})
+            return
+
+        if action == "CreateRecTask":
+            task_id = next(self.state.task_ids)
+            words = _mock_words(base64.b64decode(params["Data"]))
+            # 任务在模拟延迟之后才会完成
+            self.state.tasks[task_id] = {"ready_at": time.time() + random.uniform(*self.state.latency), "words": words}
+            self._send_json(200, {"Response": {"Data": {"TaskId": task_id}, "RequestId": uuid.uuid4().hex}})
+        elif action == "DescribeTaskStatus":
+            task = self.state.tasks.get(params.get("TaskId"))
+            if task is None:
+                self._send_json(200, {"Response": {"Error": {"Code": "InvalidParameter", "Message": "任务不存在"}}})
+                return
+            if time.time() < task["ready_at"]:
+                self._send_json(200, {"Response": {"Data": {"Status": 1, "StatusStr": "doing"}}})
+                return
+
+            details = []
+            for i in range(0, len(task["words"]), 5):
+                group = task["words"][i:i + 5]
+                start = group[0][1]
+                details.append({
+                    "FinalSentence": "".join(w for w, _, _ in group),
+                    "StartMs": start,
+                    "EndMs": group[-1][2],
+                    "Words": [{"Word": w, "OffsetStartMs": s - start, "OffsetEndMs": e - start} for w, s, e in group]
+                })
+            self._send_json(200, {"Response": {"Data": {"Status": 2, "StatusStr": "success", "ResultDetail": details}}})
+        else:
+            self._send_json(200, {"Response": {"Error": {"Code": "InvalidAction", "Message": action}}})
+
+
+def start_mock_server(port=0, latency=(0.0, 0.0), qps=0):
+    """
+    在后台线程中启动模拟服务
+
+    Args:
+        port: 监听端口，0 表示自动分配
+        latency: 每个请求注入的延迟范围(秒)
+        qps: 每个厂商允许的QPS，0 表示不限流
+
+    Returns:
+        tuple: (服务器对象, 基础URL)
+    """
+    state = MockServerState(latency=latency, qps=qps)
+    handler_class = type("BoundMockHandler", (MockHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler_class)
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟服务")
+    parser.add_argument("--port", type=int, default=8900, help="监听端口")
+    parser.add_argument("--latency", type=float, nargs=2, default=[0.1, 0.3], metavar=("MIN", "MAX"),
+                        help="注入的请求延迟范围(秒)")
+    parser.add_argument("--qps", type=float, default=5, help="每个厂商的QPS上限，超过时返回限流错误")
+    args = parser.parse_args()
+
+    server, base_url = start_mock_server(args.port, latency=tuple(args.latency), qps=args.qps)
+    print(f"模拟服务已启动: {base_url}")
+    print(f"ALIYUN_META_URL = \"{base_url}/\"")
+    print(f"ALIYUN_GATEWAY_URL = \"{base_url}/stream/v1/FlashRecognizer\"")
+    print(f"TENCENT_ASR_ENDPOINT = \"{base_url}/\"")
+    print(f"BILIBILI_API_BASE = \"{base_url}\"")
+    print(f"模拟视频: {', '.join(server.state.videos)}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(f"\n统计: {server.state.stats}")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
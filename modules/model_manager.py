@@ -0,0 +1,145 @@
+import collections
+import contextlib
+import gc
+import threading
+
+from modules.resource_monitor import current_rss_mb
+
+
+class ModelManager:
+    """
+    进程内模型管理器，统一持有 Vosk 模型、纠错模型和分词词典等大对象
+
+    模型在首次使用时加载，加载前后的常驻内存差值作为该模型的近似内存占用。
+    总占用超过预算时按最近最少使用的顺序释放模型，下次使用时重新加载。
+    调用方不应长期持有模型对象，否则释放后内存无法真正回收
+    """
+
+    def __init__(self, budget_mb=0):
+        """
+        Args:
+            budget_mb: 模型内存预算(MB)，0 表示不限制
+        """
+        self.budget_mb = budget_mb
+        self._entries = collections.OrderedDict()  # key -> {"model", "memory_mb"}
+        self._sizes = {}                           # 历史测量的内存占用，用于加载前预留空间
+        self._pins = collections.Counter()
+        self._loading = {}                         # 正在加载的模型 -> threading.Event
+        self._lock = threading.RLock()
+
+    def get(self, key, loader):
+        """
+        获取模型，未加载时调用 loader 加载
+
+        加载在管理器的锁之外进行，一个线程加载纠错模型时，其他线程仍可获取或加载其他模型；
+        同一个模型正在加载时，其他线程等待该次加载完成，不会重复加载
+
+        Args:
+            key: 模型标识，如 ("vosk", 模型路径)
+            loader: 无参数的加载函数
+
+        Returns:
+            加载得到的模型对象
+        """
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    return entry["model"]
+
+                loading = self._loading.get(key)
+                if loading is None:
+                    loading = self._loading[key] = threading.Event()
+                    # 已知大小的模型在加载前先腾出空间，避免内存峰值
+                    self._evict_for(self._sizes.get(key, 0), keep=key)
+                    break
+            # 其他线程正在加载同一个模型，加载失败时由本线程重新加载
+            loading.wait()
+
+        try:
+            # 多个模型同时加载时，内存差值包含其他模型的增长，只是近似值
+            rss_before = current_rss_mb()
+            model = loader()
+            memory_mb = max(0.0, current_rss_mb() - rss_before)
+            with self._lock:
+                self._entries[key] = {"model": model, "memory_mb": memory_mb}
+                self._sizes[key] = memory_mb
+        finally:
+            with self._lock:
+                del self._loading[key]
+            loading.set()
+        print(f"模型已加载: {self._name(key)} (约 {memory_mb:.0f} MB)")
+
+        with self._lock:
+            self._evict_for(0, keep=key)
+        return model
+
+    @contextlib.contextmanager
+    def use(self, key, loader):
+        """获取模型并在 with 块内固定，期间不会被其他线程的加载挤出"""
+        # 先固定再加载，加载完成后到 with 块开始之间也不会被释放
+        with self._lock:
+            self._pins[key] += 1
+        try:
+            yield self.get(key, loader)
+        finally:
+            with self._lock:
+                self._pins[key] -= 1
+                if self._pins[key] <= 0:
+                    del self._pins[key]
+                self._evict_for(0)
+
+    def evict(self, key):
+        """释放指定模型"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None:
+            print(f"释放模型: {self._name(key)} (约 {entry['memory_mb']:.0f} MB)")
+            del entry
+            gc.collect()
+
+    def clear(self):
+        for key in list(self._entries):
+            self.evict(key)
+
+    def stats(self):
+        """返回当前已加载的模型及其内存占用(按最近使用排序)"""
+        with self._lock:
+            return [
+                {"key": self._name(key), "memory_mb": round(entry["memory_mb"], 1), "pinned": key in self._pins}
+                for key, entry in self._entries.items()
+            ]
+
+    @property
+    def total_mb(self):
+        with self._lock:
+            return sum(entry["memory_mb"] for entry in self._entries.values())
+
+    def _evict_for(self, incoming_mb, keep=None):
+        """按LRU顺序释放未固定的模型，直到总占用加上即将加载的模型不超过预算"""
+        if not self.budget_mb:
+            return
+        for key in list(self._entries):
+            if self.total_mb + incoming_mb <= self.budget_mb:
+                break
+            if key != keep and key not in self._pins:
+                self.evict(key)
+
+    @staticmethod
+    def _name(key):
+        return ":".join(str(part) for part in key) if isinstance(key, tuple) else str(key)
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_model_manager():
+    """获取进程内共享的模型管理器，预算取自 config.MODEL_MEMORY_BUDGET_MB"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            from config import MODEL_MEMORY_BUDGET_MB
+            _manager = ModelManager(MODEL_MEMORY_BUDGET_MB)
+        return _manager
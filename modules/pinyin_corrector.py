@@ -0,0 +1,184 @@
+import re
+
+from modules.tokenizer_cache import load_user_dict_entries
+
+# 模糊声母: 平翘舌、n/l、r/l、f/h 不分
+FUZZY_INITIALS = {"zh": "z", "ch": "c", "sh": "s", "n": "l", "r": "l", "f": "h"}
+# 模糊韵母: 前后鼻音不分
+FUZZY_FINALS = {"ang": "an", "eng": "en", "ing": "in", "iang": "ian", "uang": "uan"}
+_INITIALS = ("zh", "ch", "sh", "b", "p", "m", "f", "d", "t", "n", "l", "g", "k", "h",
+             "j", "q", "x", "r", "z", "c", "s", "y", "w")
+
+# 连续的汉字(中间允许有识别结果中的空格)
+_HAN_RUN = re.compile(r"[\u4e00-\u9fff](?:\s*[\u4e00-\u9fff])*")
+
+
+def fuzzy_syllable(syllable):
+    """不带声调的拼音音节转换为模糊音形式"""
+    initial = next((i for i in _INITIALS if syllable.startswith(i) and len(syllable) > len(i)), "")
+    final = syllable[len(initial):]
+    return FUZZY_INITIALS.get(initial, initial) + FUZZY_FINALS.get(final, final)
+
+
+# 单字的默认读音缓存
+_char_pinyin = {}
+
+
+def _word_syllables(word):
+    """词语按 pypinyin 词组读音(多音字结合上下文)得到的带声调拼音"""
+    from pypinyin import Style, lazy_pinyin
+
+    return lazy_pinyin(word, style=Style.TONE3, neutral_tone_with_five=True)
+
+
+def _char_syllables(chars):
+    """
+    逐字查表得到的带声调拼音
+
+    pypinyin 按词组判断多音字读音，每个字约需数十微秒，长文字稿的耗时主要在这里。
+    文字稿改为逐字查缓存的默认读音，词表中的词同时按词组读音和逐字读音建立索引，
+    多音字在两种读音下都能匹配
+    """
+    missing = set(chars) - _char_pinyin.keys()
+    if missing:
+        from pypinyin import Style, lazy_pinyin
+        for char in missing:
+            _char_pinyin[char] = lazy_pinyin(char, style=Style.TONE3, neutral_tone_with_five=True)[0]
+    return [_char_pinyin[char] for char in chars]
+
+
+def _toneless(syllables):
+    return [syllable.rstrip("012345") for syllable in syllables]
+
+
+class PinyinCorrector:
+    """
+    基于拼音索引的同音词纠错
+
+    将领域词表(人名、作品名、术语等)中的词按拼音建立索引，分为带声调、不带声调和模糊音
+    (平翘舌、n/l、前后鼻音等)三级。纠错时先计算文字稿的拼音序列，在每个位置按从长到短
+    查找与词表中的词读音相同的片段并替换，每个位置只做常数次哈希查找，耗时与文本长度
+    近似成正比。可以单独使用，也可以放在模型纠错之前先修正同音的专有名词
+
+    两个音节的同音词很多(如 公事/公式、戒指/介质)，短片段只有在原文不是常用词时才替换:
+    词表中词的词频需达到原片段在分词词典中词频的 short_freq_ratio 倍
+    """
+
+    def __init__(self, lexicon_paths=None, words=None, min_syllables=2, fuzzy_min_syllables=3,
+                 context_min_syllables=3, short_freq_ratio=1.0, word_freq=None, next_corrector=None):
+        """
+        Args:
+            lexicon_paths: 词表文件列表，格式与用户词典相同(每行: 词语 [词频] [词性])
+            words: 额外的词语列表
+            min_syllables: 不带声调匹配的最少音节数(带声调完全相同时不受限制，最少2个音节)
+            fuzzy_min_syllables: 模糊音匹配的最少音节数
+            context_min_syllables: 不检查原片段词频、直接替换的最少音节数
+            short_freq_ratio: 音节数较少时，词表中的词频至少为原片段词频的倍数
+            word_freq: 常用词词频表 {词语: 词频}，默认使用 jieba 分词词典
+            next_corrector: 拼音纠错之后继续使用的纠错器(如 TextCorrector)
+        """
+        self.min_syllables = min_syllables
+        self.fuzzy_min_syllables = fuzzy_min_syllables
+        self.context_min_syllables = context_min_syllables
+        self.short_freq_ratio = short_freq_ratio
+        self._word_freq = word_freq
+        self.next_corrector = next_corrector
+
+        entries = load_user_dict_entries(lexicon_paths) + [(word, None, None) for word in words or []]
+        # 三级索引: 拼音元组 -> [(词频, 词语, 带声调拼音)]
+        self._indexes = ({}, {}, {})
+        self.max_syllables = 0
+        self.size = 0
+        for word, freq, _ in entries:
+            if not _HAN_RUN.fullmatch(word) or len(word) < 2:
+                continue
+            readings = {tuple(_word_syllables(word)), tuple(_char_syllables(word))}
+            for toned in readings:
+                plain = _toneless(toned)
+                keys = (tuple(toned), tuple(plain), tuple(fuzzy_syllable(s) for s in plain))
+                for index, key in zip(self._indexes, keys):
+                    candidates = index.setdefault(key, [])
+                    if all(candidate[1] != word for candidate in candidates):
+                        candidates.append((freq or 1, word, toned))
+            self.max_syllables = max(self.max_syllables, len(word))
+            self.size += 1
+
+    @property
+    def word_freq(self):
+        if self._word_freq is None:
+            from modules.tokenizer_cache import get_tokenizer
+            self._word_freq = get_tokenizer()[0].FREQ
+        return self._word_freq
+
+    def correct(self, text):
+        """
+        纠正文本中与词表中的词同音的片段
+
+        Args:
+            text: 需要纠错的文本(可以包含识别结果中词之间的空格)
+
+        Returns:
+            str: 纠错后的文本
+        """
+        if not text or not self.size:
+            corrected = text
+        else:
+            corrected = _HAN_RUN.sub(lambda m: self._correct_run(m.group(0)), text)
+        if self.next_corrector is not None:
+            return self.next_corrector.correct(corrected)
+        return corrected
+
+    def _correct_run(self, run):
+        # 汉字及其之前的空白，替换时去掉词内部的空白
+        pieces = re.findall(r"\s*[\u4e00-\u9fff]", run)
+        chars = [piece[-1] for piece in pieces]
+        toned = _char_syllables(chars)
+        plain = _toneless(toned)
+        fuzzy = [fuzzy_syllable(s) for s in plain]
+
+        output = []
+        i = 0
+        n = len(chars)
+        while i < n:
+            match = self._match_at(i, chars, (toned, plain, fuzzy))
+            if match is None:
+                output.append(pieces[i])
+                i += 1
+                continue
+            length, word = match
+            original = "".join(chars[i:i + length])
+            if word != original:
+                print(f"拼音纠错: {original} → {word}")
+            output.append(pieces[i][:-1] + word)
+            i += length
+        return "".join(output)
+
+    def _match_at(self, i, chars, sequences):
+        """从位置 i 开始查找最长的同音词，返回 (音节数, 词语) 或 None"""
+        toned = sequences[0]
+        for length in range(min(self.max_syllables, len(chars) - i), 1, -1):
+            for level, (index, sequence) in enumerate(zip(self._indexes, sequences)):
+                if level == 1 and length < self.min_syllables:
+                    continue
+                if level == 2 and length < self.fuzzy_min_syllables:
+                    continue
+                candidates = index.get(tuple(sequence[i:i + length]))
+                if candidates:
+                    span = toned[i:i + length]
+                    # 优先选择声调相同音节最多、词频最高的词
+                    best = max(
+                        candidates,
+                        key=lambda c: (sum(a == b for a, b in zip(c[2], span)), c[0])
+                    )
+                    if length < self.context_min_syllables and not self._replaces_common_word(
+                            best, "".join(chars[i:i + length])):
+                        break
+                    return length, best[1]
+        return None
+
+    def _replaces_common_word(self, candidate, original):
+        """短片段是否可以替换: 原文就是该词，或原文词频低于词表中词频的 1/short_freq_ratio"""
+        freq, word, _ = candidate
+        if word == original:
+            return True
+        return freq >= self.short_freq_ratio * self.word_freq.get(original, 0)
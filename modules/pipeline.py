@@ -0,0 +1,580 @@
+import asyncio
+import itertools
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import config
+
+# 阶段之间传递的结束标记
+_STOP = object()
+
+
+def build_recognizer_kwargs(engine):
+    """根据识别引擎从配置中构建 SpeechRecognizer 参数"""
+    if engine == "vosk":
+        return {
+            "model_path": config.VOSK_MODEL_PATH,
+            "read_frames": config.VOSK_READ_FRAMES,
+            "workers": config.RECOGNITION_WORKERS
+        }
+    elif engine == "aliyun":
+        return {
+            "access_key": config.ALIYUN_ACCESS_KEY,
+            "access_secret": config.ALIYUN_ACCESS_SECRET,
+            "app_key": config.ALIYUN_APPKEY,
+            "gateway_url": config.ALIYUN_GATEWAY_URL,
+            "meta_url": config.ALIYUN_META_URL,
+            "qps": config.ALIYUN_ASR_QPS,
+            "max_concurrency": config.CLOUD_ASR_MAX_CONCURRENCY,
+            "chunk_seconds": config.CLOUD_ASR_CHUNK_SECONDS
+        }
+    elif engine == "tencent":
+        return {
+            "secret_id": config.TENCENT_SECRET_ID,
+            "secret_key": config.TENCENT_SECRET_KEY,
+            "endpoint": config.TENCENT_ASR_ENDPOINT,
+            "qps": config.TENCENT_ASR_QPS,
+            "poll_qps": config.TENCENT_POLL_QPS,
+            "poll_timeout": config.TENCENT_POLL_TIMEOUT,
+            "max_concurrency": config.CLOUD_ASR_MAX_CONCURRENCY,
+            "chunk_seconds": config.CLOUD_ASR_CHUNK_SECONDS
+        }
+    return {}
+
+
+def build_draft_recognizer():
+    """构建两级识别中生成草稿的小模型识别器，模型不存在时抛出 ValueError"""
+    from modules.speech_recognizer import SpeechRecognizer
+
+    return SpeechRecognizer(
+        "vosk",
+        model_path=config.DRAFT_MODEL_PATH,
+        read_frames=config.VOSK_READ_FRAMES,
+        workers=config.DRAFT_WORKERS or os.cpu_count() or 1
+    )
+
+
+def build_downloader(args):
+    """根据配置和命令行参数构建视频下载器"""
+    from modules.video_downloader import VideoDownloader
+
+    return VideoDownloader(
+        config.DOWNLOAD_DIR,
+        cookies_path=args.cookies,
+        api_base=config.BILIBILI_API_BASE,
+        native=config.DOWNLOAD_NATIVE,
+        max_connections=config.DOWNLOAD_CONNECTIONS,
+        chunk_size=config.DOWNLOAD_CHUNK_MB * 1024 * 1024
+    )
+
+
+def build_cue_options():
+    """根据配置构建字幕分条参数"""
+    return {
+        "max_gap": config.CUE_MAX_GAP,
+        "max_chars": config.CUE_MAX_CHARS,
+        "max_duration": config.CUE_MAX_DURATION
+    }
+
+
+def build_transcript_generator(args):
+    """根据配置和命令行参数构建文字稿生成器"""
+    from modules.transcript_generator import TranscriptGenerator
+
+    return TranscriptGenerator(
+        config.TRANSCRIPT_DIR,
+        user_dict_paths=args.user_dict,
+        punctuation_mode=args.punctuation,
+        pause_gaps={
+            "comma_gap": config.PAUSE_COMMA_GAP,
+            "period_gap": config.PAUSE_PERIOD_GAP,
+            "paragraph_gap": config.PAUSE_PARAGRAPH_GAP
+        },
+        text_processor=args.text_processor,
+        cue_options=build_cue_options()
+    )
+
+
+# 语音占比评估结果对应的处理优先级(数值越小越先识别)
+TRIAGE_PRIORITIES = {"transcribe": 0, "low_priority": 1, "skip": 2}
+
+
+def build_speech_triage():
+    """根据配置构建语音占比评估器"""
+    from modules.speech_triage import SpeechTriage
+
+    return SpeechTriage(
+        window_seconds=config.TRIAGE_WINDOW_SECONDS,
+        num_windows=config.TRIAGE_WINDOWS,
+        skip_ratio=config.TRIAGE_SKIP_RATIO,
+        low_priority_ratio=config.TRIAGE_LOW_PRIORITY_RATIO,
+        allow_skip=config.TRIAGE_ALLOW_SKIP
+    )
+
+
+def format_triage(triage):
+    """语音占比评估结果的说明文字"""
+    if triage["speech_ratio"] is None:
+        return f"音频过短，未评估语音占比，处理方式: {triage['decision']}"
+    return f"语音占比 {triage['speech_ratio']:.0%}，处理方式: {triage['decision']}"
+
+
+def job_priority(job):
+    """流水线中任务的识别优先级，语音占比低的任务排在后面"""
+    return TRIAGE_PRIORITIES.get(job.get("triage", {}).get("decision"), 0)
+
+
+def build_text_corrector(args):
+    """
+    根据配置和命令行参数构建文本纠错器
+
+    correction_model 为 pinyin 时只使用拼音索引纠错；其他模型在配置了拼音词表且
+    PINYIN_PRECORRECT 启用时，先用拼音索引修正同音的专有名词，再交给模型纠错。
+    拼音词表只使用 --pinyin-lexicon (默认 PINYIN_LEXICON_PATHS) 指定的词表，
+    不包含分词用的 --user-dict 和内置领域词典
+    """
+    lexicon_paths = list(args.pinyin_lexicon or [])
+    print(f"\n正在初始化文本纠错功能，使用模型: {args.correction_model}")
+
+    def pinyin_corrector(next_corrector=None):
+        from modules.pinyin_corrector import PinyinCorrector
+
+        corrector = PinyinCorrector(
+            lexicon_paths,
+            min_syllables=config.PINYIN_MIN_SYLLABLES,
+            fuzzy_min_syllables=config.PINYIN_FUZZY_MIN_SYLLABLES,
+            context_min_syllables=config.PINYIN_CONTEXT_MIN_SYLLABLES,
+            short_freq_ratio=config.PINYIN_SHORT_FREQ_RATIO,
+            next_corrector=next_corrector
+        )
+        print(f"拼音纠错词表共 {corrector.size} 个词")
+        return corrector
+
+    if args.correction_model == "pinyin":
+        if not lexicon_paths:
+            raise ValueError("拼音纠错需要词表，请配置 PINYIN_LEXICON_PATHS 或使用 --pinyin-lexicon")
+        return pinyin_corrector()
+
+    from modules.text_corrector import TextCorrector
+
+    corrector = TextCorrector(model_name=args.correction_model, max_length=config.CORRECTION_MAX_LENGTH)
+    if lexicon_paths and config.PINYIN_PRECORRECT:
+        return pinyin_corrector(next_corrector=corrector)
+    return corrector
+
+
+def correct_result(result, corrector, index):
+    """
+    对单段识别结果纠错，直接修改结果中的 text 字段
+
+    Args:
+        result: 单段语音识别结果
+        corrector: 纠错器实例(TextCorrector 或 PinyinCorrector)
+        index: 片段序号(从1开始，用于日志)
+    """
+    if 'text' in result and result['text'] is not None:
+        print(f"\n正在对第{index}段文本进行纠错...")
+        result['text'] = corrector.correct(result['text'])
+    else:
+        print(f"警告: 第{index}段文本识别结果为空，跳过纠错处理")
+        # 确保result['text']存在且不为None
+        result['text'] = ""
+
+
+def correct_results(recognition_results, corrector):
+    """
+    对识别结果逐段进行纠错，直接修改结果中的 text 字段
+
+    Args:
+        recognition_results: 语音识别结果列表
+        corrector: 纠错器实例(TextCorrector 或 PinyinCorrector)
+    """
+    for i, result in enumerate(recognition_results):
+        correct_result(result, corrector, i + 1)
+
+
+def filter_valid_results(recognition_results):
+    """
+    检查识别结果是否有效，无效的片段在有时间信息时替换为占位符
+
+    Args:
+        recognition_results: 语音识别结果列表
+
+    Returns:
+        list: 有效的识别结果列表
+    """
+    valid_results = []
+    for i, result in enumerate(recognition_results):
+        # 创建结果的副本，避免修改原始数据
+        valid_result = result.copy() if isinstance(result, dict) else {}
+
+        # 确保text字段存在且为有效字符串
+        if isinstance(result, dict) and 'text' in result and result['text'] is not None and isinstance(result['text'], str) and result['text'].strip() != "":
+            valid_result['text'] = result['text']
+            # 复制其他必要字段
+            if 'start' in result: valid_result['start'] = result['start']
+            if 'end' in result: valid_result['end'] = result['end']
+            valid_results.append(valid_result)
+        else:
+            print(f"警告: 第{i+1}段文本识别结果无效，将被跳过或替换为占位符")
+            # 如果有时间信息，添加占位符文本
+            if isinstance(result, dict) and 'start' in result and 'end' in result:
+                valid_result['text'] = "[无识别结果]"
+                valid_result['start'] = result['start']
+                valid_result['end'] = result['end']
+                valid_results.append(valid_result)
+    return valid_results
+
+
+class _PriorityJobQueue:
+    """按优先级取出任务的有界队列，接口与 asyncio.Queue 的 put/get 一致，结束标记总是排在最后"""
+
+    def __init__(self, maxsize, priority):
+        self._queue = asyncio.PriorityQueue(maxsize=maxsize)
+        self._priority = priority
+        self._counter = itertools.count()
+
+    async def put(self, job):
+        priority = float("inf") if job is _STOP else self._priority(job)
+        # 序号保证相同优先级按到达顺序取出，且不会比较 job 字典
+        await self._queue.put((priority, next(self._counter), job))
+
+    async def get(self):
+        return (await self._queue.get())[2]
+
+
+class Stage:
+    """流水线中的一个处理阶段"""
+
+    def __init__(self, name, func, concurrency=1, executor=None, queue_size=2, priority=None):
+        """
+        Args:
+            name: 阶段名称
+            func: 处理函数，接收 job 字典并返回 job 字典。
+                  协程函数直接在事件循环中执行(适合 you-get/ffmpeg 等子进程)，
+                  普通函数交给执行器执行(适合 Vosk/jieba/MacBERT 等CPU密集型任务)
+            concurrency: 该阶段同时处理的任务数上限
+            executor: 普通函数使用的执行器类型，"thread" 或 "process"。
+                      使用 "process" 时 func 必须是模块级函数以便序列化
+            queue_size: 该阶段输入队列的容量，队列满时上游阶段会阻塞(背压)
+            priority: 可选的优先级函数，接收 job 返回数值(越小越先处理)，
+                      设置后输入队列中的任务按优先级而不是到达顺序取出
+        """
+        self.name = name
+        self.func = func
+        self.concurrency = max(1, concurrency)
+        self.executor_type = executor
+        self.queue_size = max(1, queue_size)
+        self.priority = priority
+        self.executor = None
+
+    def make_queue(self):
+        if self.priority is None:
+            return asyncio.Queue(maxsize=self.queue_size)
+        return _PriorityJobQueue(self.queue_size, self.priority)
+
+    def open_executor(self):
+        if asyncio.iscoroutinefunction(self.func):
+            return
+        if self.executor_type == "process":
+            self.executor = ProcessPoolExecutor(max_workers=self.concurrency)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=self.concurrency,
+                                               thread_name_prefix=self.name)
+
+    def close_executor(self, cancel=False):
+        if self.executor is not None:
+            self.executor.shutdown(wait=not cancel, cancel_futures=cancel)
+            self.executor = None
+
+    async def run(self, job):
+        if asyncio.iscoroutinefunction(self.func):
+            return await self.func(job)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.func, job)
+
+
+class AsyncPipeline:
+    """
+    基于 asyncio 的流水线编排器
+
+    各阶段之间通过有界队列连接：下游处理较慢时队列被填满，上游阶段在放入任务时阻塞，
+    因此下载速度再快也不会在识别阶段之前堆积过多文件
+    """
+
+    def __init__(self, stages):
+        self.stages = stages
+        self._tasks = []
+        self.completed = []
+        self.failed = []
+
+    async def run(self, jobs):
+        """
+        运行流水线
+
+        Args:
+            jobs: 任务字典列表
+
+        Returns:
+            tuple: (完成的任务列表, 失败的任务列表)
+        """
+        queues = [stage.make_queue() for stage in self.stages]
+        for stage in self.stages:
+            stage.open_executor()
+
+        self._tasks = [asyncio.create_task(self._feed(jobs, queues[0], self.stages[0].concurrency))]
+        for i, stage in enumerate(self.stages):
+            output_queue = queues[i + 1] if i + 1 < len(queues) else None
+            next_concurrency = self.stages[i + 1].concurrency if output_queue is not None else 0
+            self._tasks.append(asyncio.create_task(
+                self._run_stage(stage, queues[i], output_queue, next_concurrency)
+            ))
+
+        cancelled = False
+        try:
+            await asyncio.gather(*self._tasks)
+        except asyncio.CancelledError:
+            cancelled = True
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            raise
+        finally:
+            for stage in self.stages:
+                stage.close_executor(cancel=cancelled)
+
+        return self.completed, self.failed
+
+    def cancel(self):
+        """取消所有阶段的任务，正在运行的子进程会被终止"""
+        for task in self._tasks:
+            task.cancel()
+
+    async def _feed(self, jobs, queue, consumer_count):
+        for job in jobs:
+            await queue.put(job)
+        for _ in range(consumer_count):
+            await queue.put(_STOP)
+
+    async def _run_stage(self, stage, input_queue, output_queue, next_concurrency):
+        workers = [
+            asyncio.create_task(self._worker(stage, input_queue, output_queue))
+            for _ in range(stage.concurrency)
+        ]
+        try:
+            await asyncio.gather(*workers)
+        except asyncio.CancelledError:
+            for worker in workers:
+                worker.cancel()
+            raise
+
+        # 本阶段全部结束后通知下游阶段
+        if output_queue is not None:
+            for _ in range(next_concurrency):
+                await output_queue.put(_STOP)
+
+    async def _worker(self, stage, input_queue, output_queue):
+        while True:
+            job = await input_queue.get()
+            if job is _STOP:
+                return
+
+            try:
+                job = await stage.run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[{stage.name}] 任务失败 {job.get('name', '')}: {e}")
+                job["error"] = str(e)
+                job["failed_stage"] = stage.name
+                self.failed.append(job)
+                continue
+
+            if output_queue is not None:
+                await output_queue.put(job)
+            else:
+                self.completed.append(job)
+
+
+# 每个识别进程缓存一个识别器，避免为每个任务重复加载模型
+_process_recognizer = None
+
+
+def recognize_job(job):
+    """识别阶段的处理函数(模块级函数，可在进程池中执行)"""
+    global _process_recognizer
+    from modules.speech_recognizer import SpeechRecognizer
+    from modules.chunk_merger import annotate_chunks, merge_chunks
+
+    if "recognition_results" in job:
+        # 已使用视频字幕
+        return job
+
+    video_id = job["video_id"]
+    deduplicator = None
+    if job.get("dedup"):
+        from modules.fingerprint import TranscriptDeduplicator
+        deduplicator = TranscriptDeduplicator(
+            config.FINGERPRINT_DIR,
+            threshold=config.FINGERPRINT_MATCH_THRESHOLD,
+            min_matches=config.FINGERPRINT_MIN_MATCHES,
+            min_coverage=config.FINGERPRINT_MIN_COVERAGE
+        )
+        reused_result = deduplicator.lookup(job["audio_path"], video_id)
+        if reused_result is not None:
+            job["recognition_results"] = [reused_result]
+            return job
+
+    engine = job["engine"]
+    if _process_recognizer is None or _process_recognizer.engine != engine:
+        _process_recognizer = SpeechRecognizer(engine, **build_recognizer_kwargs(engine))
+
+    results = annotate_chunks(
+        _process_recognizer.recognize_batch(job["audio_segments"]),
+        config.SEGMENT_LENGTH_MS, config.SEGMENT_OVERLAP_MS
+    )
+    job["recognition_results"] = merge_chunks(results)
+    if deduplicator is not None:
+        deduplicator.register(video_id, job["recognition_results"])
+    return job
+
+
+def build_video_pipeline(args):
+    """
+    构建处理B站视频的标准流水线: 下载 → 提取音频 → 语音占比评估 → 分割 → 识别 → 纠错 → 生成文字稿
+
+    视频已有可用字幕时在下载阶段直接得到识别结果，提取、分割和识别阶段原样传递该任务
+
+    Args:
+        args: main.py 解析得到的命令行参数
+
+    Returns:
+        AsyncPipeline: 流水线实例
+    """
+    from modules.audio_extractor import AudioExtractor
+
+    downloader = build_downloader(args)
+    extractor = AudioExtractor(
+        config.AUDIO_DIR,
+        sample_rate=config.AUDIO_SAMPLE_RATE,
+        channels=config.AUDIO_CHANNELS
+    )
+    shared = {}
+    if args.triage:
+        shared["triage"] = build_speech_triage()
+    queue_size = config.PIPELINE_QUEUE_SIZE
+
+    async def download(job):
+        # 音频、片段和文字稿都按视频ID命名，分P下载的文件名(如 <ID>[00].mp4)不作为任务标识
+        job["video_id"] = downloader.get_video_id(job["url"])
+        # 视频已有可用字幕时直接作为识别结果，后续的提取、分割、识别阶段会跳过该任务
+        if args.subtitles != "off":
+            try:
+                subtitle_results = await asyncio.to_thread(
+                    downloader.fetch_subtitles, job["url"],
+                    policy=args.subtitles, min_coverage=config.SUBTITLE_MIN_COVERAGE
+                )
+            except Exception as e:
+                print(f"查询视频字幕失败: {e}，将进行语音识别")
+                subtitle_results = None
+            if subtitle_results is not None:
+                job["recognition_results"] = subtitle_results
+                return job
+
+        job["video_path"] = await downloader.download_async(job["url"])
+        if not job["video_path"] or not os.path.exists(job["video_path"]):
+            raise ValueError("视频下载失败，请检查视频链接是否有效或尝试提供cookies文件")
+        return job
+
+    async def extract(job):
+        if "recognition_results" in job:
+            return job
+        job["audio_path"] = await extractor.extract_audio_async(job["video_path"], job["video_id"])
+        return job
+
+    def triage(job):
+        if "recognition_results" in job:
+            return job
+        job["triage"] = shared["triage"].analyze(job["audio_path"])
+        print(f"[{job['name']}] {format_triage(job['triage'])}")
+        if job["triage"]["decision"] == "skip":
+            # 几乎没有语音，跳过识别，只输出包含评估结果的文字稿
+            job["recognition_results"] = []
+        return job
+
+    def segment(job):
+        if "recognition_results" in job:
+            return job
+        job["audio_segments"] = extractor.segment_audio(
+            job["audio_path"],
+            segment_length_ms=config.SEGMENT_LENGTH_MS,
+            overlap_ms=config.SEGMENT_OVERLAP_MS,
+            video_id=job["video_id"]
+        )
+        return job
+
+    def correct(job):
+        if "corrector" not in shared:
+            try:
+                shared["corrector"] = build_text_corrector(args)
+            except Exception as e:
+                print(f"文本纠错初始化失败: {e}")
+                print("将继续处理，但不进行文本纠错")
+                shared["corrector"] = None
+        if shared["corrector"] is not None:
+            correct_results(job["recognition_results"], shared["corrector"])
+        return job
+
+    def generate(job):
+        if "generator" not in shared:
+            shared["generator"] = build_transcript_generator(args)
+        skipped = job.get("triage", {}).get("decision") == "skip"
+        valid_results = filter_valid_results(job["recognition_results"])
+        if not valid_results and not skipped:
+            raise ValueError("所有识别结果均无效，无法生成文字稿")
+        job["output_files"] = shared["generator"].generate(
+            valid_results,
+            job["video_id"],
+            formats=args.formats,
+            metadata={"triage": job["triage"]} if "triage" in job else None
+        )
+        return job
+
+    stages = [
+        Stage("download", download, concurrency=config.PIPELINE_DOWNLOAD_CONCURRENCY, queue_size=queue_size),
+        Stage("extract", extract, concurrency=config.PIPELINE_EXTRACT_CONCURRENCY, queue_size=queue_size),
+    ]
+    if args.triage:
+        stages.append(Stage("triage", triage, executor="thread", queue_size=queue_size))
+    # 语音占比低的任务在队列中排在正常任务之后。只有已在队列中等待的任务之间才能调整顺序，
+    # 第一个按优先级取出的阶段使用更大的队列，让上游提前处理更多任务以便延后低优先级任务
+    stages.extend([
+        Stage("segment", segment, executor="thread", queue_size=config.PIPELINE_PRIORITY_QUEUE_SIZE,
+              priority=job_priority),
+        Stage("recognize", recognize_job, concurrency=config.PIPELINE_RECOGNIZE_CONCURRENCY,
+              executor="process", queue_size=queue_size, priority=job_priority),
+    ])
+    if args.text_correction:
+        stages.append(Stage("correct", correct, executor="thread", queue_size=queue_size))
+    stages.append(Stage("generate", generate, executor="thread", queue_size=queue_size))
+
+    return AsyncPipeline(stages)
+
+
+def run_batch(urls, args):
+    """
+    使用异步流水线批量处理多个视频
+
+    Args:
+        urls: B站视频链接列表
+        args: main.py 解析得到的命令行参数
+
+    Returns:
+        tuple: (完成的任务列表, 失败的任务列表)
+    """
+    jobs = [
+        {"name": url, "url": url, "engine": args.engine, "dedup": args.dedup}
+        for url in urls
+    ]
+    pipeline = build_video_pipeline(args)
+    return asyncio.run(pipeline.run(jobs))
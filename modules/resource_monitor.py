@@ -0,0 +1,104 @@
+import os
+import sys
+import threading
+
+
+def current_rss_mb():
+    """当前进程的常驻内存(MB)，无法读取 /proc 时退化为峰值内存"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return peak_rss_mb()
+
+
+def available_cores():
+    """当前线程可以使用的CPU核编号列表"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def pin_current_thread(cores):
+    """
+    将当前线程绑定到指定的CPU核(仅 Linux 支持，其他平台忽略)，之后创建的线程继承该设置
+
+    Returns:
+        list: 绑定前可用的CPU核，用于恢复；不支持时返回 None
+    """
+    if not cores or not hasattr(os, "sched_setaffinity"):
+        return None
+    previous = available_cores()
+    try:
+        # Linux 上 pid 为 0 时只作用于调用线程
+        os.sched_setaffinity(0, cores)
+    except OSError as e:
+        print(f"警告: 无法绑定CPU核 {cores}: {e}")
+        return None
+    return previous
+
+
+def split_cores(reserved):
+    """
+    从当前可用的CPU核中划出 reserved 个核，至少给剩余部分留一个核
+
+    Returns:
+        tuple: (剩余的核, 划出的核)，只有一个核时两者相同
+    """
+    cores = available_cores()
+    if len(cores) < 2:
+        return cores, cores
+    reserved = min(max(1, reserved), len(cores) - 1)
+    return cores[:-reserved], cores[-reserved:]
+
+
+def peak_rss_mb():
+    """当前进程的峰值常驻内存(MB)"""
+    try:
+        import resource
+    except ImportError:
+        # Windows 上没有 resource 模块
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 上单位为字节，Linux 上为KB
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class MemorySampler:
+    """
+    在后台线程中定期采样常驻内存，记录 with 块执行期间的峰值
+
+    用法:
+        with MemorySampler() as sampler:
+            ...
+        print(sampler.peak_mb - sampler.start_mb)
+    """
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.start_mb = 0.0
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+    def __enter__(self):
+        self.start_mb = self.peak_mb = current_rss_mb()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, current_rss_mb())
+        return False
+
+    @property
+    def delta_mb(self):
+        """执行期间相对开始时的内存峰值增量"""
+        return self.peak_mb - self.start_mb
@@ -2,6 +2,17 @@ import json
 import os
 import wave
 
+from modules.model_manager import get_model_manager
+
+
+def get_vosk_model(model_path):
+    """通过模型管理器获取 Vosk 模型，在 with 块内使用"""
+    def load():
+        from vosk import Model
+        return Model(model_path)
+    return get_model_manager().use(("vosk", os.path.abspath(model_path)), load)
+
+
 class SpeechRecognizer:
     def __init__(self, engine="vosk", **kwargs):
         """
@@ -14,13 +25,15 @@ class SpeechRecognizer:
         self.engine = engine.lower()
         
         if self.engine == "vosk":
-            from vosk import Model, KaldiRecognizer
-            model_path = kwargs.get("model_path", "vosk-model-cn-0.22")
-            if not os.path.exists(model_path):
-                raise ValueError(f"Vosk模型不存在: {model_path}，请下载中文模型")
+            self.model_path = kwargs.get("model_path", "vosk-model-cn-0.22")
+            if not os.path.exists(self.model_path):
+                raise ValueError(f"Vosk模型不存在: {self.model_path}，请下载中文模型")
             
-            self.model = Model(model_path)
+            # 模型由模型管理器在首次识别时加载，内存不足时可被释放
             self.sample_rate = kwargs.get("sample_rate", 16000)
+            # 每次送入识别器的帧数，以及同时识别的片段数(各线程共享同一个模型)
+            self.read_frames = kwargs.get("read_frames", 4000)
+            self.workers = max(1, kwargs.get("workers", 1))
         
         elif self.engine == "aliyun":
             # 阿里云语音识别初始化
@@ -30,6 +43,12 @@ class SpeechRecognizer:
             
             if not all([self.access_key, self.access_secret, self.app_key]):
                 raise ValueError("使用阿里云语音识别需要提供access_key, access_secret和app_key")
+            
+            from modules.cloud_asr import AliyunASRClient
+            self.client = AliyunASRClient(
+                self.access_key, self.access_secret, self.app_key,
+                **self._client_kwargs(kwargs, ("gateway_url", "meta_url"))
+            )
         
         elif self.engine == "tencent":
             # 腾讯云语音识别初始化
@@ -38,10 +57,54 @@ class SpeechRecognizer:
             
             if not all([self.secret_id, self.secret_key]):
                 raise ValueError("使用腾讯云语音识别需要提供secret_id和secret_key")
+            
+            from modules.cloud_asr import TencentASRClient
+            self.client = TencentASRClient(
+                self.secret_id, self.secret_key,
+                **self._client_kwargs(kwargs, ("endpoint", "poll_interval", "poll_qps", "poll_timeout"))
+            )
         
         else:
             raise ValueError(f"不支持的语音识别引擎: {engine}")
     
+    def _client_kwargs(self, kwargs, extra_keys):
+        """从初始化参数中挑选云端识别客户端支持的参数"""
+        keys = ("qps", "max_concurrency", "chunk_seconds", "max_retries", "sample_rate") + extra_keys
+        return {key: kwargs[key] for key in keys if kwargs.get(key) is not None}
+    
+    def recognize_batch(self, audio_paths):
+        """
+        识别多个音频文件，云端引擎会并发提交所有片段
+        
+        Args:
+            audio_paths: 音频文件路径列表
+            
+        Returns:
+            list: 与输入顺序一致的识别结果列表
+        """
+        return list(self.recognize_iter(audio_paths))
+    
+    def recognize_iter(self, audio_paths):
+        """
+        按输入顺序逐个产出识别结果，调用方可以在后续片段识别的同时处理已完成的片段
+        
+        Args:
+            audio_paths: 音频文件路径列表
+            
+        Yields:
+            dict: 识别结果
+        """
+        if self.engine in ("aliyun", "tencent"):
+            yield from self.client.recognize_many(audio_paths)
+        elif self.workers > 1 and len(audio_paths) > 1:
+            # Vosk 识别时释放GIL，多个线程可以共享同一个模型并行识别
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="vosk") as executor:
+                yield from executor.map(self.recognize, audio_paths)
+        else:
+            for audio_path in audio_paths:
+                yield self.recognize(audio_path)
+    
     def recognize(self, audio_path):
         """
         识别音频文件中的语音
@@ -61,10 +124,31 @@ class SpeechRecognizer:
     
     def _recognize_with_vosk(self, audio_path):
         """使用Vosk进行离线语音识别"""
+        print(f"使用Vosk识别音频: {audio_path}")
+        with get_vosk_model(self.model_path) as model:
+            results = self._run_vosk(model, audio_path)
+        
+        # 整理结果
+        transcript = {
+            "text": " ".join([r.get("word", "") for r in results]),
+            "segments": [
+                {
+                    "text": r.get("word", ""),
+                    "start": r.get("start", 0),
+                    "end": r.get("end", 0),
+                    "conf": r.get("conf", 1.0)
+                }
+                for r in results
+            ]
+        }
+        
+        return transcript
+    
+    def _run_vosk(self, model, audio_path):
+        """逐块送入音频，返回词级识别结果列表"""
         from vosk import KaldiRecognizer
         
-        print(f"使用Vosk识别音频: {audio_path}")
-        recognizer = KaldiRecognizer(self.model, self.sample_rate)
+        recognizer = KaldiRecognizer(model, self.sample_rate)
         recognizer.SetWords(True)  # 启用词级时间戳
         
         results = []
@@ -76,7 +160,7 @@ class SpeechRecognizer:
             
             # 分块读取并识别
             while True:
-                data = wf.readframes(4000)  # 读取音频块
+                data = wf.readframes(self.read_frames)  # 读取音频块
                 if len(data) == 0:
                     break
                 
@@ -90,43 +174,14 @@ class SpeechRecognizer:
             if "result" in part_result:
                 results.extend(part_result["result"])
         
-        # 整理结果
-        transcript = {
-            "text": " ".join([r.get("word", "") for r in results]),
-            "segments": [
-                {
-                    "text": r.get("word", ""),
-                    "start": r.get("start", 0),
-                    "end": r.get("end", 0)
-                }
-                for r in results
-            ]
-        }
-        
-        return transcript
+        return results
     
     def _recognize_with_aliyun(self, audio_path):
-        """使用阿里云语音识别服务"""
-        # 这里是阿里云语音识别的示例代码
-        # 实际使用时需要安装阿里云SDK并完善此方法
+        """使用阿里云语音识别服务(录音文件识别极速版)"""
         print(f"使用阿里云识别音频: {audio_path}")
-        print("注意: 阿里云识别功能需要完善实现")
-        
-        # 示例返回结构
-        return {
-            "text": "阿里云语音识别结果将显示在这里",
-            "segments": []
-        }
+        return self.client.recognize_many([audio_path])[0]
     
     def _recognize_with_tencent(self, audio_path):
-        """使用腾讯云语音识别服务"""
-        # 这里是腾讯云语音识别的示例代码
-        # 实际使用时需要安装腾讯云SDK并完善此方法
+        """使用腾讯云语音识别服务(录音文件识别)"""
         print(f"使用腾讯云识别音频: {audio_path}")
-        print("注意: 腾讯云识别功能需要完善实现")
-        
-        # 示例返回结构
-        return {
-            "text": "腾讯云语音识别结果将显示在这里",
-            "segments": []
-        }
\ No newline at end of file
+        return self.client.recognize_many([audio_path])[0]
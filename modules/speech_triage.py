@@ -0,0 +1,116 @@
+import wave
+
+import numpy as np
+
+
+class SpeechTriage:
+    """
+    识别前的语音占比快速评估
+
+    从音频中均匀抽取若干窗口，按帧计算能量、过零率、频谱平坦度和语音频带能量占比，
+    再按窗口计算能量包络在音节节奏(2-8Hz)上的调制强度。纯音乐、无解说的游戏画面、
+    环境声的语音占比很低，可以降低处理优先级，或在启用 allow_skip 时直接跳过识别
+    """
+
+    def __init__(self, window_seconds=20, num_windows=6, frame_ms=30, skip_ratio=0.05,
+                 low_priority_ratio=0.2, allow_skip=False):
+        """
+        Args:
+            window_seconds: 每个抽样窗口的时长(秒)
+            num_windows: 抽样窗口数，短音频会全部分析
+            frame_ms: 帧长(毫秒)
+            skip_ratio: 语音占比低于该值时跳过识别(仅 allow_skip 时)
+            low_priority_ratio: 语音占比低于该值时降低识别优先级
+            allow_skip: 是否允许跳过识别。评估是启发式的，误判会得到空文字稿，
+                默认只降低优先级
+        """
+        self.window_seconds = window_seconds
+        self.num_windows = num_windows
+        self.frame_ms = frame_ms
+        self.skip_ratio = skip_ratio
+        self.low_priority_ratio = low_priority_ratio
+        self.allow_skip = allow_skip
+
+    def analyze(self, audio_path):
+        """
+        评估音频中的语音占比
+
+        Args:
+            audio_path: wav 文件路径(16bit PCM)
+
+        Returns:
+            dict: {speech_ratio, decision("skip"/"low_priority"/"transcribe"), duration, windows}，
+                音频太短、没有可评估的窗口时 speech_ratio 为 None，按正常识别处理
+        """
+        with wave.open(audio_path, "rb") as wf:
+            rate = wf.getframerate()
+            channels = wf.getnchannels()
+            total_frames = wf.getnframes()
+            window_frames = int(self.window_seconds * rate)
+
+            # 在整段音频上均匀选取窗口起点
+            if total_frames <= window_frames * self.num_windows:
+                starts = range(0, total_frames, window_frames)
+            else:
+                starts = np.linspace(0, total_frames - window_frames, self.num_windows).astype(int)
+
+            ratios = []
+            for start in starts:
+                wf.setpos(int(start))
+                samples = np.frombuffer(wf.readframes(window_frames), dtype=np.int16)
+                samples = samples.reshape(-1, channels).mean(axis=1) / 32768.0
+                ratio = self._window_speech_ratio(samples, rate)
+                if ratio is not None:
+                    ratios.append(ratio)
+
+        speech_ratio = float(np.mean(ratios)) if ratios else None
+        if speech_ratio is None:
+            decision = "transcribe"
+        elif speech_ratio < self.skip_ratio and self.allow_skip:
+            decision = "skip"
+        elif speech_ratio < self.low_priority_ratio:
+            decision = "low_priority"
+        else:
+            decision = "transcribe"
+
+        return {
+            "speech_ratio": round(speech_ratio, 3) if speech_ratio is not None else None,
+            "decision": decision,
+            "duration": round(total_frames / rate, 2),
+            "windows": len(ratios)
+        }
+
+    def _window_speech_ratio(self, samples, rate):
+        """单个窗口中类语音帧的比例，按包络调制强度加权"""
+        frame_len = int(rate * self.frame_ms / 1000)
+        n_frames = len(samples) // frame_len
+        if n_frames < 10:
+            return None
+        frames = samples[:n_frames * frame_len].reshape(n_frames, frame_len)
+
+        # 能量(dBFS)，阈值取窗口噪声底(第10百分位)以上 10dB，且不低于 -50dBFS
+        energy = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+        loud = energy > max(np.percentile(energy, 10) + 10, -50)
+
+        # 过零率: 清音/浊音交替的语音处于中等范围，白噪声很高
+        zcr = np.mean(np.abs(np.diff(np.signbit(frames), axis=1)), axis=1)
+
+        # 频谱平坦度和语音频带(80-4000Hz)能量占比
+        power = np.abs(np.fft.rfft(frames * np.hanning(frame_len), axis=1)) ** 2 + 1e-12
+        flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+        freqs = np.fft.rfftfreq(frame_len, 1 / rate)
+        band = (freqs >= 80) & (freqs <= 4000)
+        band_ratio = power[:, band].sum(axis=1) / power.sum(axis=1)
+
+        speech_like = loud & (zcr > 0.01) & (zcr < 0.35) & (flatness < 0.5) & (band_ratio > 0.5)
+
+        # 能量包络在 2-8Hz 的调制强度: 语音随音节起伏，音乐和环境声相对平稳
+        envelope = np.power(10, energy / 20)
+        envelope = envelope - envelope.mean()
+        spectrum = np.abs(np.fft.rfft(envelope)) ** 2
+        mod_freqs = np.fft.rfftfreq(n_frames, self.frame_ms / 1000)
+        syllabic = (mod_freqs >= 2) & (mod_freqs <= 8)
+        modulation = spectrum[syllabic].sum() / (spectrum[1:].sum() + 1e-12)
+
+        # 调制占比达到 0.3 视为明显的音节节奏
+        return float(speech_like.mean() * min(1.0, modulation / 0.3))
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import time
+
+from modules.artifact_index import ArtifactIndex, get_artifact_index
+
+
+def file_signature(path):
+    """大文件(视频、音频)的轻量签名: 路径、大小和修改时间"""
+    stat = os.stat(path)
+    return {"path": os.path.abspath(path), "size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+
+def file_digest(path):
+    """小文件(识别结果JSON、词典、源码)的内容哈希"""
+    sha = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def code_version(*module_names):
+    """根据 modules 目录下模块的源码计算版本号，代码或内置词典修改后相关阶段会重新计算"""
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    return "-".join(
+        file_digest(os.path.join(module_dir, f"{name}.py"))[:12] for name in module_names
+    )
+
+
+class StageTracker:
+    """
+    记录单个任务各处理阶段的输入摘要和产物
+
+    每个阶段的输入包括上游产物的哈希、相关配置值以及代码/词典版本。
+    重新处理时只有输入摘要发生变化(或产物丢失)的阶段需要重新计算。
+    每条记录的 seconds 为距上一次记录(或创建 tracker)经过的时间，即该阶段的耗时
+    """
+
+    def __init__(self, state_dir, job_id):
+        self.job_id = job_id
+        self.job_dir = os.path.join(ArtifactIndex.path_for(state_dir, job_id), job_id)
+        self.state_path = os.path.join(self.job_dir, "state.json")
+        os.makedirs(self.job_dir, exist_ok=True)
+
+        self._last_record = time.perf_counter()
+
+        self.state = {"job_id": job_id, "source": {}, "stages": {}}
+        if os.path.exists(self.state_path):
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+
+    @staticmethod
+    def digest(inputs):
+        return hashlib.sha1(json.dumps(inputs, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def artifact_path(self, name):
+        """任务产物(如识别结果JSON)的保存路径"""
+        return os.path.join(self.job_dir, name)
+
+    def set_source(self, **source):
+        """记录任务来源(视频链接或本地路径)，批量重新处理时使用"""
+        self.state["source"] = source
+        self._save()
+        get_artifact_index().register(self.job_id, "state", self.state_path)
+
+    def is_fresh(self, stage, inputs):
+        """
+        判断阶段是否可以跳过: 输入摘要与上次一致且产物文件都存在
+
+        Args:
+            stage: 阶段名称
+            inputs: 阶段输入字典
+
+        Returns:
+            bool: 是否可以复用上次的产物
+        """
+        record = self.state["stages"].get(stage)
+        if record is None or record["inputs_digest"] != self.digest(inputs):
+            return False
+        return all(os.path.exists(path) for path in record["files"])
+
+    def outputs(self, stage):
+        return self.state["stages"][stage]["outputs"]
+
+    def record(self, stage, inputs, outputs, files):
+        """
+        记录阶段完成后的输入摘要和产物
+
+        Args:
+            stage: 阶段名称
+            inputs: 阶段输入字典
+            outputs: 阶段产物字典(下次跳过该阶段时返回)
+            files: 产物文件路径列表，任一文件丢失时该阶段需要重新计算
+        """
+        now = time.perf_counter()
+        self.state["stages"][stage] = {
+            "inputs_digest": self.digest(inputs),
+            "inputs": inputs,
+            "outputs": outputs,
+            "files": list(files),
+            "updated_at": time.time(),
+            "seconds": round(now - self._last_record, 3)
+        }
+        self._last_record = now
+        self._save()
+
+    def stage_seconds(self):
+        """各阶段最近一次计算的耗时(秒)，没有记录耗时的阶段不包含在内"""
+        return {
+            stage: record["seconds"]
+            for stage, record in self.state["stages"].items() if "seconds" in record
+        }
+
+    def invalidate(self, stage):
+        """清除阶段记录，下次运行时该阶段必须重新计算(如产物文件已被草稿覆盖)"""
+        if self.state["stages"].pop(stage, None) is not None:
+            self._save()
+
+    def save_json(self, name, data):
+        """保存中间结果，返回 (路径, 内容哈希)"""
+        path = self.artifact_path(name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return path, file_digest(path)
+
+    def load_json(self, name):
+        with open(self.artifact_path(name), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save(self):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+
+def list_tracked_jobs(state_dir):
+    """从产物索引中列出状态目录下记录的全部任务ID"""
+    index = get_artifact_index()
+    root = os.path.abspath(state_dir) + os.sep
+    return [
+        job_id for job_id in index.jobs("state")
+        if (index.lookup(job_id, "state") or "").startswith(root)
+    ]
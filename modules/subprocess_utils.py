@@ -0,0 +1,27 @@
+import asyncio
+import subprocess
+
+
+async def run_command_async(command):
+    """
+    异步执行外部命令(如 you-get、ffmpeg)
+
+    任务被取消时会终止子进程，避免遗留后台进程
+
+    Args:
+        command: 命令参数列表
+
+    Raises:
+        subprocess.CalledProcessError: 命令返回非零状态码
+    """
+    process = await asyncio.create_subprocess_exec(*command)
+    try:
+        returncode = await process.wait()
+    except asyncio.CancelledError:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command)
@@ -0,0 +1,124 @@
+import re
+
+# 两个词之间需要空格: 两边都是字母或数字(英文单词、数字)
+_ASCII_WORD = re.compile(r"[0-9A-Za-z]")
+
+
+def join_words(words):
+    """拼接词序列，中文之间不加空格，相邻的英文单词或数字之间保留空格"""
+    text = ""
+    for word in words:
+        if text and _ASCII_WORD.match(text[-1]) and _ASCII_WORD.match(word[:1]):
+            text += " "
+        text += word
+    return text
+
+
+def build_cues(segments, max_gap=0.6, max_chars=20, max_duration=5.0):
+    """
+    将词级识别结果分组为字幕条
+
+    按时间顺序扫描一遍: 词间停顿超过 max_gap 时断开；加入下一个词会使当前字幕条的
+    字数超过 max_chars 或显示时间超过 max_duration 时，也在该词之前断开。
+    字数和时长都从每条字幕的第一个词开始计算，超过上限的单个词独占一条(不会被拆开)
+
+    Args:
+        segments: 词级结果列表，每项包含 text/start/end(秒)
+        max_gap: 断开字幕的最小停顿(秒)
+        max_chars: 每条字幕的最大字数
+        max_duration: 每条字幕的最长显示时间(秒)
+
+    Returns:
+        list: 字幕条列表，每项为 {"start": 毫秒, "end": 毫秒, "text": 文本}
+    """
+    segments = [segment for segment in segments if segment.get("text")]
+    if not segments:
+        return []
+
+    cues = []
+    current = [segments[0]]
+    chars = len(segments[0]["text"])
+    for previous, segment in zip(segments, segments[1:]):
+        chars += len(segment["text"])
+        if (segment["start"] - previous["end"] > max_gap
+                or chars > max_chars
+                or segment["end"] - current[0]["start"] > max_duration):
+            cues.append(_make_cue(current))
+            current = []
+            chars = len(segment["text"])
+        current.append(segment)
+    cues.append(_make_cue(current))
+    return cues
+
+
+def _make_cue(words):
+    start = round(words[0]["start"] * 1000)
+    end = max(round(words[-1]["end"] * 1000), start)
+    return {"start": int(start), "end": int(end), "text": join_words([word["text"] for word in words])}
+
+
+def format_timestamp(ms, separator=","):
+    """将毫秒数格式化为 HH:MM:SS,mmm (SRT) 或 HH:MM:SS.mmm (WebVTT)"""
+    hours, ms = divmod(ms, 3600000)
+    minutes, ms = divmod(ms, 60000)
+    seconds, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{ms:03d}"
+
+
+def format_ass_timestamp(ms):
+    """将毫秒数格式化为ASS时间格式 H:MM:SS.cc (百分之一秒)"""
+    hours, ms = divmod(ms, 3600000)
+    minutes, ms = divmod(ms, 60000)
+    seconds, ms = divmod(ms, 1000)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}.{ms // 10:02d}"
+
+
+def to_srt(cues):
+    """生成SRT字幕内容"""
+    return "".join(
+        f"{idx}\n{format_timestamp(cue['start'])} --> {format_timestamp(cue['end'])}\n{cue['text']}\n\n"
+        for idx, cue in enumerate(cues, 1)
+    )
+
+
+def to_vtt(cues):
+    """生成WebVTT字幕内容"""
+    body = "".join(
+        f"{format_timestamp(cue['start'], '.')} --> {format_timestamp(cue['end'], '.')}\n{cue['text']}\n\n"
+        for cue in cues
+    )
+    return "WEBVTT\n\n" + body
+
+
+ASS_HEADER = """[Script Info]
+ScriptType: v4.00+
+PlayResX: 1920
+PlayResY: 1080
+WrapStyle: 0
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,{font},{font_size},&H00FFFFFF,&H000000FF,&H00000000,&H80000000,0,0,0,0,100,100,0,0,1,2,1,2,20,20,40,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+
+def _ass_text(text):
+    """ASS 中 { } 用于样式标签，换行写作 \\N"""
+    return text.replace("{", "(").replace("}", ")").replace("\n", "\\N")
+
+
+def to_ass(cues, font="Microsoft YaHei", font_size=56):
+    """生成ASS字幕内容"""
+    events = "".join(
+        f"Dialogue: 0,{format_ass_timestamp(cue['start'])},{format_ass_timestamp(cue['end'])},"
+        f"Default,,0,0,0,,{_ass_text(cue['text'])}\n"
+        for cue in cues
+    )
+    return ASS_HEADER.format(font=font, font_size=font_size) + events
+
+
+# 字幕格式对应的生成函数
+WRITERS = {"srt": to_srt, "vtt": to_vtt, "ass": to_ass}
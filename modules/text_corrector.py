@@ -1,30 +1,41 @@
 import pycorrector
+from modules.model_manager import get_model_manager
 
 class TextCorrector:
-    def __init__(self, model_name='macbert'):
+    def __init__(self, model_name='macbert', max_length=128):
         """
         初始化文本纠错器
         
         Args:
             model_name (str): 使用的模型名称。默认为 'macbert'，推荐的模型 <mcreference link="https://github.com/shibing624/pycorrector?tab=readme-ov-file#usage" index="0">0</mcreference>。
                                 其他可选模型请参考 pycorrector 文档 <mcreference link="https://github.com/shibing624/pycorrector?tab=readme-ov-file#usage" index="0">0</mcreference>。
+            max_length (int): MacBERT 每次处理的最大长度，越长上下文越完整但速度越慢
         """
-        print(f"正在加载 pycorrector 模型: {model_name}...")
+        self.model_name = model_name
+        self.max_length = max_length
+        self.model_key = ("corrector", model_name)
+        # 模型由模型管理器持有，内存超出预算时可被释放，下次纠错时重新加载。
+        # 这里预先加载一次，模型不可用时在初始化阶段就报错
+        get_model_manager().get(self.model_key, self._load_corrector)
+    
+    def _load_corrector(self):
+        print(f"正在加载 pycorrector 模型: {self.model_name}...")
         # 根据选择的模型初始化，这里以默认的纠错方式为例
         # pycorrector 会自动下载所需的模型文件
         # 如果需要指定模型路径或使用其他模型，请参考 pycorrector 文档进行修改
         # 根据模型选择初始化对应的纠错器
-        if model_name == 'macbert':
+        if self.model_name == 'macbert':
             from pycorrector import MacBertCorrector
-            self.corrector = MacBertCorrector()
+            corrector = MacBertCorrector()
         else:
             # 默认或不支持的模型，可以考虑使用 KenlmCorrector 或抛出异常
             # 这里以 KenlmCorrector 为例，需要先 import
             from pycorrector import KenlmCorrector
-            print(f"模型 '{model_name}' 不支持或未指定，将使用 KenlmCorrector。")
-            self.corrector = KenlmCorrector()
+            print(f"模型 '{self.model_name}' 不支持或未指定，将使用 KenlmCorrector。")
+            corrector = KenlmCorrector()
         
         print("pycorrector 模型加载完成。")
+        return corrector
 
     def correct(self, text):
         """
@@ -37,8 +48,20 @@ class TextCorrector:
             str: 纠错后的文本
         """
         print("正在进行文本纠错...")
-        if isinstance(self.corrector, pycorrector.MacBertCorrector):
-            corrected_sent, details = self.corrector.correct(text, max_length=128)
+        with get_model_manager().use(self.model_key, self._load_corrector) as corrector:
+            corrected_sent, details = self._correct_with(corrector, text)
+
+        print("文本纠错完成。")
+        if details:
+             print(f"纠错详情: {details}")
+        else:
+             print("无详细纠错信息。")
+        return corrected_sent
+
+    def _correct_with(self, corrector, text):
+        """调用具体的纠错器，返回 (纠错后文本, 纠错详情)"""
+        if isinstance(corrector, pycorrector.MacBertCorrector):
+            corrected_sent, details = corrector.correct(text, max_length=self.max_length)
             
             if details:
                 for error in details:
@@ -47,27 +70,21 @@ class TextCorrector:
             # 对其他类型的 corrector 调用其 correct 方法
             # 注意：不同的 corrector 可能返回不同格式的结果，这里假设返回 (corrected_sent, detail)
             # KenlmCorrector 的 correct 方法只返回 corrected_sent
-            if isinstance(self.corrector, pycorrector.KenlmCorrector):
-                 corrected_sent = self.corrector.correct(text)
+            if isinstance(corrector, pycorrector.KenlmCorrector):
+                 corrected_sent = corrector.correct(text)
                  details = [] # Kenlm 没有详细的错误信息
             else:
                  # 对于未知的 corrector 类型，尝试调用，但可能出错
                  try:
-                     corrected_sent, details = self.corrector.correct(text)
+                     corrected_sent, details = corrector.correct(text)
                  except TypeError: # 处理返回值数量不匹配等问题
-                     corrected_sent = self.corrector.correct(text)
+                     corrected_sent = corrector.correct(text)
                      details = []
                  except Exception as e:
-                     print(f"调用 {type(self.corrector).__name__}.correct 时出错: {e}")
+                     print(f"调用 {type(corrector).__name__}.correct 时出错: {e}")
                      corrected_sent = text # 出错时返回原文
                      details = []
-
-        print("文本纠错完成。")
-        if details:
-             print(f"纠错详情: {details}")
-        else:
-             print("无详细纠错信息。")
-        return corrected_sent
+        return corrected_sent, details
 
 # 示例用法 (可以放在 main.py 或其他主流程文件中)
 if __name__ == '__main__':
@@ -1,13 +1,19 @@
+import argparse
+import json
+import os
 import re
-import jieba
-import jieba.posseg as pseg
+import subprocess
+import sys
+import threading
+import time
+from modules.tokenizer_cache import get_tokenizer
 
 class TextProcessor:
     """文本后处理器，用于改善语音识别结果的可读性"""
     
-    def __init__(self):
-        # 加载结巴分词词典
-        jieba.initialize()
+    def __init__(self, user_dict_paths=None):
+        # 获取进程内共享的分词器
+        self.tokenizer, self.pseg = get_tokenizer(user_dict_paths)
     
     def process(self, text):
         """处理文本，提高可读性
@@ -19,7 +25,7 @@ class TextProcessor:
             str: 处理后的文本
         """
         # 1. 分词和词性标注
-        words_with_pos = pseg.cut(text)
+        words_with_pos = self.pseg.cut(text)
         
         # 2. 添加标点符号
         punctuated_text = self._add_punctuation(words_with_pos)
@@ -116,16 +122,37 @@ class TextProcessor:
 
 
 class TextProcessorBase:
-    def process(self, text):
+    """
+    分词后端基类
+
+    cut 返回 (词, 词性) 列表，供 text_processor_improved.TextProcessor 添加标点和分段；
+    process 返回以空格分隔的分词结果
+    """
+    
+    def cut(self, text):
         raise NotImplementedError
+    
+    def process(self, text):
+        return ' '.join(word for word, _ in self.cut(text))
+
+class JiebaProcessor(TextProcessorBase):
+    def __init__(self, user_dict_paths=None):
+        self.user_dict_paths = user_dict_paths
+        # 预先加载分词器，词典由模型管理器持有，每次使用时重新获取
+        get_tokenizer(user_dict_paths)
+        
+    def cut(self, text):
+        # 进程内共享的分词器(已合并内置专有名词和用户词典)
+        _, pseg = get_tokenizer(self.user_dict_paths)
+        return [(pair.word, pair.flag) for pair in pseg.cut(text)]
 
 class SnowNLPProcessor(TextProcessorBase):
     def __init__(self):
         from snownlp import SnowNLP
+        self.snownlp = SnowNLP
         
-    def process(self, text):
-        s = SnowNLP(text)
-        return ' '.join([word for sentence in s.sentences for word in sentence])
+    def cut(self, text):
+        return list(self.snownlp(text).tags)
 
 class THULACProcessor(TextProcessorBase):
     def __init__(self):
@@ -133,6 +160,9 @@ class THULACProcessor(TextProcessorBase):
         from config import ProcessorConfig
         self.thulac = thulac.thulac(model_path=ProcessorConfig.THULAC_MODEL_PATH)
         
+    def cut(self, text):
+        return [(word, pos) for word, pos in self.thulac.cut(text)]
+    
     def process(self, text):
         return self.thulac.cut(text, text=True)
 
@@ -141,19 +171,167 @@ class HanLPProcessor(TextProcessorBase):
         from pyhanlp import HanLP
         from config import ProcessorConfig
         HanLP.Config.enableDebug = ProcessorConfig.HANLP_CONFIG['enable_custom_dict']
+        self.hanlp = HanLP
         
-    def process(self, text):
-        return ' '.join([term.word for term in HanLP.segment(text)])
+    def cut(self, text):
+        return [(term.word, str(term.nature)) for term in self.hanlp.segment(text)]
+
+
+PROCESSORS = {
+    'jieba': JiebaProcessor,
+    'snownlp': SnowNLPProcessor,
+    'thulac': THULACProcessor,
+    'hanlp': HanLPProcessor
+}
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_processor(name=None, **kwargs):
+    """
+    获取分词后端实例，首次使用时加载，之后在进程内复用
+    
+    Args:
+        name: 后端名称(jieba/snownlp/thulac/hanlp)，默认使用 config.TEXT_PROCESSOR
+        **kwargs: 后端初始化参数(如 jieba 的 user_dict_paths)
+        
+    Returns:
+        TextProcessorBase: 分词后端实例
+    """
+    if name is None:
+        from config import TEXT_PROCESSOR
+        name = TEXT_PROCESSOR
+    name = name.lower()
+    if name not in PROCESSORS:
+        raise ValueError(f"不支持的文本处理器: {name}，可选: {', '.join(PROCESSORS)}")
+    
+    key = (name, json.dumps(kwargs, sort_keys=True, default=str))
+    instance = _instances.get(key)
+    if instance is None:
+        with _instances_lock:
+            instance = _instances.get(key)
+            if instance is None:
+                instance = PROCESSORS[name](**kwargs)
+                _instances[key] = instance
+    return instance
 
 
-def get_processor():
-    from config import TEXT_PROCESSOR
+def load_corpus(paths):
+    """读取基准测试语料: txt 文件按全文读取，json 文件读取其中的 text 字段，目录会读取其中的全部 txt/json 文件"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.endswith((".txt", ".json"))
+            )
+        else:
+            files.append(path)
     
-    processors = {
-        'snownlp': SnowNLPProcessor,
-        'thulac': THULACProcessor,
-        'hanlp': HanLPProcessor,
-        'jieba': TextProcessor
+    texts = []
+    for path in files:
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith(".json"):
+                data = json.load(f)
+                text = data.get("text", "") if isinstance(data, dict) else ""
+            else:
+                text = f.read()
+        if text.strip():
+            texts.append(text)
+    return texts
+
+
+def measure_processor(name, texts):
+    """
+    在当前进程中测量单个后端: 加载耗时、加载后内存增量、处理速度
+    
+    处理速度按完整的后处理流程(分词、添加标点、分段)统计
+    """
+    from modules.resource_monitor import current_rss_mb, peak_rss_mb
+    from modules.text_processor_improved import TextProcessor as ImprovedTextProcessor
+    
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    processor = ImprovedTextProcessor(backend=name)
+    load_seconds = time.perf_counter() - start
+    rss_loaded = current_rss_mb()
+    
+    chars = sum(len(text) for text in texts)
+    start = time.perf_counter()
+    for text in texts:
+        processor.process(text)
+    process_seconds = time.perf_counter() - start
+    
+    return {
+        "processor": name,
+        "load_seconds": round(load_seconds, 3),
+        "chars": chars,
+        "chars_per_second": round(chars / process_seconds, 1) if process_seconds > 0 else None,
+        "load_memory_mb": round(rss_loaded - rss_before, 1),
+        "peak_memory_mb": round(peak_rss_mb(), 1)
     }
+
+
+def run_benchmark(corpus_paths, names=None):
+    """
+    对比各分词后端，每个后端在独立的子进程中测量，避免已加载的模型互相影响内存统计
+    
+    Args:
+        corpus_paths: 语料文件或目录列表
+        names: 参与对比的后端名称，默认全部
+        
+    Returns:
+        list: 各后端的测量结果，加载失败的后端包含 error 字段
+    """
+    names = names or list(PROCESSORS)
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     
-    return processors[TEXT_PROCESSOR.lower()]()
\ No newline at end of file
+    reports = []
+    for name in names:
+        print(f"正在测试文本处理器: {name}")
+        completed = subprocess.run(
+            [sys.executable, "-m", "modules.text_processor", "--measure", name] + list(corpus_paths),
+            cwd=package_dir, capture_output=True, text=True
+        )
+        lines = completed.stdout.strip().splitlines()
+        if completed.returncode != 0 or not lines:
+            error = (completed.stderr.strip().splitlines() or ["未知错误"])[-1]
+            reports.append({"processor": name, "error": error})
+        else:
+            reports.append(json.loads(lines[-1]))
+    return reports
+
+
+def print_benchmark(reports):
+    print(f"\n{'处理器':<10}{'加载耗时(秒)':>14}{'字符/秒':>12}{'加载内存(MB)':>14}{'峰值内存(MB)':>14}")
+    for report in reports:
+        if "error" in report:
+            print(f"{report['processor']:<10}  加载失败: {report['error']}")
+            continue
+        print(f"{report['processor']:<10}{report['load_seconds']:>14}{report['chars_per_second']:>12}"
+              f"{report['load_memory_mb']:>14}{report['peak_memory_mb']:>14}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比各文本处理器的速度和内存占用")
+    parser.add_argument("corpus", nargs="+", help="语料文件或目录(txt 或文字稿 json)")
+    parser.add_argument("--processors", nargs="+", choices=list(PROCESSORS), help="参与对比的处理器")
+    parser.add_argument("--measure", choices=list(PROCESSORS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    texts = load_corpus(args.corpus)
+    if args.measure:
+        # 子进程模式: 只测量一个后端，结果以JSON输出到最后一行
+        print(json.dumps(measure_processor(args.measure, texts), ensure_ascii=False))
+        return 0
+    
+    if not texts:
+        print("错误: 语料为空")
+        return 1
+    print_benchmark(run_benchmark(args.corpus, args.processors))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,25 +1,21 @@
 import re
-import jieba
-import jieba.posseg as pseg
+import numpy as np
+from modules.text_processor import get_processor
 
 class TextProcessor:
     """文本后处理器，用于改善语音识别结果的可读性"""
     
-    def __init__(self):
-        # 加载结巴分词词典
-        jieba.initialize()
-        # 添加自定义词典
-        self._add_custom_dict()
-    
-    def _add_custom_dict(self):
-        """添加自定义词典，提高分词准确性"""
-        # 添加常见的专有名词
-        custom_words = [
-            "江户川乱步", "人间椅子", "梅洛庞蒂", "知觉现象学",
-            "短篇小说", "推理小说", "哲学", "文学史"
-        ]
-        for word in custom_words:
-            jieba.add_word(word)
+    def __init__(self, user_dict_paths=None, backend="jieba"):
+        """
+        Args:
+            user_dict_paths: 用户词典文件列表(仅 jieba 后端使用)
+            backend: 分词后端，jieba/snownlp/thulac/hanlp
+        """
+        # 获取进程内共享的分词后端(jieba 已合并内置专有名词和用户词典)
+        if backend == "jieba":
+            self.segmenter = get_processor(backend, user_dict_paths=user_dict_paths)
+        else:
+            self.segmenter = get_processor(backend)
     
     def process(self, text):
         """处理文本，提高可读性
@@ -39,7 +35,7 @@ class TextProcessor:
         text = self._preprocess(text)
         
         # 2. 分词和词性标注
-        words_with_pos = pseg.cut(text)
+        words_with_pos = self.segmenter.cut(text)
         
         # 3. 添加标点符号
         punctuated_text = self._add_punctuation(words_with_pos)
@@ -49,6 +45,48 @@ class TextProcessor:
         
         return paragraphed_text
     
+    def process_segments(self, segments, comma_gap=0.3, period_gap=0.8, paragraph_gap=2.0):
+        """根据词级时间戳的停顿添加标点和分段，无需词性标注
+        
+        Args:
+            segments: 词级识别结果列表，每项包含 text/start/end
+            comma_gap: 词间停顿超过该值(秒)时添加逗号
+            period_gap: 词间停顿超过该值(秒)时添加句号
+            paragraph_gap: 词间停顿超过该值(秒)时另起段落
+            
+        Returns:
+            str: 处理后的文本
+        """
+        segments = [s for s in segments if s.get("text", "").strip()]
+        if not segments:
+            return ""
+        
+        words = [s["text"].strip() for s in segments]
+        starts = np.fromiter((s["start"] for s in segments), dtype=np.float64, count=len(segments))
+        ends = np.fromiter((s["end"] for s in segments), dtype=np.float64, count=len(segments))
+        
+        # 计算相邻词之间的停顿，并按阈值映射为分隔符等级
+        gaps = starts[1:] - ends[:-1]
+        levels = (gaps >= comma_gap).astype(np.int8) + (gaps >= period_gap) + (gaps >= paragraph_gap)
+        separators = np.array([' ', '，', '。', '。\n\n'], dtype=object)[levels]
+        
+        pieces = [None] * (len(words) * 2 - 1)
+        pieces[0::2] = words
+        pieces[1::2] = separators.tolist()
+        text = self.correct_common_errors(''.join(pieces))
+        
+        # 去掉中文字符和标点两侧多余的空格(保留英文单词之间的空格)
+        text = re.sub(r' *([，。]) *', r'\1', text)
+        text = re.sub(r'(?<=[\u4e00-\u9fff]) +| +(?=[\u4e00-\u9fff])', '', text)
+        
+        # 确保文本以句号结尾
+        if text and text[-1] not in ['。', '！', '？', '.', '!', '?']:
+            text = text.rstrip('，') + '。'
+        
+        # 长时间没有明显停顿的过长段落再按句子数量和长度细分
+        paragraphs = [p for p in text.split('\n\n') if p.strip()]
+        return '\n\n'.join(self._split_paragraphs(p) if len(p) > 150 else p for p in paragraphs)
+    
     def _preprocess(self, text):
         """预处理文本"""
         # 修正常见错误
@@ -0,0 +1,145 @@
+import hashlib
+import os
+import tempfile
+import threading
+
+import jieba
+import jieba.posseg
+
+from modules.model_manager import get_model_manager
+
+# 内置的常见专有名词，与用户词典一起合并进前缀词典
+BUILTIN_WORDS = [
+    "江户川乱步", "人间椅子", "梅洛庞蒂", "知觉现象学",
+    "短篇小说", "推理小说", "哲学", "文学史"
+]
+
+# 用户词典未指定词性时使用的默认词性(其他专名)
+DEFAULT_WORD_TAG = "nz"
+
+_lock = threading.Lock()
+_digests = {}
+
+
+def load_user_dict_entries(paths):
+    """
+    读取用户词典文件
+
+    文件格式与jieba用户词典一致，每行: 词语 [词频] [词性]，以#开头的行为注释
+
+    Args:
+        paths: 词典文件路径列表
+
+    Returns:
+        list: (词语, 词频或None, 词性或None) 元组列表
+    """
+    entries = []
+    for path in paths or []:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                parts = line.split()
+                word = parts[0]
+                freq = None
+                tag = None
+                if len(parts) > 1:
+                    if parts[1].isdigit():
+                        freq = int(parts[1])
+                        if len(parts) > 2:
+                            tag = parts[2]
+                    else:
+                        tag = parts[1]
+                entries.append((word, freq, tag))
+    return entries
+
+
+def _dict_digest(user_dict_paths):
+    """根据基础词典、内置词和用户词典内容计算哈希，用于缓存失效判断"""
+    key = tuple(os.path.abspath(p) for p in user_dict_paths)
+    if key in _digests:
+        return _digests[key]
+
+    sha = hashlib.sha1()
+    with jieba.get_dict_file() as f:
+        sha.update(f.read())
+    sha.update("\n".join(BUILTIN_WORDS).encode("utf-8"))
+    for path in user_dict_paths:
+        sha.update(b"\0")
+        with open(path, "rb") as f:
+            sha.update(f.read())
+
+    digest = sha.hexdigest()[:16]
+    _digests[key] = digest
+    return digest
+
+
+def _build_merged_dict(merged_path, user_dict_paths, cache_dir):
+    """将内置词和用户词典合并进jieba基础词典，生成新的词典文件"""
+    print(f"正在构建合并词典: {merged_path}")
+    base_entries = {}
+    with jieba.get_dict_file() as f:
+        for line in f:
+            parts = line.decode("utf-8").strip().split(" ")
+            if len(parts) >= 2:
+                base_entries[parts[0]] = [parts[1], parts[2] if len(parts) > 2 else DEFAULT_WORD_TAG]
+
+    # 未指定词频的词需要用基础词典计算建议词频，这里只在缓存未命中时执行
+    base_tokenizer = jieba.Tokenizer()
+    base_tokenizer.tmp_dir = cache_dir
+
+    custom_entries = [(word, None, None) for word in BUILTIN_WORDS]
+    custom_entries.extend(load_user_dict_entries(user_dict_paths))
+    for word, freq, tag in custom_entries:
+        if freq is None:
+            freq = base_tokenizer.suggest_freq(word, False)
+        if tag is None:
+            tag = base_entries.get(word, [None, DEFAULT_WORD_TAG])[1]
+        base_entries[word] = [str(freq), tag]
+
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        for word, (freq, tag) in base_entries.items():
+            f.write(f"{word} {freq} {tag}\n")
+    os.replace(tmp_path, merged_path)
+    print(f"合并词典构建完成，自定义词条 {len(custom_entries)} 个")
+
+
+def get_tokenizer(user_dict_paths=None, cache_dir=None):
+    """
+    获取已初始化的分词器，同一进程内按词典内容共享同一个实例(由模型管理器缓存)
+
+    合并后的词典和jieba的前缀词典缓存都以内容哈希命名，词典内容变化时自动重建
+
+    Args:
+        user_dict_paths: 用户词典文件路径列表
+        cache_dir: 缓存目录，默认使用 config.JIEBA_CACHE_DIR
+
+    Returns:
+        tuple: (jieba.Tokenizer, jieba.posseg.POSTokenizer)
+    """
+    if cache_dir is None:
+        from config import JIEBA_CACHE_DIR
+        cache_dir = JIEBA_CACHE_DIR
+    user_dict_paths = list(user_dict_paths or [])
+
+    with _lock:
+        digest = _dict_digest(user_dict_paths)
+    # 分词器由模型管理器持有，内存超出预算时可被释放，调用方不应长期保存返回值
+    return get_model_manager().get(
+        ("jieba", digest), lambda: _load_tokenizer(digest, user_dict_paths, cache_dir)
+    )
+
+
+def _load_tokenizer(digest, user_dict_paths, cache_dir):
+    os.makedirs(cache_dir, exist_ok=True)
+    merged_path = os.path.join(cache_dir, f"jieba_dict.{digest}.txt")
+    if not os.path.exists(merged_path):
+        _build_merged_dict(merged_path, user_dict_paths, cache_dir)
+
+    tokenizer = jieba.Tokenizer(merged_path)
+    tokenizer.tmp_dir = cache_dir
+    tokenizer.cache_file = f"jieba.{digest}.cache"
+    tokenizer.initialize()
+    return tokenizer, jieba.posseg.POSTokenizer(tokenizer)
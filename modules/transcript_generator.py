@@ -1,22 +1,141 @@
 import os
 import json
-from datetime import timedelta
+from modules.artifact_index import ArtifactIndex, get_artifact_index
+from modules.subtitle_cues import WRITERS, build_cues
 from modules.text_processor_improved import TextProcessor
 
+def write_atomic(path, content):
+    """先写入临时文件再替换，文字稿被更新(如草稿替换为最终结果)时读者不会读到写了一半的文件"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def align_text_to_segments(text, segments):
+    """
+    将纠错后的文本对应回词级结果，保留各词的时间戳
+
+    纠错只修改 text 字段，词级结果仍是识别出的原词。按字符对齐原词序列和纠错后的文本，
+    被替换的字归入原来所在的词，插入的字归入前一个词，被删除的字从词中去掉，
+    没有剩余字的词不再输出。这样 pause 标点方式和字幕也使用纠错后的文本
+
+    Args:
+        text: 纠错后的文本
+        segments: 识别得到的词级结果列表
+
+    Returns:
+        list: 词级结果列表，文本与纠错结果一致时返回原列表
+    """
+    from difflib import SequenceMatcher
+
+    original = "".join(segment["text"] for segment in segments).replace(" ", "")
+    corrected = "".join(text.split())
+    if not original or original == corrected:
+        return segments
+
+    # 原文本中每个字所属的词
+    owners = [i for i, segment in enumerate(segments) for char in segment["text"] if char != " "]
+    words = [""] * len(segments)
+    matcher = SequenceMatcher(None, original, corrected, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "delete":
+            continue
+        if tag == "insert":
+            # 插入: 整段归入前一个字所在的词，开头的插入归入第一个词
+            owner = owners[i1 - 1] if i1 > 0 else owners[0]
+            words[owner] += corrected[j1:j2]
+            continue
+        if i2 - i1 != j2 - j1:
+            # 长度变化的替换: 整段归入被替换的第一个字所在的词
+            words[owners[i1]] += corrected[j1:j2]
+            continue
+        for k in range(i2 - i1):
+            words[owners[i1 + k]] += corrected[j1 + k]
+
+    return [
+        dict(segment, text=word)
+        for segment, word in zip(segments, words) if word
+    ]
+
+
+def merge_results(recognition_results):
+    """
+    合并各片段的识别结果，词级时间戳换算为整段音频中的绝对时间
+    
+    Args:
+        recognition_results: 语音识别结果列表
+        
+    Returns:
+        tuple: (合并后的文本, 词级结果列表)
+    """
+    all_text = ""
+    all_segments = []
+    
+    for result in recognition_results:
+        # 确保 result 是字典并且包含 'text' 键，且值不为 None
+        if isinstance(result, dict) and 'text' in result and result["text"] is not None:
+            # 确保 text 是字符串类型
+            if isinstance(result["text"], str):
+                all_text += result["text"] + " "
+            else:
+                # 如果 text 不是字符串，可以选择跳过或记录日志
+                print(f"警告: 识别结果中的 'text' 字段不是字符串，已跳过: {result}")
+        else:
+            # 如果 result 格式不正确或 text 为 None，可以选择跳过或记录日志
+            print(f"警告: 无效的识别结果或 'text' 字段为 None，已跳过: {result}")
+
+        # 如果有分段信息，添加到总段落列表
+        if isinstance(result, dict) and "segments" in result and result["segments"]:
+            # 计算时间偏移：结果自带片段起始时间(offset)时直接使用，否则接在上一段之后
+            time_offset = 0
+            if "offset" in result:
+                time_offset = result["offset"]
+            elif all_segments:
+                time_offset = all_segments[-1]["end"]
+            
+            # 添加段落，并应用时间偏移(词级结果使用纠错后的文本)
+            segments = result["segments"]
+            if isinstance(result.get("text"), str):
+                segments = align_text_to_segments(result["text"], segments)
+            for segment in segments:
+                all_segments.append({
+                    "text": segment["text"],
+                    "start": segment["start"] + time_offset,
+                    "end": segment["end"] + time_offset
+                })
+    
+    return all_text, all_segments
+
+
 class TranscriptGenerator:
-    def __init__(self, output_dir):
+    def __init__(self, output_dir, user_dict_paths=None, punctuation_mode="pos", pause_gaps=None,
+                 text_processor="jieba", cue_options=None):
+        """
+        Args:
+            output_dir: 输出目录
+            user_dict_paths: 用户词典文件列表
+            punctuation_mode: 标点方式，"pos"(词性标注) 或 "pause"(词间停顿)
+            pause_gaps: pause 模式的阈值字典，包含 comma_gap/period_gap/paragraph_gap
+            text_processor: pos 模式使用的分词后端(jieba/snownlp/thulac/hanlp)
+            cue_options: 字幕分条参数字典，包含 max_gap/max_chars/max_duration
+        """
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
-        self.text_processor = TextProcessor()
+        self.text_processor = TextProcessor(user_dict_paths, backend=text_processor)
+        self.punctuation_mode = punctuation_mode
+        self.pause_gaps = pause_gaps or {}
+        self.cue_options = cue_options or {}
     
-    def generate(self, recognition_results, base_filename, formats=None):
+    def generate(self, recognition_results, base_filename, formats=None, metadata=None):
         """
         生成文字稿
         
         Args:
             recognition_results: 语音识别结果列表
             base_filename: 基础文件名(不含扩展名)
-            formats: 输出格式列表，支持 "txt", "srt", "json"
+            formats: 输出格式列表，支持 "txt", "srt", "vtt", "ass", "json"
+            metadata: 写入 json 输出的处理信息(如语音占比评估结果)
             
         Returns:
             dict: 生成的文件路径字典
@@ -25,36 +144,7 @@ class TranscriptGenerator:
             formats = ["txt", "srt"]
         
         # 合并所有识别结果
-        all_text = ""
-        all_segments = []
-        
-        for result in recognition_results:
-            # 确保 result 是字典并且包含 'text' 键，且值不为 None
-            if isinstance(result, dict) and 'text' in result and result["text"] is not None:
-                # 确保 text 是字符串类型
-                if isinstance(result["text"], str):
-                    all_text += result["text"] + " "
-                else:
-                    # 如果 text 不是字符串，可以选择跳过或记录日志
-                    print(f"警告: 识别结果中的 'text' 字段不是字符串，已跳过: {result}")
-            else:
-                # 如果 result 格式不正确或 text 为 None，可以选择跳过或记录日志
-                print(f"警告: 无效的识别结果或 'text' 字段为 None，已跳过: {result}")
-
-            # 如果有分段信息，添加到总段落列表
-            if isinstance(result, dict) and "segments" in result and result["segments"]:
-                # 计算时间偏移(如果需要)
-                time_offset = 0
-                if all_segments:
-                    time_offset = all_segments[-1]["end"]
-                
-                # 添加段落，并应用时间偏移
-                for segment in result["segments"]:
-                    all_segments.append({
-                        "text": segment["text"],
-                        "start": segment["start"] + time_offset,
-                        "end": segment["end"] + time_offset
-                    })
+        all_text, all_segments = merge_results(recognition_results)
         
         # 生成各种格式的文件
         output_files = {}
@@ -63,7 +153,14 @@ class TranscriptGenerator:
             # 处理文本以提高可读性
             processed_text = all_text.strip()
             # 只有在 processed_text 非空时才进行处理
-            if processed_text:
+            if processed_text and self.punctuation_mode == "pause" and all_segments:
+                try:
+                    # 根据词间停顿添加标点和分段
+                    processed_text = self.text_processor.process_segments(all_segments, **self.pause_gaps)
+                except Exception as e:
+                    print(f"文本处理时发生错误: {e}")
+                    processed_text = all_text.strip()
+            elif processed_text:
                 try:
                     # 修正常见错误
                     processed_text = self.text_processor.correct_common_errors(processed_text)
@@ -77,47 +174,34 @@ class TranscriptGenerator:
                 print("警告: 合并后的文本为空，无法生成 TXT 文件内容。")
                 processed_text = "" # 确保为空字符串
             
-            txt_path = os.path.join(self.output_dir, f"{base_filename}.txt")
-            with open(txt_path, "w", encoding="utf-8") as f:
-                f.write(processed_text)
+            txt_path = ArtifactIndex.ensure_path(self.output_dir, base_filename, f"{base_filename}.txt")
+            write_atomic(txt_path, processed_text)
             output_files["txt"] = txt_path
         
-        if "srt" in formats and all_segments:
-            srt_path = os.path.join(self.output_dir, f"{base_filename}.srt")
-            with open(srt_path, "w", encoding="utf-8") as f:
-                f.write(self._generate_srt(all_segments))
-            output_files["srt"] = srt_path
+        subtitle_formats = [fmt for fmt in formats if fmt in WRITERS]
+        if subtitle_formats and all_segments:
+            # 按停顿、字数和时长将词合并为字幕条，各字幕格式共用同一份字幕条
+            cues = build_cues(all_segments, **self.cue_options)
+            for fmt in subtitle_formats:
+                subtitle_path = ArtifactIndex.ensure_path(self.output_dir, base_filename, f"{base_filename}.{fmt}")
+                write_atomic(subtitle_path, WRITERS[fmt](cues))
+                output_files[fmt] = subtitle_path
         
         if "json" in formats:
-            json_path = os.path.join(self.output_dir, f"{base_filename}.json")
-            with open(json_path, "w", encoding="utf-8") as f:
-                json.dump({
-                    "text": all_text.strip(),
-                    "segments": all_segments
-                }, f, ensure_ascii=False, indent=2)
+            json_path = ArtifactIndex.ensure_path(self.output_dir, base_filename, f"{base_filename}.json")
+            data = {
+                "text": all_text.strip(),
+                "segments": all_segments
+            }
+            if metadata:
+                data["metadata"] = metadata
+            write_atomic(json_path, json.dumps(data, ensure_ascii=False, indent=2))
             output_files["json"] = json_path
         
-        return output_files
-    
-    def _generate_srt(self, segments):
-        """生成SRT格式字幕文件内容"""
-        srt_content = ""
+        # 草稿和最终结果写入同一组文件，索引中记录文字稿的状态
+        state = "draft" if metadata and metadata.get("draft") else "done"
+        index = get_artifact_index()
+        for fmt, path in output_files.items():
+            index.register(base_filename, f"transcript_{fmt}", path, state=state)
         
-        for idx, segment in enumerate(segments, 1):
-            start_time = self._format_time(segment["start"])
-            end_time = self._format_time(segment["end"])
-            
-            srt_content += f"{idx}\n"
-            srt_content += f"{start_time} --> {end_time}\n"
-            srt_content += f"{segment['text']}\n\n"
-        
-        return srt_content
-    
-    def _format_time(self, seconds):
-        """将秒数格式化为SRT时间格式 (HH:MM:SS,mmm)"""
-        td = timedelta(seconds=seconds)
-        hours, remainder = divmod(td.seconds, 3600)
-        minutes, seconds = divmod(remainder, 60)
-        milliseconds = int(td.microseconds / 1000)
-        
-        return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
\ No newline at end of file
+        return output_files
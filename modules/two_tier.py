@@ -0,0 +1,89 @@
+from modules.chunk_merger import ChunkMerger, annotate_chunks, merge_chunks
+
+
+def chunk_confidence(result):
+    """片段中各词置信度(Vosk 的 conf)按时长加权的平均值，没有词时返回 0"""
+    segments = (result or {}).get("segments") or []
+    total = sum(max(segment["end"] - segment["start"], 0.01) for segment in segments)
+    if not total:
+        return 0.0
+    return sum(
+        segment.get("conf", 1.0) * max(segment["end"] - segment["start"], 0.01) for segment in segments
+    ) / total
+
+
+class TwoTierRecognizer:
+    """
+    两级识别: 先用小模型快速生成草稿，再用大模型修订
+
+    小模型(如 vosk-model-small-cn-0.22)速度快、内存小，可以多线程并行识别全部片段，
+    草稿完成后立即通过回调发布。之后用大模型重新识别全部片段，或只识别草稿平均置信度
+    低于阈值的片段，其余片段沿用草稿结果。修订结果按片段顺序逐个合并，每个片段确定边界后
+    立即输出，调用方可以同时进行纠错
+    """
+
+    def __init__(self, draft_recognizer, full_recognizer, refine="low_confidence", min_confidence=0.9):
+        """
+        Args:
+            draft_recognizer: 使用小模型的 SpeechRecognizer
+            full_recognizer: 使用大模型的 SpeechRecognizer
+            refine: 修订范围，"all"(全部片段) 或 "low_confidence"(仅低置信度片段)
+            min_confidence: low_confidence 模式下不需要修订的最低平均置信度
+        """
+        self.draft_recognizer = draft_recognizer
+        self.full_recognizer = full_recognizer
+        self.refine = refine
+        self.min_confidence = min_confidence
+
+    def iter_results(self, audio_segments, segment_length_ms, overlap_ms=0, on_draft=None):
+        """
+        识别全部片段，按顺序逐个返回确定边界后的最终结果
+
+        Args:
+            audio_segments: AudioExtractor.segment_audio 切分的片段路径列表
+            segment_length_ms: 切片步长(毫秒)
+            overlap_ms: 切片重叠长度(毫秒)
+            on_draft: 草稿完成后调用的函数，参数为合并后的草稿识别结果
+
+        Yields:
+            dict: 合并重叠部分后的识别结果，大模型修订的片段下标记录在 refined_indexes 中
+        """
+        print(f"正在使用小模型生成草稿，共 {len(audio_segments)} 个片段")
+        chunks = annotate_chunks(
+            self.draft_recognizer.recognize_batch(audio_segments), segment_length_ms, overlap_ms
+        )
+        if on_draft is not None:
+            on_draft(merge_chunks(chunks))
+
+        if self.refine == "all":
+            indexes = list(range(len(chunks)))
+        else:
+            indexes = [i for i, chunk in enumerate(chunks) if chunk_confidence(chunk) < self.min_confidence]
+        print(f"草稿完成，使用大模型修订 {len(indexes)}/{len(chunks)} 个片段")
+
+        self.refined_indexes = indexes
+
+        # 修订结果按片段顺序到达，未修订的片段直接使用草稿
+        refined = self.full_recognizer.recognize_iter([audio_segments[i] for i in indexes])
+        refine_set = set(indexes)
+        merger = ChunkMerger()
+        for i, draft in enumerate(chunks):
+            result = next(refined) if i in refine_set else draft
+            result["offset"] = i * segment_length_ms / 1000
+            result["overlap"] = overlap_ms / 1000
+            merged = merger.add(result)
+            if merged is not None:
+                yield merged
+        merged = merger.finish()
+        if merged is not None:
+            yield merged
+
+    def run(self, audio_segments, segment_length_ms, overlap_ms=0, on_draft=None):
+        """
+        识别全部片段
+
+        Returns:
+            tuple: (合并后的最终识别结果, 大模型修订的片段下标列表)，参数见 iter_results
+        """
+        results = list(self.iter_results(audio_segments, segment_length_ms, overlap_ms, on_draft))
+        return results, self.refined_indexes
@@ -1,15 +1,177 @@
 import os
 import subprocess
 import re
-import sys
-from urllib.parse import urlparse
+import json
+import urllib.request
+from http.cookiejar import MozillaCookieJar
+from urllib.parse import urlparse, urljoin, parse_qs, urlencode
+
+from modules.artifact_index import ArtifactIndex, get_artifact_index
+
+# 请求B站接口时使用的请求头
+API_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+    "Referer": "https://www.bilibili.com/"
+}
 
 class VideoDownloader:
-    def __init__(self, output_dir, cookies_path=None):
+    def __init__(self, output_dir, cookies_path=None, api_base="https://api.bilibili.com",
+                 native=True, max_connections=8, chunk_size=4 * 1024 * 1024):
+        """
+        Args:
+            output_dir: 下载目录，文件按视频ID分片存放在其子目录中
+            cookies_path: cookies文件路径
+            api_base: B站接口地址
+            native: 是否优先使用内置的分段下载器下载音频流，失败时再使用 you-get
+            max_connections: 分段下载的并发连接数
+            chunk_size: 分段大小(字节)
+        """
         self.output_dir = output_dir
         self.cookies_path = cookies_path
+        self.api_base = api_base.rstrip("/")
+        self.native = native
+        self.max_connections = max_connections
+        self.chunk_size = chunk_size
         os.makedirs(output_dir, exist_ok=True)
     
+    def fetch_subtitles(self, url, policy="creator", min_coverage=0.5):
+        """
+        查询视频已有的字幕(UP主上传的CC字幕或B站AI字幕)，可用时直接转换为识别结果，跳过下载和语音识别
+        
+        Args:
+            url: B站视频链接
+            policy: 字幕使用策略，"creator" 只使用UP主上传的字幕，"any" 也接受AI字幕，"off" 不使用
+            min_coverage: 字幕覆盖的时长占视频时长的最低比例，低于该值时认为字幕不完整
+            
+        Returns:
+            list: 识别结果列表(与 SpeechRecognizer.recognize 的结构一致)，没有可用字幕时返回 None
+        """
+        if policy == "off":
+            return None
+        
+        params, view, page = self._get_page_info(url)
+        player = self._get_json("/x/player/v2", dict(params, cid=page["cid"]))
+        tracks = (player.get("subtitle") or {}).get("subtitles") or []
+        track = self._choose_subtitle_track(tracks, policy)
+        if track is None:
+            print("视频没有可用的字幕，将进行语音识别")
+            return None
+        
+        subtitle_url = urljoin("https:", track["subtitle_url"]) if track["subtitle_url"].startswith("//") \
+            else track["subtitle_url"]
+        body = self._get_json(subtitle_url, raw=True).get("body") or []
+        
+        segments = [
+            {"text": item["content"].strip(), "start": float(item["from"]), "end": float(item["to"])}
+            for item in body if item.get("content", "").strip()
+        ]
+        covered = sum(segment["end"] - segment["start"] for segment in segments)
+        duration = page.get("duration") or view.get("duration") or 0
+        if not segments or (duration and covered / duration < min_coverage):
+            print(f"字幕 {track['lan_doc']} 覆盖时长不足({covered:.0f}/{duration} 秒)，将进行语音识别")
+            return None
+        
+        print(f"使用视频已有字幕: {track['lan_doc']}，共 {len(segments)} 条，跳过下载和语音识别")
+        return [{
+            "text": " ".join(segment["text"] for segment in segments),
+            "segments": segments,
+            "offset": 0,
+            "source": "subtitle",
+            "subtitle_lan": track["lan"]
+        }]
+    
+    def _get_page_info(self, url):
+        """查询视频信息，返回 (接口参数, 视频信息, 链接对应的分P信息)"""
+        video_id = self._extract_video_id(url)
+        params = {"bvid": video_id} if video_id.startswith("BV") else {"aid": video_id[2:]}
+        view = self._get_json("/x/web-interface/view", params)
+        
+        # 分P视频按链接中的 p 参数选择对应的分P
+        page = int(parse_qs(urlparse(url).query).get("p", ["1"])[0])
+        pages = view.get("pages") or [{"cid": view["cid"], "duration": view.get("duration", 0)}]
+        return params, view, pages[min(max(page, 1), len(pages)) - 1]
+    
+    def resolve_audio_stream(self, url):
+        """
+        获取视频的DASH音频流地址，转写只需要音频，选择码率最低的音轨
+        
+        Returns:
+            list: 主地址和备用地址列表
+        """
+        params, _, page = self._get_page_info(url)
+        play = self._get_json("/x/player/playurl", dict(params, cid=page["cid"], fnval=16, fourk=0))
+        audios = (play.get("dash") or {}).get("audio") or []
+        if not audios:
+            raise ValueError("视频没有可用的DASH音频流")
+        audio = min(audios, key=lambda a: a.get("bandwidth", 0))
+        main_url = audio.get("baseUrl") or audio.get("base_url")
+        backup_urls = audio.get("backupUrl") or audio.get("backup_url") or []
+        return [main_url] + list(backup_urls)
+    
+    def download_native(self, url):
+        """
+        使用内置的多连接分段下载器下载音频流，支持断点续传
+        
+        Args:
+            url: B站视频链接
+            
+        Returns:
+            str: 下载的音频文件路径
+        """
+        from modules.http_downloader import RangedDownloader
+        
+        video_id = self._extract_video_id(url)
+        output_path = ArtifactIndex.ensure_path(self.output_dir, video_id, f"{video_id}.m4a")
+        if os.path.exists(output_path):
+            get_artifact_index().register(video_id, "video", output_path)
+            return output_path
+        
+        stream_urls = self.resolve_audio_stream(url)
+        print(f"正在分段下载音频流: {video_id}")
+        downloader = RangedDownloader(
+            max_connections=self.max_connections,
+            chunk_size=self.chunk_size,
+            headers=API_HEADERS
+        )
+        try:
+            downloader.download(stream_urls, output_path)
+        finally:
+            downloader.close()
+        get_artifact_index().register(video_id, "video", output_path)
+        return output_path
+    
+    def _choose_subtitle_track(self, tracks, policy):
+        """选择字幕轨道: 优先UP主上传的中文字幕，策略允许时再选择AI生成的中文字幕"""
+        creator = [t for t in tracks if t.get("subtitle_url") and not t["lan"].startswith("ai-")]
+        generated = [t for t in tracks if t.get("subtitle_url") and t["lan"].startswith("ai-")]
+        candidates = creator + (generated if policy == "any" else [])
+        for track in candidates:
+            if "zh" in track["lan"]:
+                return track
+        return None
+    
+    def _get_json(self, path, params=None, raw=False):
+        """请求B站接口，返回 data 字段(raw=True 时返回完整响应)"""
+        url = path if raw else f"{self.api_base}{path}?{urlencode(params or {})}"
+        opener = urllib.request.build_opener()
+        if self.cookies_path and os.path.exists(self.cookies_path):
+            try:
+                cookies = MozillaCookieJar(self.cookies_path)
+                cookies.load(ignore_discard=True, ignore_expires=True)
+                opener.add_handler(urllib.request.HTTPCookieProcessor(cookies))
+            except Exception:
+                # 非 Netscape 格式的cookies文件只供 you-get 使用
+                pass
+        request = urllib.request.Request(url, headers=API_HEADERS)
+        with opener.open(request, timeout=10) as response:
+            data = json.loads(response.read().decode("utf-8"))
+        if raw:
+            return data
+        if data.get("code") != 0:
+            raise ValueError(f"B站接口返回错误: {data.get('message')}")
+        return data["data"]
+    
     def download(self, url):
         """
         下载B站视频
@@ -20,19 +182,102 @@ class VideoDownloader:
         Returns:
             str: 下载的视频文件路径
         """
+        video_id, output_path, download_strategies = self._prepare_download(url)
+        
+        cached_path = get_artifact_index().lookup(video_id, "video")
+        if cached_path:
+            print(f"视频已下载: {cached_path}")
+            return cached_path
+        
+        if self.native:
+            try:
+                return self.download_native(url)
+            except Exception as e:
+                print(f"内置下载器下载失败: {e}，改用 you-get 下载")
+        
+        last_error = None
+        for strategy in download_strategies:
+            try:
+                # 使用当前策略下载视频
+                print(f"正在尝试下载策略: {strategy['description']}")
+                subprocess.run(strategy["command"], check=True)
+                
+                found_path = self._find_downloaded_file(video_id, output_path)
+                if found_path:
+                    print(f"视频下载完成: {found_path}")
+                    return found_path
+                    
+            except subprocess.CalledProcessError as e:
+                print(f"下载策略 '{strategy['description']}' 失败: {e}")
+                last_error = e
+                continue  # 尝试下一个策略
+        
+        self._print_failure_help(video_id)
+        if last_error:
+            raise last_error
+    
+    async def download_async(self, url):
+        """
+        异步下载B站视频，供流水线编排器使用
+        
+        Args:
+            url: B站视频链接
+            
+        Returns:
+            str: 下载的视频文件路径
+        """
+        import asyncio
+        from modules.subprocess_utils import run_command_async
+        
+        video_id, output_path, download_strategies = self._prepare_download(url)
+        
+        cached_path = get_artifact_index().lookup(video_id, "video")
+        if cached_path:
+            print(f"视频已下载: {cached_path}")
+            return cached_path
+        
+        if self.native:
+            try:
+                return await asyncio.to_thread(self.download_native, url)
+            except Exception as e:
+                print(f"内置下载器下载失败: {e}，改用 you-get 下载")
+        
+        last_error = None
+        for strategy in download_strategies:
+            try:
+                print(f"正在尝试下载策略: {strategy['description']}")
+                await run_command_async(strategy["command"])
+                
+                found_path = self._find_downloaded_file(video_id, output_path)
+                if found_path:
+                    print(f"视频下载完成: {found_path}")
+                    return found_path
+                    
+            except subprocess.CalledProcessError as e:
+                print(f"下载策略 '{strategy['description']}' 失败: {e}")
+                last_error = e
+                continue
+        
+        self._print_failure_help(video_id)
+        if last_error:
+            raise last_error
+    
+    def _prepare_download(self, url):
+        """验证URL并构建下载策略列表"""
         # 验证URL格式
         if not self._validate_bilibili_url(url):
             raise ValueError("无效的B站视频链接")
         
-        # 提取视频ID用于文件命名
+        # 提取视频ID用于文件命名，文件保存在视频ID对应的分片目录中
         video_id = self._extract_video_id(url)
-        output_path = os.path.join(self.output_dir, f"{video_id}.mp4")
+        video_dir = ArtifactIndex.ensure_path(self.output_dir, video_id)
+        output_path = os.path.join(video_dir, f"{video_id}.mp4")
         
         # 构建下载策略列表
         download_strategies = []
         
         # 基础命令
-        base_command = ["you-get", "-o", self.output_dir, "-O", video_id]
+        base_command = ["you-get", "-o", video_dir, "-O", video_id]
         
         # 如果有cookies，添加cookies选项
         if self.cookies_path and os.path.exists(self.cookies_path):
@@ -66,31 +311,28 @@ class VideoDownloader:
             }
         ])
         
-        last_error = None
-        for strategy in download_strategies:
-            try:
-                # 使用当前策略下载视频
-                print(f"正在尝试下载策略: {strategy['description']}")
-                subprocess.run(strategy["command"], check=True)
-                
-                # 检查文件是否存在
-                if not os.path.exists(output_path):
-                    # 尝试查找其他可能的文件名
-                    for file in os.listdir(self.output_dir):
-                        if file.startswith(video_id) and file.endswith(('.mp4', '.flv', '.webm')):
-                            output_path = os.path.join(self.output_dir, file)
-                            break
-                
-                if os.path.exists(output_path):
-                    print(f"视频下载完成: {output_path}")
-                    return output_path
-                    
-            except subprocess.CalledProcessError as e:
-                print(f"下载策略 '{strategy['description']}' 失败: {e}")
-                last_error = e
-                continue  # 尝试下一个策略
-        
-        # 如果所有策略都失败，提供更详细的错误信息和解决方案
+        return video_id, output_path, download_strategies
+    
+    def _find_downloaded_file(self, video_id, output_path):
+        """检查下载结果，返回实际的视频文件路径并记录到产物索引"""
+        if os.path.exists(output_path):
+            found_path = output_path
+        else:
+            # you-get 的实际文件名可能不同(如无法合并分P时的 <视频ID>[00].mp4)，
+            # 在视频所在的分片目录中按前缀查找，分片目录中的文件很少
+            video_dir = os.path.dirname(output_path)
+            candidates = sorted(
+                name for name in os.listdir(video_dir)
+                if name.startswith(video_id) and name.endswith(('.mp4', '.flv', '.webm', '.m4a'))
+            ) if os.path.isdir(video_dir) else []
+            if not candidates:
+                return None
+            found_path = os.path.join(video_dir, candidates[0])
+        get_artifact_index().register(video_id, "video", found_path)
+        return found_path
+    
+    def _print_failure_help(self, video_id):
+        """所有策略失败时，提供更详细的错误信息和解决方案"""
         print("\n===== 下载失败 =====")
         print("所有下载策略均失败，可能的原因:")
         print("1. 需要登录cookies (B站需要登录才能下载720p以上视频)")
@@ -99,11 +341,12 @@ class VideoDownloader:
         print("\n解决方案:")
         print("1. 提供cookies文件: 使用浏览器登录B站后导出cookies，然后使用 --cookies 参数")
         print("   例如: python main.py --cookies=cookies.txt 视频链接")
-        print("2. 手动下载视频并放置在输出目录中: " + self.output_dir)
+        print(f"2. 手动下载视频，以 {video_id}.mp4 为文件名放置在目录中: " + ArtifactIndex.path_for(self.output_dir, video_id))
         print("3. 检查网络连接或使用代理")
-        
-        if last_error:
-            raise last_error
+    
+    def get_video_id(self, url):
+        """返回视频ID(BV号或av号)，用于文件命名和任务标识"""
+        return self._extract_video_id(url)
     
     def _validate_bilibili_url(self, url):
         """验证是否为有效的B站URL"""
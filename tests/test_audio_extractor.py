@@ -0,0 +1,49 @@
+import os
+import wave
+
+import pytest
+
+from modules import artifact_index
+from modules.artifact_index import ArtifactIndex
+from modules.audio_extractor import AudioExtractor
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    index = ArtifactIndex(str(tmp_path / "index.db"))
+    monkeypatch.setattr(artifact_index, "_index", index)
+    return index
+
+
+def silent_wav(path, seconds, sample_rate=16000):
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(b"\0\0" * int(seconds * sample_rate))
+    return str(path)
+
+
+def test_multipart_download_is_named_by_video_id(tmp_path, index):
+    # you-get 分P下载的文件名为 <ID>[00].mp4，音频仍按视频ID命名和分片
+    extractor = AudioExtractor(str(tmp_path / "audio"))
+    audio_path, job_id, command = extractor._build_extract_command(
+        str(tmp_path / "BV1xx411c7mD[00].mp4"), "BV1xx411c7mD"
+    )
+    assert job_id == "BV1xx411c7mD"
+    assert audio_path == ArtifactIndex.path_for(str(tmp_path / "audio"), "BV1xx411c7mD", "BV1xx411c7mD.wav")
+    assert command[-1] == audio_path
+
+
+def test_segments_are_indexed_under_video_id(tmp_path, index):
+    extractor = AudioExtractor(str(tmp_path / "audio"))
+    audio_path = silent_wav(tmp_path / "BV1xx411c7mD[00].wav", 2.5)
+    paths = extractor.segment_audio(audio_path, segment_length_ms=1000, video_id="BV1xx411c7mD")
+
+    assert [os.path.basename(path) for path in paths] == [
+        f"BV1xx411c7mD_segment_{i}.wav" for i in (1, 2, 3)
+    ]
+    segment_dir = index.lookup("BV1xx411c7mD", "segments")
+    assert segment_dir == os.path.dirname(paths[0])
+    assert os.path.dirname(segment_dir) == ArtifactIndex.path_for(str(tmp_path / "audio"), "BV1xx411c7mD")
+    assert index.lookup("BV1xx411c7mD[00]", "segments") is None
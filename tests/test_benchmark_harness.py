@@ -0,0 +1,56 @@
+import random
+
+from modules.benchmark_harness import (build_configurations, character_error_rate, edit_distance,
+                                       normalize_for_cer, pareto_front)
+
+
+def naive_edit_distance(reference, hypothesis):
+    previous = list(range(len(hypothesis) + 1))
+    for i, a in enumerate(reference, 1):
+        current = [i]
+        for j, b in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a != b)))
+        previous = current
+    return previous[-1]
+
+
+def test_edit_distance_matches_naive_dynamic_programming():
+    rng = random.Random(0)
+    for _ in range(300):
+        reference = [rng.choice("abcd") for _ in range(rng.randint(0, 15))]
+        hypothesis = [rng.choice("abcd") for _ in range(rng.randint(0, 15))]
+        assert edit_distance(reference, hypothesis) == naive_edit_distance(reference, hypothesis)
+
+
+def test_edit_distance_basic_cases():
+    assert edit_distance(list("kitten"), list("sitting")) == 3
+    assert edit_distance([], list("abc")) == 3
+    assert edit_distance(list("abc"), []) == 3
+    assert edit_distance(list("中文字幕"), list("中文字幕")) == 0
+
+
+def test_character_error_rate_ignores_punctuation_and_spaces():
+    assert normalize_for_cer("今天，天气 很好。OK") == list("今天天气很好ok")
+    cer, errors, reference_chars = character_error_rate("今天，天气很好。", "今天 天汽 很好 啊")
+    assert (errors, reference_chars) == (2, 6)
+    assert cer == 2 / 6
+
+
+def test_pareto_front():
+    reports = [
+        {"label": "a", "cer": 0.10, "rtf": 0.5, "peak_memory_mb": 100},
+        {"label": "b", "cer": 0.20, "rtf": 0.6, "peak_memory_mb": 100},  # 被 a 支配
+        {"label": "c", "cer": 0.05, "rtf": 1.0, "peak_memory_mb": 300},
+        {"label": "d", "cer": 0.10, "rtf": 0.5, "peak_memory_mb": 100},  # 与 a 相同，不互相支配
+        {"label": "e", "error": "加载失败"},
+    ]
+    assert [report["label"] for report in pareto_front(reports)] == ["a", "c", "d"]
+
+
+def test_build_configurations_is_cartesian_product():
+    configurations = build_configurations(["m1", "m2"], [30000, 60000], ["none", "pinyin"], ["jieba"])
+    assert len(configurations) == 8
+    assert configurations[0] == {
+        "model": "m1", "segment_length_ms": 30000, "correction_model": "none",
+        "text_processor": "jieba", "punctuation": "pos", "user_dict": [], "pinyin_lexicon": []
+    }
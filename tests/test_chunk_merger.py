@@ -0,0 +1,69 @@
+from modules.chunk_merger import ChunkMerger, annotate_chunks, merge_chunks
+
+
+def words(*items):
+    """(文本, 开始, 结束) 转换为识别结果中的词"""
+    return [{"text": text, "start": start, "end": end} for text, start, end in items]
+
+
+def chunk(segments):
+    return {"text": " ".join(segment["text"] for segment in segments), "segments": segments}
+
+
+def texts(results):
+    return [segment["text"] for result in results for segment in result["segments"]]
+
+
+def test_annotate_chunks_sets_offset_and_overlap():
+    results = annotate_chunks([chunk([]), chunk([]), chunk([])], 10000, 2000)
+    assert [result["offset"] for result in results] == [0, 10, 20]
+    assert all(result["overlap"] == 2 for result in results)
+
+
+def test_seam_keeps_each_word_once():
+    # 片段步长 10 秒，重叠 2 秒: 第一个片段覆盖 [0, 12]，第二个片段从 10 秒开始
+    first = chunk(words(("a", 8.0, 8.5), ("b", 9.0, 9.5), ("c", 10.2, 10.6), ("d", 11.0, 11.4), ("e", 11.8, 12.0)))
+    second = chunk(words(("c", 0.2, 0.6), ("d", 1.0, 1.4), ("e", 1.8, 2.2), ("f", 3.0, 3.5)))
+    merged = merge_chunks(annotate_chunks([first, second], 10000, 2000))
+
+    assert texts(merged) == ["a", "b", "c", "d", "e", "f"]
+    # 接缝选在最接近重叠区中点(11 秒)的对齐词 d: d 之前取前一个片段，d 起取后一个片段
+    assert texts([merged[0]]) == ["a", "b", "c"]
+    assert texts([merged[1]]) == ["d", "e", "f"]
+    # 时间仍相对各自的 offset，文本由保留的词重新生成
+    assert merged[1]["segments"][0]["start"] == 1.0
+    assert merged[1]["text"] == "d e f"
+    assert all(result["overlap"] == 0 for result in merged)
+
+
+def test_seam_ignores_matches_far_apart_in_time():
+    # 两边都有 "x"，但时间相差超过 max_time_diff，不能作为接缝，退化为按中点切分
+    first = chunk(words(("x", 10.1, 10.4), ("y", 10.6, 10.9)))
+    second = chunk(words(("z", 1.2, 1.5), ("x", 1.6, 1.9)))
+    merged = merge_chunks(annotate_chunks([first, second], 10000, 2000))
+    assert texts(merged) == ["x", "y", "z", "x"]
+
+
+def test_midpoint_fallback_without_alignment():
+    # 重叠区内两边的词完全不同时，按重叠区中点(11 秒)切分
+    first = chunk(words(("a", 9.0, 9.5), ("b", 10.2, 10.6), ("c", 11.2, 11.6)))
+    second = chunk(words(("p", 0.2, 0.6), ("q", 1.2, 1.6), ("r", 3.0, 3.4)))
+    merged = merge_chunks(annotate_chunks([first, second], 10000, 2000))
+    assert texts(merged) == ["a", "b", "q", "r"]
+
+
+def test_merger_streams_previous_chunk():
+    merger = ChunkMerger()
+    results = annotate_chunks([chunk(words(("a", 1.0, 1.5))), chunk(words(("b", 1.0, 1.5)))], 10000, 0)
+    assert merger.add(results[0]) is None
+    assert texts([merger.add(results[1])]) == ["a"]
+    assert texts([merger.finish()]) == ["b"]
+    assert merger.finish() is None
+
+
+def test_merge_does_not_modify_input():
+    first = chunk(words(("a", 9.0, 9.5), ("b", 10.5, 11.0)))
+    second = chunk(words(("b", 0.5, 1.0), ("c", 2.0, 2.5)))
+    results = annotate_chunks([first, second], 10000, 2000)
+    merge_chunks(results)
+    assert texts([first]) == ["a", "b"] and first["overlap"] == 2
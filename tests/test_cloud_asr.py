@@ -0,0 +1,105 @@
+import types
+import wave
+
+import pytest
+
+from modules import cloud_asr
+from modules.cloud_asr import AliyunASRClient, CloudASRError, TencentASRClient
+from modules.mock_server import start_mock_server
+
+
+@pytest.fixture
+def mock_server():
+    servers = []
+
+    def start(**kwargs):
+        server, base_url = start_mock_server(**kwargs)
+        servers.append(server)
+        return server, base_url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    # 退避时间固定为 0.05 秒，避免测试等待指数退避
+    monkeypatch.setattr(cloud_asr, "random", types.SimpleNamespace(uniform=lambda low, high: min(high, 0.05)))
+
+
+def silent_wav(path, seconds, sample_rate=16000):
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(b"\0\0" * int(seconds * sample_rate))
+    return str(path)
+
+
+def aliyun_client(base_url, **kwargs):
+    return AliyunASRClient("ak", "secret", "appkey", gateway_url=f"{base_url}/stream/v1/FlashRecognizer",
+                           meta_url=f"{base_url}/", **kwargs)
+
+
+def tencent_client(base_url, **kwargs):
+    return TencentASRClient("id", "key", endpoint=f"{base_url}/", poll_interval=0.05, **kwargs)
+
+
+def test_aliyun_words_are_shifted_by_chunk_offset(tmp_path, mock_server):
+    _, base_url = mock_server()
+    client = aliyun_client(base_url, qps=100, chunk_seconds=3)
+    [result] = client.recognize_many([silent_wav(tmp_path / "a.wav", 6)])
+
+    # 模拟服务每秒音频返回一个词，3 秒的块返回 3 个词，第二个块从 3 秒开始
+    assert [segment["text"] for segment in result["segments"]] == ["这是", "模拟", "的"] * 2
+    assert [segment["start"] for segment in result["segments"]] == [0.0, 1.0, 2.0, 3.0, 4.0, 5.0]
+    assert result["segments"][0]["end"] == 0.8
+    assert result["text"] == "这是 模拟 的 这是 模拟 的"
+
+
+def test_tencent_polls_until_task_finishes(tmp_path, mock_server):
+    server, base_url = mock_server(latency=(0.2, 0.2))
+    client = tencent_client(base_url, qps=100)
+    first, second = client.recognize_many([silent_wav(tmp_path / "a.wav", 3), silent_wav(tmp_path / "b.wav", 2)])
+
+    assert [segment["text"] for segment in first["segments"]] == ["这是", "模拟", "的"]
+    assert [segment["start"] for segment in second["segments"]] == [0.0, 1.0]
+    # 任务在延迟之后才完成，期间至少轮询过一次未完成的状态
+    assert server.state.stats["requests"] > 4
+
+
+def test_throttled_requests_are_retried(tmp_path, mock_server, fast_retries):
+    server, base_url = mock_server(qps=2)
+    client = aliyun_client(base_url, qps=100, max_retries=50)
+    paths = [silent_wav(tmp_path / f"{i}.wav", 2) for i in range(4)]
+    results = client.recognize_many(paths)
+
+    assert server.state.stats["throttled"] > 0
+    assert all([segment["text"] for segment in result["segments"]] == ["这是", "模拟"] for result in results)
+
+
+def test_tencent_throttling_is_retried(tmp_path, mock_server, fast_retries):
+    server, base_url = mock_server(qps=2)
+    client = tencent_client(base_url, qps=100, max_retries=50)
+    results = client.recognize_many([silent_wav(tmp_path / f"{i}.wav", 2) for i in range(4)])
+
+    assert server.state.stats["throttled"] > 0
+    assert all(len(result["segments"]) == 2 for result in results)
+
+
+def test_retries_are_bounded(tmp_path, mock_server, fast_retries):
+    _, base_url = mock_server(qps=0.5)
+    client = aliyun_client(base_url, qps=100, max_retries=1)
+    with pytest.raises(CloudASRError) as excinfo:
+        client.recognize_many([silent_wav(tmp_path / f"{i}.wav", 2) for i in range(4)])
+    assert excinfo.value.retryable
+
+
+def test_tencent_poll_timeout(tmp_path, mock_server):
+    # 任务 10 秒后才完成，客户端最多等待 0.3 秒
+    _, base_url = mock_server(latency=(10, 10))
+    client = tencent_client(base_url, qps=100, poll_timeout=0.3)
+    with pytest.raises(CloudASRError, match="未完成"):
+        client.recognize_many([silent_wav(tmp_path / "a.wav", 2)])
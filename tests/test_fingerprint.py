@@ -0,0 +1,40 @@
+import numpy as np
+
+from modules.fingerprint import FingerprintIndex
+
+FRAME = 0.064
+
+
+def indexed(tmp_path, frames=1875):
+    """索引一个约 120 秒的视频，每帧一个哈希"""
+    index = FingerprintIndex(str(tmp_path), FRAME)
+    anchors = np.arange(frames, dtype=np.int64)
+    hashes = anchors * 7919 + 13
+    segments = [{"text": f"w{i}", "start": i * 1.0, "end": i * 1.0 + 0.5} for i in range(120)]
+    index.add("source", hashes, anchors, frames * FRAME, {"text": "", "segments": segments})
+    return index, hashes
+
+
+def test_clip_of_indexed_video_is_reused(tmp_path):
+    index, hashes = indexed(tmp_path)
+    # 新视频是原视频 60 秒起的 30 秒片段
+    start, length = 938, 469
+    clip = hashes[start:start + length]
+    match = index.match(clip, np.arange(length, dtype=np.int64), length * FRAME)
+
+    assert match["video_id"] == "source"
+    assert match["coverage"] == 1.0
+    assert abs(match["offset"] - start * FRAME) < 1e-6
+    reused = index.reuse_transcript(match, length * FRAME)
+    assert reused["segments"][0]["text"] == "w61"
+    assert all(0 <= segment["start"] and segment["end"] <= length * FRAME for segment in reused["segments"])
+
+
+def test_longer_video_quoting_indexed_audio_is_not_reused(tmp_path):
+    index, hashes = indexed(tmp_path)
+    # 新视频 240 秒，只有前 120 秒与原视频相同
+    extra = np.arange(10 ** 9, 10 ** 9 + 1875, dtype=np.int64)
+    query = np.concatenate([hashes, extra])
+    anchors = np.arange(len(query), dtype=np.int64)
+
+    assert index.match(query, anchors, len(query) * FRAME, threshold=0.1) is None
@@ -0,0 +1,70 @@
+import json
+import os
+
+import pytest
+
+from modules.http_downloader import DownloadError, RangedDownloader
+from modules.mock_server import start_mock_server
+
+CHUNK = 256 * 1024
+
+
+@pytest.fixture
+def server():
+    server, base_url = start_mock_server()
+    server.base_url = base_url
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def interrupting_downloader(fail_from, fetched, **kwargs):
+    """分段编号达到 fail_from 时模拟连接中断，记录实际请求过的分段"""
+    downloader = RangedDownloader(chunk_size=CHUNK, max_retries=0, **kwargs)
+    fetch_range = downloader._fetch_range
+
+    def fetch(urls, index, start, end, part_path):
+        if fail_from is not None and index >= fail_from:
+            raise DownloadError(f"分段 {index} 连接中断")
+        fetched.append(index)
+        fetch_range(urls, index, start, end, part_path)
+
+    downloader._fetch_range = fetch
+    return downloader
+
+
+def test_interrupted_download_resumes_remaining_chunks(tmp_path, server):
+    url = f"{server.base_url}/media/BV1mockCC001-30216.m4s"
+    output_path = str(tmp_path / "audio.m4a")
+    expected = server.state.media("BV1mockCC001-30216.m4s")
+    chunks = -(-len(expected) // CHUNK)
+
+    first = []
+    with pytest.raises(DownloadError):
+        interrupting_downloader(5, first, max_connections=1).download(url, output_path)
+    assert not os.path.exists(output_path)
+    with open(output_path + ".part.json", "r", encoding="utf-8") as f:
+        assert sorted(json.load(f)["done"]) == first == [0, 1, 2, 3, 4]
+
+    second = []
+    interrupting_downloader(None, second, max_connections=4).download(url, output_path)
+    # 只下载中断后剩余的分段，断点记录和 .part 文件被清理
+    assert sorted(second) == list(range(5, chunks))
+    assert not os.path.exists(output_path + ".part")
+    assert not os.path.exists(output_path + ".part.json")
+    with open(output_path, "rb") as f:
+        assert f.read() == expected
+
+
+def test_changed_chunk_size_restarts_download(tmp_path, server):
+    url = f"{server.base_url}/media/BV1mockAI002-30216.m4s"
+    output_path = str(tmp_path / "audio.m4a")
+
+    with pytest.raises(DownloadError):
+        interrupting_downloader(3, [], max_connections=1).download(url, output_path)
+
+    # 分段大小变化后断点记录不再适用，从头下载
+    downloader = RangedDownloader(chunk_size=CHUNK * 2, max_connections=4)
+    downloader.download([url, url + "?mirror=1"], output_path)
+    with open(output_path, "rb") as f:
+        assert f.read() == server.state.media("BV1mockAI002-30216.m4s")
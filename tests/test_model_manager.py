@@ -0,0 +1,59 @@
+import threading
+
+from modules.model_manager import ModelManager
+
+
+def test_slow_load_does_not_block_other_models():
+    manager = ModelManager()
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_loader():
+        started.set()
+        assert release.wait(5)
+        return "macbert"
+
+    thread = threading.Thread(target=manager.get, args=("corrector", slow_loader))
+    thread.start()
+    assert started.wait(5)
+    # 纠错模型加载期间，识别线程仍能获取 Vosk 模型
+    assert manager.get("vosk", lambda: "vosk") == "vosk"
+    release.set()
+    thread.join(5)
+    assert manager.get("corrector", lambda: "reloaded") == "macbert"
+
+
+def test_concurrent_callers_share_one_load():
+    manager = ModelManager()
+    calls = []
+    release = threading.Event()
+
+    def loader():
+        calls.append(1)
+        assert release.wait(5)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(manager.get("vosk", loader))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 1
+    assert len(results) == 4 and all(result is results[0] for result in results)
+
+
+def test_failed_load_lets_next_caller_retry():
+    manager = ModelManager()
+
+    def broken():
+        raise RuntimeError("模型文件损坏")
+
+    try:
+        manager.get("vosk", broken)
+    except RuntimeError:
+        pass
+    assert manager.get("vosk", lambda: "vosk") == "vosk"
+    with manager.use("vosk", broken) as model:
+        assert model == "vosk"
@@ -0,0 +1,63 @@
+import pytest
+
+pytest.importorskip("pypinyin")
+
+from modules.pinyin_corrector import PinyinCorrector, fuzzy_syllable
+
+# 常用词词频表，替代 jieba 分词词典
+COMMON_WORDS = {"公事": 2000, "戒指": 3000, "残害": 500}
+
+
+def make_corrector(words, **kwargs):
+    return PinyinCorrector(words=words, word_freq=COMMON_WORDS, **kwargs)
+
+
+def test_fuzzy_syllable():
+    assert fuzzy_syllable("zhang") == "zan"
+    assert fuzzy_syllable("ning") == "lin"
+    assert fuzzy_syllable("an") == "an"
+
+
+def test_replaces_homophones_of_lexicon_words():
+    corrector = make_corrector(["江户川乱步", "人间椅子", "知觉现象学"])
+    assert corrector.correct("他 写 的 人间 一子 和 江湖 穿 乱 步") == "他 写 的 人间椅子 和 江户川乱步"
+    assert corrector.correct("只觉现象学") == "知觉现象学"
+
+
+def test_unrelated_text_is_unchanged():
+    corrector = make_corrector(["江户川乱步"])
+    assert corrector.correct("今天天气很好") == "今天天气很好"
+    assert corrector.correct("") == ""
+
+
+def test_two_syllable_common_words_are_kept():
+    corrector = make_corrector(["公式", "介质", "残骸", "投函"])
+    assert corrector.correct("这是公事公办") == "这是公事公办"
+    assert corrector.correct("这个戒指很漂亮") == "这个戒指很漂亮"
+    assert corrector.correct("残害") == "残害"
+    # 原文不是常用词时仍然替换
+    assert corrector.correct("头韩") == "投函"
+
+
+def test_short_freq_ratio_allows_frequent_lexicon_words(tmp_path):
+    lexicon = tmp_path / "lexicon.txt"
+    lexicon.write_text("介质 5000 n\n", encoding="utf-8")
+    corrector = PinyinCorrector([str(lexicon)], word_freq=COMMON_WORDS)
+    assert corrector.correct("戒指") == "介质"
+
+
+def test_fuzzy_match_requires_min_syllables():
+    # 平翘舌不分: "知觉现象学" 读作 "zi jue xian xiang xue" 时按模糊音匹配
+    corrector = make_corrector(["知觉现象学"])
+    assert corrector.correct("资决现象学") == "知觉现象学"
+    corrector = make_corrector(["知觉现象学"], fuzzy_min_syllables=6)
+    assert corrector.correct("资决现象学") == "资决现象学"
+
+
+def test_next_corrector_is_chained():
+    class Upper:
+        def correct(self, text):
+            return text + "!"
+
+    corrector = make_corrector(["人间椅子"], next_corrector=Upper())
+    assert corrector.correct("人间一子") == "人间椅子!"
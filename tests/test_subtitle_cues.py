@@ -0,0 +1,69 @@
+from modules.subtitle_cues import build_cues, format_ass_timestamp, format_timestamp, join_words, to_srt, to_vtt
+
+
+def words(*items):
+    return [{"text": text, "start": start, "end": end} for text, start, end in items]
+
+
+def test_join_words_spaces_only_between_ascii_words():
+    assert join_words(["今天", "用", "Python", "3", "写", "代码"]) == "今天用Python 3写代码"
+
+
+def test_gap_breaks_cue():
+    cues = build_cues(words(("一", 0.0, 0.4), ("二", 0.5, 0.9), ("三", 2.0, 2.4)), max_gap=0.6)
+    assert [cue["text"] for cue in cues] == ["一二", "三"]
+    assert cues[0] == {"start": 0, "end": 900, "text": "一二"}
+
+
+def test_char_limit():
+    # 每个词 2 个字，max_chars=5: 第三个词会使字数达到 6，在它之前断开
+    segments = words(*[(f"词{i}", i * 0.3, i * 0.3 + 0.25) for i in range(5)])
+    cues = build_cues(segments, max_gap=1.0, max_chars=5, max_duration=100)
+    assert [cue["text"] for cue in cues] == ["词0词1", "词2词3", "词4"]
+    assert all(len(cue["text"]) <= 5 for cue in cues)
+
+
+def test_single_long_word_is_not_split():
+    cues = build_cues(words(("短", 0.0, 0.2), ("很长很长的一个词", 0.3, 1.0), ("短", 1.1, 1.3)), max_chars=4)
+    assert [cue["text"] for cue in cues] == ["短", "很长很长的一个词", "短"]
+
+
+def test_duration_limit():
+    segments = words(*[(str(i), i * 1.0, i * 1.0 + 0.9) for i in range(7)])
+    cues = build_cues(segments, max_gap=0.6, max_chars=100, max_duration=3.0)
+    assert [cue["text"] for cue in cues] == ["0 1 2", "3 4 5", "6"]
+
+
+def test_limits_restart_after_gap():
+    # 停顿之后重新从 0 开始累计字数
+    segments = words(("ab", 0.0, 0.2), ("cd", 0.3, 0.5), ("ef", 5.0, 5.2), ("gh", 5.3, 5.5))
+    cues = build_cues(segments, max_gap=0.6, max_chars=4, max_duration=100)
+    assert [cue["text"] for cue in cues] == ["ab cd", "ef gh"]
+
+
+def test_dense_stream_has_no_fragment_cues():
+    # 连续不断的语音: 字数和时长都从每条字幕的第一个词开始计算，不会出现交替的碎片字幕条
+    segments = words(*[("你好", i * 0.45, i * 0.45 + 0.4) for i in range(60)])
+    cues = build_cues(segments, max_gap=0.6, max_chars=20, max_duration=5.0)
+    assert "".join(cue["text"] for cue in cues) == "".join(segment["text"] for segment in segments)
+    for cue in cues[:-1]:
+        assert len(cue["text"]) >= 16
+        assert cue["end"] - cue["start"] >= 3000
+        assert len(cue["text"]) <= 20 and cue["end"] - cue["start"] <= 5000
+
+
+def test_empty_words_are_skipped():
+    assert build_cues([]) == []
+    assert build_cues(words(("", 0.0, 0.1))) == []
+
+
+def test_timestamp_formats():
+    assert format_timestamp(3723004) == "01:02:03,004"
+    assert format_timestamp(3723004, ".") == "01:02:03.004"
+    assert format_ass_timestamp(3723004) == "1:02:03.00"
+
+
+def test_writers():
+    cues = [{"start": 0, "end": 1500, "text": "你好"}]
+    assert to_srt(cues) == "1\n00:00:00,000 --> 00:00:01,500\n你好\n\n"
+    assert to_vtt(cues).startswith("WEBVTT\n\n00:00:00.000 --> 00:00:01.500\n你好")
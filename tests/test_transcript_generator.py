@@ -0,0 +1,33 @@
+from modules.transcript_generator import align_text_to_segments
+
+
+def words(*items):
+    return [{"text": text, "start": start, "end": end} for text, start, end in items]
+
+
+def test_unchanged_text_returns_original_segments():
+    segments = words(("今天", 0.0, 0.4), ("天气", 0.5, 0.9))
+    assert align_text_to_segments("今天 天气", segments) is segments
+
+
+def test_equal_length_replace_keeps_timestamps():
+    segments = words(("今天", 0.0, 0.4), ("天汽", 0.5, 0.9), ("很好", 1.0, 1.4))
+    aligned = align_text_to_segments("今天天气很好", segments)
+    assert aligned == words(("今天", 0.0, 0.4), ("天气", 0.5, 0.9), ("很好", 1.0, 1.4))
+
+
+def test_unequal_length_replace_goes_to_replaced_word():
+    # 整个词被替换为不同长度的纠错结果: 使用被替换词的时间戳，不并入前一个词
+    segments = words(("我们", 0.0, 0.4), ("江湖穿", 0.5, 1.1), ("的书", 1.2, 1.6))
+    aligned = align_text_to_segments("我们江户川乱步的书", segments)
+    assert aligned == words(("我们", 0.0, 0.4), ("江户川乱步", 0.5, 1.1), ("的书", 1.2, 1.6))
+
+    segments = words(("我们", 0.0, 0.4), ("那个", 0.5, 0.9), ("东西", 1.0, 1.4))
+    aligned = align_text_to_segments("我们它东西", segments)
+    assert aligned == words(("我们", 0.0, 0.4), ("它", 0.5, 0.9), ("东西", 1.0, 1.4))
+
+
+def test_insert_goes_to_previous_word_and_deleted_word_is_dropped():
+    segments = words(("你好", 0.0, 0.4), ("啊", 0.5, 0.6), ("世界", 0.7, 1.1))
+    aligned = align_text_to_segments("你好世界吗", segments)
+    assert aligned == words(("你好", 0.0, 0.4), ("世界吗", 0.7, 1.1))
@@ -0,0 +1,92 @@
+import argparse
+
+import pytest
+
+import config
+import main
+from modules import artifact_index
+from modules.artifact_index import ArtifactIndex
+from modules.mock_server import start_mock_server
+from modules.video_downloader import VideoDownloader
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server, base_url = start_mock_server()
+    yield base_url
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def downloader(tmp_path, base_url):
+    return VideoDownloader(str(tmp_path / "videos"), api_base=base_url)
+
+
+def video_url(bvid):
+    return f"https://www.bilibili.com/video/{bvid}"
+
+
+def test_creator_policy_uses_creator_subtitles(downloader):
+    [result] = downloader.fetch_subtitles(video_url("BV1mockCC001"), policy="creator")
+    assert result["source"] == "subtitle"
+    assert result["subtitle_lan"] == "zh-CN"
+    assert result["segments"][0] == {"text": "UP主字幕第1", "start": 0.0, "end": 3.5}
+    assert len(result["segments"]) == 15
+
+
+def test_creator_policy_ignores_ai_subtitles(downloader):
+    assert downloader.fetch_subtitles(video_url("BV1mockAI002"), policy="creator") is None
+
+
+def test_any_policy_accepts_ai_subtitles(downloader):
+    [result] = downloader.fetch_subtitles(video_url("BV1mockAI002"), policy="any")
+    assert result["subtitle_lan"] == "ai-zh"
+    assert result["segments"][0]["text"] == "AI字幕第1"
+
+
+def test_missing_or_partial_subtitles_fall_back(downloader):
+    assert downloader.fetch_subtitles(video_url("BV1mockNO003"), policy="any") is None
+    # 60 秒字幕只覆盖 600 秒视频的一小部分
+    assert downloader.fetch_subtitles(video_url("BV1mockPT004"), policy="any") is None
+    assert downloader.fetch_subtitles(video_url("BV1mockCC001"), policy="off") is None
+
+
+@pytest.fixture
+def pipeline(tmp_path, base_url, monkeypatch):
+    """main.process_video 的输出目录、产物索引和B站接口都指向临时目录和模拟服务"""
+    for name in ("DOWNLOAD_DIR", "AUDIO_DIR", "TRANSCRIPT_DIR", "STATE_DIR", "JIEBA_CACHE_DIR"):
+        monkeypatch.setattr(config, name, str(tmp_path / name.lower()))
+    monkeypatch.setattr(config, "BILIBILI_API_BASE", base_url)
+    monkeypatch.setattr(artifact_index, "_index", ArtifactIndex(str(tmp_path / "index.db")))
+
+    downloads = []
+
+    def download(self, url):
+        downloads.append(url)
+        raise RuntimeError("下载")
+
+    monkeypatch.setattr(VideoDownloader, "download", download)
+    args = argparse.Namespace(
+        cookies=None, subtitles="creator", force=True, formats=["txt"], punctuation="pause",
+        text_processor="jieba", user_dict=[], pinyin_lexicon=[], text_correction=False,
+        correction_model="pinyin", triage=False, two_tier=False, distributed=False, dedup=False,
+        engine="vosk"
+    )
+    return args, downloads
+
+
+def test_process_video_uses_subtitles_without_download(pipeline):
+    args, downloads = pipeline
+    output_files = main.process_video(args, url=video_url("BV1mockCC001"))
+    with open(output_files["txt"], "r", encoding="utf-8") as f:
+        assert "UP主字幕第1" in f.read()
+    assert downloads == []
+
+
+def test_process_video_falls_back_to_download_and_asr(pipeline):
+    args, downloads = pipeline
+    # 只有AI字幕，creator 策略不使用，继续下载视频并进行语音识别
+    with pytest.raises(RuntimeError, match="下载"):
+        main.process_video(args, url=video_url("BV1mockAI002"))
+    assert downloads == [video_url("BV1mockAI002")]